@@ -0,0 +1,221 @@
+import functools
+from pathlib import Path
+from typing import Tuple, Iterable, Union, List, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from demo.base import Demo
+from utils.logging import logger
+from utils.processes import process_unordered
+
+log = logger()
+
+# Faceit servers run at 128 tick
+DEFAULT_TICK_RATE = 128
+# view angular speed in degrees per second considered as snap
+DEFAULT_SNAP_SPEED = 2000.0
+# hit is a snap if fast aim frame is not farther than this number of ticks from it
+DEFAULT_SNAP_WINDOW = 8
+
+_FRAMES_COLUMNS = ["name", "roundNum", "tick", "viewX", "viewY", "isAlive", "activeWeapon"]
+
+_REPORT_COLUMNS = ["Player", "hits", "snaps", "snap_ratio", "max_speed", "median_speed"]
+
+
+def angle_diff(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Shortest signed difference b - a between angles in degrees in range [-180, 180)"""
+    return (b - a + 180.0) % 360.0 - 180.0
+
+
+def calc_view_speed(frames: pd.DataFrame, tick_rate: int = DEFAULT_TICK_RATE) -> pd.DataFrame:
+    """
+    Calculate angular speed of players view in degrees per second between consecutive frames of the same
+    player in the same round. Crossing 0/360 degrees does not look like a full turn.
+
+    :param frames: players frames with name, roundNum, tick, viewX, viewY columns
+    :param tick_rate: server tick rate
+    :return: frames sorted by player, round and tick with dViewX, dViewY and dView columns (NaN for first frame)
+    """
+    df = frames.sort_values(by=["name", "roundNum", "tick"], kind="stable", ignore_index=True)
+
+    names = df["name"].values
+    rounds = df["roundNum"].values
+    seconds = df["tick"].values / tick_rate
+
+    # differences between frames of different players or rounds are meaningless
+    same = np.zeros(len(df), dtype=bool)
+    same[1:] = (names[1:] == names[:-1]) & (rounds[1:] == rounds[:-1])
+
+    dt = np.full(len(df), np.nan)
+    dt[1:] = np.diff(seconds)
+    dt[~same | (dt <= 0)] = np.nan
+
+    def speed(angles: np.ndarray) -> np.ndarray:
+        result = np.full(len(angles), np.nan)
+        result[1:] = angle_diff(angles[:-1], angles[1:])
+        return result / dt
+
+    df["dViewX"] = speed(df["viewX"].values.astype(float))
+    df["dViewY"] = speed(df["viewY"].values.astype(float))
+    df["dView"] = np.hypot(df["dViewX"].values, df["dViewY"].values)
+
+    return df
+
+
+def find_fast_aim(
+        frames: pd.DataFrame,
+        threshold: float = DEFAULT_SNAP_SPEED,
+        tick_rate: int = DEFAULT_TICK_RATE
+) -> pd.DataFrame:
+    """Frames where alive player turned view faster than threshold with weapon other than knife"""
+    df = calc_view_speed(frames, tick_rate)
+    mask = df["dView"].values > threshold
+    if "isAlive" in df:
+        mask &= df["isAlive"].values.astype(bool)
+    if "activeWeapon" in df:
+        mask &= df["activeWeapon"].values != "Knife"
+    return df.loc[mask].reset_index(drop=True)
+
+
+def join_ticks(frame_ticks: np.ndarray, event_ticks: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find all pairs of frame and event with |frame tick - event tick| <= window in O((n + m) log n + pairs).
+
+    :param frame_ticks: ticks of frames sorted ascending
+    :param event_ticks: ticks of events
+    :param window: maximum distance in ticks
+    :return: indices of frames and events of each pair
+    """
+    left = np.searchsorted(frame_ticks, event_ticks - window, side="left")
+    right = np.searchsorted(frame_ticks, event_ticks + window, side="right")
+    counts = right - left
+    event_index = np.repeat(np.arange(len(event_ticks)), counts)
+    # position of the pair inside its event range added to the beginning of the range
+    starts = np.cumsum(counts) - counts
+    frame_index = np.arange(counts.sum()) - np.repeat(starts, counts) + np.repeat(left, counts)
+    return frame_index, event_index
+
+
+def find_aim_snaps(
+        frames: pd.DataFrame,
+        damages: pd.DataFrame,
+        threshold: float = DEFAULT_SNAP_SPEED,
+        window: int = DEFAULT_SNAP_WINDOW,
+        tick_rate: int = DEFAULT_TICK_RATE
+) -> pd.DataFrame:
+    """
+    Match each player hit to fast aim frames of the attacker around hit tick.
+
+    :return: hits (damages with hpDamageTaken > 0) with maximum view speed (snap_speed) of attacker
+        within the window and snap flag
+    """
+    hits = damages.loc[damages["hpDamageTaken"] > 0].reset_index(drop=True)
+    hits["snap_speed"] = 0.0
+
+    fast = find_fast_aim(frames, threshold, tick_rate)
+
+    for name, player_fast in fast.groupby(by="name", sort=False, observed=True):
+        player_hits = np.flatnonzero(hits["attackerName"].values == name)
+        if len(player_hits) == 0:
+            continue
+        player_fast = player_fast.sort_values(by="tick", kind="stable")
+        ticks = player_fast["tick"].values
+        frame_index, event_index = join_ticks(ticks, hits["tick"].values[player_hits], window)
+        if len(frame_index) == 0:
+            continue
+        speeds = np.zeros(len(player_hits))
+        np.maximum.at(speeds, event_index, player_fast["dView"].values[frame_index])
+        hits.loc[player_hits, "snap_speed"] = speeds
+
+    hits["snap"] = hits["snap_speed"] > 0
+    return hits
+
+
+def aim_report(
+        frames: pd.DataFrame,
+        damages: pd.DataFrame,
+        threshold: float = DEFAULT_SNAP_SPEED,
+        window: int = DEFAULT_SNAP_WINDOW,
+        tick_rate: int = DEFAULT_TICK_RATE
+) -> pd.DataFrame:
+    """Per player number of hits done right after view snap, the most suspicious players first"""
+    hits = find_aim_snaps(frames, damages, threshold, window, tick_rate)
+    if hits.empty:
+        return pd.DataFrame(columns=_REPORT_COLUMNS)
+    snaps = hits["snap_speed"].where(hits["snap"])
+    report = pd.DataFrame({
+        "hits": hits.groupby("attackerName").size(),
+        "snaps": hits.groupby("attackerName")["snap"].sum(),
+        "max_speed": snaps.groupby(hits["attackerName"]).max(),
+        "median_speed": snaps.groupby(hits["attackerName"]).median(),
+    })
+    report["snap_ratio"] = report["snaps"] / report["hits"]
+    report = report.rename_axis("Player").reset_index()
+    return report[_REPORT_COLUMNS].sort_values(by=["snap_ratio", "snaps"], ascending=False, ignore_index=True)
+
+
+def demo_aim_report(
+        demo_path: Union[Path, str],
+        parse_rate: int = 1,
+        threshold: float = DEFAULT_SNAP_SPEED,
+        window: int = DEFAULT_SNAP_WINDOW,
+        tick_rate: int = DEFAULT_TICK_RATE,
+        force: bool = False
+) -> pd.DataFrame:
+    demo = Demo.load(demo_path, force, parse_rate=parse_rate, frames_columns=_FRAMES_COLUMNS)
+    if demo.frames is None or demo.frames.empty:
+        raise ValueError(f"No players frames parsed for demo {demo_path}, try to force re-parse")
+    report = aim_report(demo.frames, demo.damages, threshold, window, tick_rate)
+    report.insert(0, "demo", Path(demo_path).stem)
+    return report
+
+
+def _scan(
+        scan: Callable[[Path], pd.DataFrame],
+        demo_path: Path
+) -> Tuple[Path, Optional[pd.DataFrame], Optional[Exception]]:
+    try:
+        return demo_path, scan(demo_path), None
+    except Exception as error:
+        return demo_path, None, error
+
+
+def aim_reports(
+        demo_paths: Iterable[Union[Path, str]],
+        workers: int = 1,
+        parse_rate: int = 1,
+        threshold: float = DEFAULT_SNAP_SPEED,
+        window: int = DEFAULT_SNAP_WINDOW,
+        tick_rate: int = DEFAULT_TICK_RATE,
+        force: bool = False
+) -> pd.DataFrame:
+    """
+    Scan every player of every demo for view snaps right before hits. Demos are parsed and scanned
+    in a pool of processes by process_unordered(), only reports are sent back and at most `workers`
+    demos are in memory at a time. Demos failed to parse, without frames or crashed the parsing
+    process are logged and skipped.
+
+    :param force: force to re-parse demos even if they cached
+    :return: suspicion report, the most suspicious players first
+    """
+    scan = functools.partial(
+        demo_aim_report, parse_rate=parse_rate, threshold=threshold, window=window, tick_rate=tick_rate, force=force)
+
+    if workers <= 1:
+        scanned = (_scan(scan, it) for it in map(Path, demo_paths))
+    else:
+        scanned = process_unordered(scan, map(Path, demo_paths), workers)
+
+    reports: List[pd.DataFrame] = []
+    for demo_path, report, error in scanned:
+        if error is not None:
+            log.error(f"Can't scan demo {demo_path} due to {error!r}")
+        else:
+            reports.append(report)
+
+    if not reports:
+        return pd.DataFrame(columns=["demo"] + _REPORT_COLUMNS)
+
+    return pd.concat(reports, ignore_index=True) \
+        .sort_values(by=["snap_ratio", "snaps"], ascending=False, ignore_index=True)
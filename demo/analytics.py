@@ -1,12 +1,55 @@
 # Helper functions for calc_stats()
 # based on https://github.com/pnxenopoulos/awpy/blob/main/examples/01_Basic_CSGO_Analysis.ipynb
 
-from typing import List, Dict, Union
+from typing import List, Dict, Union, Tuple, Optional
 
+import numpy as np
 import pandas as pd
 
-from demo.functions import filter_df, filter_group_aggregate, rounds_by_player, players_teams, \
-    calc_impact_ex, calc_rating_ex
+from demo.functions import filter_df, filter_group_aggregate, rounds_by_player, rounds_by_team, players_teams, \
+    calc_impact_ex, calc_rating_ex, Aggregation, aggregate_many
+
+# increase when calculation of any statistics changed to invalidate cached results
+ANALYTICS_VERSION = 1
+
+KILL_TYPES = [
+    "Melee Kills",
+    "Pistol Kills",
+    "Shotgun Kills",
+    "SMG Kills",
+    "Assault Rifle Kills",
+    "Machine Gun Kills",
+    "Sniper Rifle Kills",
+    "Utility Kills",
+]
+
+# kills by weapons not listed in the table (grenades, fire, zeus, etc.) are utility kills
+UNKNOWN_KILL_TYPE = "Utility Kills"
+
+KILL_TYPE_DTYPE = pd.CategoricalDtype(KILL_TYPES)
+
+UTILITY_DAMAGE_WEAPONS = ["HE Grenade", "Incendiary Grenade", "Molotov"]
+
+WEAPON_KILL_TYPES: Dict[str, str] = {
+    "Knife": "Melee Kills",
+    **dict.fromkeys([
+        "CZ-75 Auto",
+        "Desert Eagle",
+        "Dual Berettas",
+        "Five-SeveN",
+        "Glock-18",
+        "P2000",
+        "P250",
+        "R8 Revolver",
+        "Tec-9",
+        "USP-S",
+    ], "Pistol Kills"),
+    **dict.fromkeys(["MAG-7", "Nova", "Sawed-Off", "XM1014"], "Shotgun Kills"),
+    **dict.fromkeys(["MAC-10", "MP5-SD", "MP7", "MP9", "P90", "PP-Bizon", "UMP-45"], "SMG Kills"),
+    **dict.fromkeys(["AK-47", "AUG", "FAMAS", "Galil AR", "M4A1-S", "M4A4", "SG 553"], "Assault Rifle Kills"),
+    **dict.fromkeys(["M249", "Negev"], "Machine Gun Kills"),
+    **dict.fromkeys(["AWP", "G3SG1", "SCAR-20", "SSG 08"], "Sniper Rifle Kills"),
+}
 
 
 def calc_accuracy(
@@ -21,42 +64,32 @@ def calc_accuracy(
     stats = ["playerName", "attackerName", "Player"]
     if team:
         stats = ["playerTeam", "attackerTeam", "Team"]
-    weapon_fires = filter_group_aggregate(
+    weapon_fires = aggregate_many(
         weapon_fire_data,
-        filters=weapon_fire_filters,
-        groupby=[stats[0]],
-        aggregate={stats[0]: ["size"]},
-        rename=[stats[2], "Weapon Fires"],
-    )
-    strafe_fires = filter_group_aggregate(
-        weapon_fire_data.loc[weapon_fire_data["playerStrafe"] == True],
-        filters=weapon_fire_filters,
-        groupby=[stats[0]],
-        aggregate={stats[0]: ["size"]},
-        rename=[stats[2], "Strafe Fires"],
-    )
-    hits = filter_group_aggregate(
-        damage_data.loc[damage_data["attackerTeam"] != damage_data["victimTeam"]],
-        filters=damage_filters,
-        groupby=[stats[1]],
-        aggregate={stats[1]: ["size"]},
-        rename=[stats[2], "Hits"],
+        [
+            Aggregation("Weapon Fires", stats[0], filters=weapon_fire_filters),
+            Aggregation(
+                "Strafe Fires", stats[0],
+                mask=weapon_fire_data["playerStrafe"] == True,
+                filters=weapon_fire_filters),
+        ],
+        key=stats[2]
     )
 
-    headshots_filter = \
-        (damage_data["attackerTeam"] != damage_data["victimTeam"]) & \
-        (damage_data["hitGroup"] == "Head")
-    headshots = filter_group_aggregate(
-        damage_data.loc[headshots_filter],
-        filters=damage_filters,
-        groupby=[stats[1]],
-        aggregate={stats[1]: ["size"]},
-        rename=[stats[2], "Headshots"],
+    enemy_hits = damage_data["attackerTeam"] != damage_data["victimTeam"]
+    hits = aggregate_many(
+        damage_data,
+        [
+            Aggregation("Hits", stats[1], mask=enemy_hits, filters=damage_filters),
+            Aggregation(
+                "Headshots", stats[1],
+                mask=enemy_hits & (damage_data["hitGroup"] == "Head"),
+                filters=damage_filters),
+        ],
+        key=stats[2]
     )
 
-    acc = weapon_fires.merge(strafe_fires, how="outer").fillna(0)
-    acc = acc.merge(hits, how="outer").fillna(0)
-    acc = acc.merge(headshots, how="outer").fillna(0)
+    acc = weapon_fires.merge(hits, how="outer").fillna(0)
     acc["Strafe%"] = acc["Strafe Fires"] / acc["Weapon Fires"] * 100.0
     acc["ACC%"] = acc["Hits"] / acc["Weapon Fires"] * 100.0
     acc["HS ACC%"] = acc["Headshots"] / acc["Weapon Fires"] * 100.0
@@ -66,101 +99,113 @@ def calc_accuracy(
     return acc
 
 
-def calc_kast(
+def _round_player_counts(
+        events: pd.DataFrame,
+        round_index: pd.Index,
+        player_index: pd.Index,
+) -> pd.DataFrame:
+    """Returns a round x player matrix with number of events of (roundNum, name) table"""
+    return events \
+        .set_axis(["roundNum", "Player"], axis=1) \
+        .groupby(["roundNum", "Player"]) \
+        .size() \
+        .unstack(fill_value=0) \
+        .reindex(index=round_index, columns=player_index, fill_value=0) \
+        .astype(int)
+
+
+def _calc_kast_rounds(
         kill_data: pd.DataFrame,
         kast_string: str = "KAST",
         flash_assists: bool = True,
         kill_filters: Dict[str, Union[List[bool], List[str]]] = None,
         death_filters: Dict[str, Union[List[bool], List[str]]] = None,
-) -> pd.DataFrame:
+) -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """
+    Returns round x player matrix of rounds counted for KAST and round x player matrices
+    with number of kills, assists, survivals and trades
+    """
     kill_filters = kill_filters or dict()
     death_filters = death_filters or dict()
 
-    columns = ["Player", f"{kast_string.upper()}%"]
-    kast_counts = dict()
-    kast_rounds = dict()
+    kast_string = kast_string.upper()
 
-    columns.extend(list(kast_string.upper()))
+    kills = filter_df(kill_data, kill_filters)
+
+    # KAST is calculated only over rounds where at least one kill happened
+    round_index = pd.Index(kills["roundNum"].unique())
+    player_index = pd.Index(kill_data["attackerName"].unique())
+
+    enemy_kills = kills["attackerTeam"] != kills["victimTeam"]
+    assists = kills["assisterTeam"] != kills["victimTeam"]
+
+    killers = kills.loc[enemy_kills, ["roundNum", "attackerName"]]
+    victims = kills[["roundNum", "victimName"]]
+    assisters = kills.loc[assists, ["roundNum", "assisterName"]]
+    traded = kills.loc[enemy_kills & (kills["isTrade"] == True), ["roundNum", "playerTradedName"]]
 
-    killers = filter_group_aggregate(
-        kill_data.loc[kill_data["attackerTeam"] != kill_data["victimTeam"]],
-        filters=kill_filters,
-        groupby=["roundNum"],
-        aggregate={"attackerName": ["sum"]},
-        rename=["RoundNum", "Killers"],
-    )
-    victims = filter_group_aggregate(
-        kill_data,
-        filters=kill_filters,
-        groupby=["roundNum"],
-        aggregate={"victimName": ["sum"]},
-        rename=["RoundNum", "Victims"],
-    )
-    assisters = filter_group_aggregate(
-        kill_data.loc[kill_data["assisterTeam"] != kill_data["victimTeam"]].fillna(""),
-        filters=kill_filters,
-        groupby=["roundNum"],
-        aggregate={"assisterName": ["sum"]},
-        rename=["RoundNum", "Assisters"],
-    )
-    traded = filter_group_aggregate(
-        kill_data.loc[
-            (kill_data["attackerTeam"] != kill_data["victimTeam"])
-            & (kill_data["isTrade"] == True)
-            ].fillna(""),
-        filters=kill_filters,
-        groupby=["roundNum"],
-        aggregate={"playerTradedName": ["sum"]},
-        rename=["RoundNum", "Traded"],
-    )
     if flash_assists:
-        flash_assisters_filter = kill_data["flashThrowerTeam"] != kill_data["victimTeam"]
-        flash_assisters = filter_group_aggregate(
-            kill_data.loc[flash_assisters_filter].fillna(""),
-            filters=kill_filters,
-            groupby=["roundNum"],
-            aggregate={"flashThrowerName": ["sum"]},
-            rename=["RoundNum", "Flash Assisters"],
-        )
-        assisters = assisters.merge(flash_assisters, on="RoundNum")
-        assisters["Assisters"] = assisters["Assisters"] + assisters["Flash Assisters"]
-        assisters = assisters[["RoundNum", "Assisters"]]
-    kast_data = killers.merge(assisters, how="outer").fillna("")
-    kast_data = kast_data.merge(victims, how="outer").fillna("")
-    kast_data = kast_data.merge(traded, how="outer").fillna("")
-    for player in kill_data["attackerName"].unique():
-        kast_counts[player] = [[0, 0, 0, 0] for i in range(len(kast_data))]
-        kast_rounds[player] = [0, 0, 0, 0, 0]
-    for rd in kast_data.index:
-        for player in kast_counts:
-            if "K" in kast_string.upper():
-                kast_counts[player][rd][0] = kast_data.iloc[rd]["Killers"].count(player)
-                kast_rounds[player][1] += kast_data.iloc[rd]["Killers"].count(player)
-            if "A" in kast_string.upper():
-                kast_counts[player][rd][1] = kast_data.iloc[rd]["Assisters"].count(player)
-                kast_rounds[player][2] += kast_data.iloc[rd]["Assisters"].count(player)
-            if "S" in kast_string.upper():
-                if player not in kast_data.iloc[rd]["Victims"]:
-                    kast_counts[player][rd][2] = 1
-                    kast_rounds[player][3] += 1
-            if "T" in kast_string.upper():
-                kast_counts[player][rd][3] = kast_data.iloc[rd]["Traded"].count(player)
-                kast_rounds[player][4] += kast_data.iloc[rd]["Traded"].count(player)
-    for player in kast_rounds:
-        for rd in kast_counts[player]:
-            if any(rd):
-                kast_rounds[player][0] += 1
-        kast_rounds[player][0] /= len(kast_data)
-    kast = pd.DataFrame.from_dict(kast_rounds, orient="index").reset_index()
-    kast.columns = ["Player", f"{kast_string.upper()}%", "K", "A", "S", "T"]
+        flash_assisted = kills["flashThrowerTeam"] != kills["victimTeam"]
+        flash_assisters = kills.loc[flash_assisted, ["roundNum", "flashThrowerName"]]
+        # assists are only counted in rounds that have both assist and flash assist candidates
+        assist_rounds = set(assisters["roundNum"]).intersection(flash_assisters["roundNum"])
+        flash_assisters = flash_assisters.set_axis(assisters.columns, axis=1)
+        assisters = pd.concat([assisters, flash_assisters], ignore_index=True)
+        assisters = assisters.loc[assisters["roundNum"].isin(assist_rounds)]
+
+    zeros = pd.DataFrame(0, index=round_index, columns=player_index)
+
+    k = _round_player_counts(killers, round_index, player_index) if "K" in kast_string else zeros
+    a = _round_player_counts(assisters, round_index, player_index) if "A" in kast_string else zeros
+    t = _round_player_counts(traded, round_index, player_index) if "T" in kast_string else zeros
+    if "S" in kast_string:
+        s = (_round_player_counts(victims, round_index, player_index) == 0).astype(int)
+    else:
+        s = zeros
+
+    kast_rounds = (k > 0) | (a > 0) | (s > 0) | (t > 0)
+    return kast_rounds, {"K": k, "A": a, "S": s, "T": t}
+
+
+def calc_kast(
+        kill_data: pd.DataFrame,
+        kast_string: str = "KAST",
+        flash_assists: bool = True,
+        kill_filters: Dict[str, Union[List[bool], List[str]]] = None,
+        death_filters: Dict[str, Union[List[bool], List[str]]] = None,
+) -> pd.DataFrame:
+    kast_string = kast_string.upper()
+    kast_column = f"{kast_string}%"
+    columns = ["Player", kast_column]
+    columns.extend(list(kast_string))
+
+    kast_rounds, counts = _calc_kast_rounds(kill_data, kast_string, flash_assists, kill_filters, death_filters)
+
+    kast = pd.DataFrame({
+        "Player": kast_rounds.columns,
+        kast_column: kast_rounds.sum().values / len(kast_rounds.index),
+        **{name: count.sum().values for name, count in counts.items()},
+    })
     kast = kast[columns]
-    kast[f"{kast_string.upper()}%"] = kast[f"{kast_string.upper()}%"] * 100.0
+    kast[kast_column] = kast[kast_column] * 100.0
     kast.fillna(0, inplace=True)
-    kast.sort_values(by=f"{kast_string.upper()}%", ascending=False, inplace=True)
+    kast.sort_values(by=kast_column, ascending=False, inplace=True)
     kast.reset_index(drop=True, inplace=True)
     return kast
 
 
+def _rounds(
+        damage_data: pd.DataFrame,
+        round_data: pd.DataFrame,
+        team: bool,
+        round_filters: Dict[str, Union[List[bool], List[str]]],
+) -> pd.DataFrame:
+    """Returns number of played rounds by each player or by each team"""
+    if team:
+        return rounds_by_team(round_data, round_filters).rename(columns={"team": "Team"})
+    return rounds_by_player(round_data, players_teams(damage_data), round_filters)
+
+
 def calc_kill_stats(
         damage_data: pd.DataFrame,
         kill_data: pd.DataFrame,
@@ -196,77 +241,27 @@ def calc_kill_stats(
             "Team",
         ]
 
-    kills = filter_group_aggregate(
-        kill_data.loc[kill_data["attackerTeam"] != kill_data["victimTeam"]],
-        filters=kill_filters,
-        groupby=[stats[0]],
-        aggregate={stats[0]: ["size"]},
-        rename=[stats[4], "K"],
-    )
-
-    deaths = filter_group_aggregate(
+    enemy_kills = kill_data["attackerTeam"] != kill_data["victimTeam"]
+    first_kills = enemy_kills & (kill_data["isFirstKill"] == True)
+    kills = aggregate_many(
         kill_data,
-        filters=death_filters,
-        groupby=[stats[1]],
-        aggregate={stats[1]: ["size"]},
-        rename=[stats[4], "D"],
-    )
-
-    assists = filter_group_aggregate(
-        kill_data.loc[kill_data["assisterTeam"] != kill_data["victimTeam"]],
-        filters=kill_filters,
-        groupby=[stats[2]],
-        aggregate={stats[2]: ["size"]},
-        rename=[stats[4], "A"],
-    )
-
-    flash_assists = filter_group_aggregate(
-        kill_data.loc[kill_data["flashThrowerTeam"] != kill_data["victimTeam"]],
-        filters=kill_filters,
-        groupby=[stats[3]],
-        aggregate={stats[3]: ["size"]},
-        rename=[stats[4], "FA"],
-    )
-
-    first_kills_filter = \
-        (kill_data["attackerTeam"] != kill_data["victimTeam"]) & \
-        (kill_data["isFirstKill"] == True)
-    first_kills = filter_group_aggregate(
-        kill_data.loc[first_kills_filter],
-        filters=kill_filters,
-        groupby=[stats[0]],
-        aggregate={stats[0]: ["size"]},
-        rename=[stats[4], "FK"],
-    )
-
-    first_deaths_filter = \
-        (kill_data["attackerTeam"] != kill_data["victimTeam"]) & \
-        (kill_data["isFirstKill"] == True)
-    first_deaths = filter_group_aggregate(
-        kill_data.loc[first_deaths_filter],
-        filters=kill_filters,
-        groupby=[stats[1]],
-        aggregate={stats[1]: ["size"]},
-        rename=[stats[4], "FD"],
-    )
-
-    headshots_filter = \
-        (kill_data["attackerTeam"] != kill_data["victimTeam"]) & \
-        (kill_data["isHeadshot"] == True)
-    headshots = filter_group_aggregate(
-        kill_data.loc[headshots_filter],
-        filters=kill_filters,
-        groupby=[stats[0]],
-        aggregate={stats[0]: ["size"]},
-        rename=[stats[4], "HS"],
-    )
-
-    headshot_pct = filter_group_aggregate(
-        kill_data.loc[kill_data["attackerTeam"] != kill_data["victimTeam"]],
-        filters=kill_filters,
-        groupby=[stats[0]],
-        aggregate={"isHeadshot": ["mean"]},
-        rename=[stats[4], "HS%"],
+        [
+            Aggregation("K", stats[0], mask=enemy_kills, filters=kill_filters),
+            Aggregation("D", stats[1], filters=death_filters),
+            Aggregation("A", stats[2], mask=kill_data["assisterTeam"] != kill_data["victimTeam"], filters=kill_filters),
+            Aggregation(
+                "FA", stats[3],
+                mask=kill_data["flashThrowerTeam"] != kill_data["victimTeam"],
+                filters=kill_filters),
+            Aggregation("FK", stats[0], mask=first_kills, filters=kill_filters),
+            Aggregation("FD", stats[1], mask=first_kills, filters=kill_filters),
+            Aggregation(
+                "HS", stats[0],
+                mask=enemy_kills & (kill_data["isHeadshot"] == True),
+                filters=kill_filters),
+            Aggregation("HS%", stats[0], "mean", "isHeadshot", mask=enemy_kills, filters=kill_filters),
+        ],
+        key=stats[4]
     )
 
     acc_stats = calc_accuracy(damage_data, weapon_fire_data, team, damage_filters, weapon_fire_filters)
@@ -278,17 +273,13 @@ def calc_kill_stats(
         kill_filters=kill_filters,
         death_filters=death_filters)
 
-    teams = players_teams(damage_data)
-    rounds = rounds_by_player(round_data, teams, round_filters)
+    rounds = _rounds(damage_data, round_data, team, round_filters)
 
-    kill_stats = kills.merge(deaths, how="outer").fillna(0)
-    kill_stats = kill_stats.merge(rounds, on="Player", how="outer").fillna(0)
-    kill_stats = kill_stats.merge(assists, how="outer").fillna(0)
-    kill_stats = kill_stats.merge(flash_assists, how="outer").fillna(0)
-    kill_stats = kill_stats.merge(first_kills, how="outer").fillna(0)
-    kill_stats = kill_stats.merge(first_deaths, how="outer").fillna(0)
-    kill_stats = kill_stats.merge(headshots, how="outer").fillna(0)
-    kill_stats = kill_stats.merge(headshot_pct, how="outer").fillna(0)
+    # rounds merged after kills and deaths to keep players order
+    kill_stats = kills.loc[kills["K"] > 0, [stats[4], "K"]]
+    kill_stats = kill_stats.merge(kills.loc[kills["D"] > 0, [stats[4], "D"]], how="outer").fillna(0)
+    kill_stats = kill_stats.merge(rounds, on=stats[4], how="outer").fillna(0)
+    kill_stats = kill_stats.merge(kills.drop(columns=["K", "D"]), how="outer").fillna(0)
     kill_stats = kill_stats.merge(acc_stats, how="outer").fillna(0)
 
     if not team:
@@ -343,18 +334,19 @@ def calc_adr(
 
     stats = ["attackerName", "Player"] if not team else ["attackerTeam", "Team"]
 
-    adr_stats = filter_group_aggregate(
-        damage_data.loc[damage_data["attackerTeam"] != damage_data["victimTeam"]],
-        filters=damage_filters,
-        groupby=[stats[0]],
-        aggregate={"hpDamageTaken": ["sum"], "hpDamage": ["sum"]},
-        rename=[stats[1], "Norm ADR", "Raw ADR"],
+    enemy_damages = damage_data["attackerTeam"] != damage_data["victimTeam"]
+    adr_stats = aggregate_many(
+        damage_data,
+        [
+            Aggregation("Norm ADR", stats[0], "sum", "hpDamageTaken", mask=enemy_damages, filters=damage_filters),
+            Aggregation("Raw ADR", stats[0], "sum", "hpDamage", mask=enemy_damages, filters=damage_filters),
+        ],
+        key=stats[1]
     )
 
-    teams = players_teams(damage_data)
-    rounds = rounds_by_player(round_data, teams, round_filters)
+    rounds = _rounds(damage_data, round_data, team, round_filters)
 
-    adr_stats = adr_stats.merge(rounds, on="Player", how="outer")
+    adr_stats = adr_stats.merge(rounds, on=stats[1], how="outer")
 
     adr_stats["Norm ADR"] = adr_stats["Norm ADR"] / adr_stats["rounds"]
     adr_stats["Raw ADR"] = adr_stats["Raw ADR"] / adr_stats["rounds"]
@@ -374,6 +366,8 @@ def calc_rating(
         death_filters: Dict[str, Union[List[bool], List[str]]] = None,
         kill_filters: Dict[str, Union[List[bool], List[str]]] = None,
         round_filters: Dict[str, Union[List[bool], List[str]]] = None,
+        kast_stats: Optional[pd.DataFrame] = None,
+        adr_stats: Optional[pd.DataFrame] = None,
 ) -> pd.DataFrame:
     """Returns a dataframe with an HLTV-esque rating, found by doing:
 
@@ -402,6 +396,10 @@ def calc_rating(
         round_filters: A dictionary where the keys are the columns of the
             dataframe represented by round_data to filter the round data by and
             the values are lists that contain the column filters.
+        kast_stats: Already calculated by calc_kast() with the same filters
+            to not calculate it again, if None then calculated.
+        adr_stats: Already calculated by calc_adr() with the same filters
+            to not calculate it again, if None then calculated.
     """
     damage_filters = damage_filters or dict()
     death_filters = death_filters or dict()
@@ -410,43 +408,37 @@ def calc_rating(
 
     stats_kills = ["attackerName", "victimName", "assisterName", "flashThrowerName", "Player"]
 
-    kast_stats = calc_kast(kill_data, "KAST", True, kill_filters, death_filters)
+    if kast_stats is None:
+        kast_stats = calc_kast(kill_data, "KAST", True, kill_filters, death_filters)
     kast_stats = kast_stats[["Player", "KAST%"]]
     kast_stats.columns = ["Player", "KAST"]
 
-    adr_stats = calc_adr(damage_data, round_data, False, damage_filters, round_filters)
+    if adr_stats is None:
+        adr_stats = calc_adr(damage_data, round_data, False, damage_filters, round_filters)
     adr_stats = adr_stats[["Player", "Norm ADR"]]
     adr_stats.columns = ["Player", "ADR"]
     stats = ["attackerName", "Player"]
 
-    kills = filter_group_aggregate(
-        kill_data.loc[kill_data["attackerTeam"] != kill_data["victimTeam"]],
-        filters=kill_filters,
-        groupby=[stats_kills[0]],
-        aggregate={stats_kills[0]: ["size"]},
-        rename=[stats_kills[4], "K"],
-    )
-    deaths = filter_group_aggregate(
+    kills = aggregate_many(
         kill_data,
-        filters=death_filters,
-        groupby=[stats_kills[1]],
-        aggregate={stats_kills[1]: ["size"]},
-        rename=[stats_kills[4], "D"],
-    )
-    assists = filter_group_aggregate(
-        kill_data.loc[kill_data["assisterTeam"] != kill_data["victimTeam"]],
-        filters=kill_filters,
-        groupby=[stats_kills[2]],
-        aggregate={stats_kills[2]: ["size"]},
-        rename=[stats_kills[4], "A"],
+        [
+            Aggregation(
+                "K", stats_kills[0],
+                mask=kill_data["attackerTeam"] != kill_data["victimTeam"],
+                filters=kill_filters),
+            Aggregation("D", stats_kills[1], filters=death_filters),
+            Aggregation(
+                "A", stats_kills[2],
+                mask=kill_data["assisterTeam"] != kill_data["victimTeam"],
+                filters=kill_filters),
+        ],
+        key=stats_kills[4]
     )
 
     teams = players_teams(damage_data)
     rounds = rounds_by_player(round_data, teams, round_filters)
 
-    kill_stats = kills.merge(deaths, how="outer").fillna(0)
-    kill_stats = kill_stats.merge(assists, how="outer").fillna(0)
-    kill_stats = kill_stats.merge(rounds, on="Player", how="outer").fillna(0)
+    kill_stats = kills.merge(rounds, on="Player", how="outer").fillna(0)
 
     kill_stats["KPR"] = kill_stats["K"] / kill_stats["rounds"]
     kill_stats["DPR"] = kill_stats["D"] / kill_stats["rounds"]
@@ -481,7 +473,7 @@ def calc_util_dmg(
 
     damage_data_filter = \
         (damage_data["attackerTeam"] != damage_data["victimTeam"]) & \
-        (damage_data["weapon"].isin(["HE Grenade", "Incendiary Grenade", "Molotov"]))
+        (damage_data["weapon"].isin(UTILITY_DAMAGE_WEAPONS))
     util_dmg = filter_group_aggregate(
         damage_data.loc[damage_data_filter],
         filters=damage_filters,
@@ -490,7 +482,7 @@ def calc_util_dmg(
         rename=[stats[2], "Given UD", "UD"],
     )
 
-    nades_thrown_filter = grenade_data["grenadeType"].isin(["HE Grenade", "Incendiary Grenade", "Molotov"])
+    nades_thrown_filter = grenade_data["grenadeType"].isin(UTILITY_DAMAGE_WEAPONS)
     nades_thrown = filter_group_aggregate(
         grenade_data.loc[nades_thrown_filter],
         filters=grenade_filters,
@@ -526,12 +518,18 @@ def calc_flash_stats(
     stats = ["attackerName", "flashThrowerName", "throwerName", "Player"] if not team \
         else ["attackerTeam", "flashThrowerTeam", "throwerTeam", "Team"]
 
-    enemy_flashes = filter_group_aggregate(
-        flash_data.loc[flash_data["attackerTeam"] != flash_data["playerTeam"]],
-        filters=flash_filters,
-        groupby=[stats[0]],
-        aggregate={stats[0]: ["size"]},
-        rename=[stats[3], "EF"],
+    enemy_flashes = flash_data["attackerTeam"] != flash_data["playerTeam"]
+    flashes = aggregate_many(
+        flash_data,
+        [
+            Aggregation("EF", stats[0], mask=enemy_flashes, filters=flash_filters),
+            Aggregation("EBT", stats[0], "sum", "flashDuration", mask=enemy_flashes, filters=flash_filters),
+            Aggregation(
+                "TF", stats[0],
+                mask=flash_data["attackerTeam"] == flash_data["playerTeam"],
+                filters=flash_filters),
+        ],
+        key=stats[3]
     )
     flash_assists = filter_group_aggregate(
         kill_data.loc[kill_data["flashThrowerTeam"] != kill_data["victimTeam"]],
@@ -540,20 +538,6 @@ def calc_flash_stats(
         aggregate={stats[1]: ["size"]},
         rename=[stats[3], "FA"],
     )
-    blind_time = filter_group_aggregate(
-        flash_data.loc[flash_data["attackerTeam"] != flash_data["playerTeam"]],
-        filters=flash_filters,
-        groupby=[stats[0]],
-        aggregate={"flashDuration": ["sum"]},
-        rename=[stats[3], "EBT"],
-    )
-    team_flashes = filter_group_aggregate(
-        flash_data.loc[flash_data["attackerTeam"] == flash_data["playerTeam"]],
-        filters=flash_filters,
-        groupby=[stats[0]],
-        aggregate={stats[0]: ["size"]},
-        rename=[stats[3], "TF"],
-    )
     flashes_thrown = filter_group_aggregate(
         grenade_data.loc[grenade_data["grenadeType"] == "Flashbang"],
         filters=flash_filters,
@@ -561,9 +545,10 @@ def calc_flash_stats(
         aggregate={stats[2]: ["size"]},
         rename=[stats[3], "Flashes Thrown"],
     )
-    flash_stats = enemy_flashes.merge(flash_assists, how="outer").fillna(0)
-    flash_stats = flash_stats.merge(blind_time, how="outer").fillna(0)
-    flash_stats = flash_stats.merge(team_flashes, how="outer").fillna(0)
+    # flash assists merged after enemy flashes to keep players order
+    flash_stats = flashes.loc[flashes["EF"] > 0, [stats[3], "EF"]]
+    flash_stats = flash_stats.merge(flash_assists, how="outer").fillna(0)
+    flash_stats = flash_stats.merge(flashes[[stats[3], "EBT", "TF"]], how="outer").fillna(0)
     flash_stats = flash_stats.merge(flashes_thrown, how="outer").fillna(0)
     flash_stats["EF Per Throw"] = flash_stats["EF"] / flash_stats["Flashes Thrown"]
     flash_stats["EBT Per Enemy"] = flash_stats["EBT"] / flash_stats["EF"]
@@ -637,86 +622,85 @@ def calc_bomb_stats(
     return bomb_stats
 
 
+# prefixes of round columns of each side
+_ECON_SIDES = {"CT": "ct", "T": "t"}
+
+_ECON_VALUES = {"EQ Value": "StartEqVal", "Cash": "RoundStartMoney", "Spend": "Spend"}
+
+
+def melt_econ_rounds(
+        round_data: pd.DataFrame,
+        round_filters: Dict[str, Union[List[bool], List[str]]] = None,
+) -> pd.DataFrame:
+    """
+    Side-agnostic economy of filtered rounds: row of each side of each round with
+    Team, Side, Buy Type, EQ Value, Cash and Spend columns, all CT rows go before T rows
+    """
+    rounds = filter_df(round_data, round_filters or dict())
+    return pd.concat([
+        pd.DataFrame({
+            "Team": rounds[f"{prefix}Team"].values,
+            "Side": side,
+            "Buy Type": rounds[f"{prefix}BuyType"].values,
+            **{name: rounds[f"{prefix}{column}"].values for name, column in _ECON_VALUES.items()},
+        })
+        for side, prefix in _ECON_SIDES.items()
+    ], ignore_index=True)
+
+
+def _aggregate_econ(econ: pd.DataFrame, groupby: List[str], values: str) -> pd.DataFrame:
+    """
+    Number of rounds of each buy type and aggregated economy values of melted rounds in one groupby.
+    Buy types of CT side go first then buy types met only on T side, each part sorted by name.
+    """
+    buy_types = econ \
+        .dropna(subset=["Buy Type"]) \
+        .drop_duplicates(subset=["Buy Type"]) \
+        .sort_values(by=["Side", "Buy Type"])["Buy Type"] \
+        .tolist()
+    buys = pd.get_dummies(econ["Buy Type"])[buy_types]
+    stats = pd.concat([econ[groupby], buys, econ[list(_ECON_VALUES)]], axis=1) \
+        .groupby(groupby) \
+        .agg({**dict.fromkeys(buy_types, "sum"), **dict.fromkeys(_ECON_VALUES, values)})
+    return stats.rename(columns={name: f"Avg {name}" for name in _ECON_VALUES})
+
+
 def calc_econ_stats(
         round_data: pd.DataFrame,
         round_filters: Dict[str, Union[List[bool], List[str]]] = None,
 ) -> pd.DataFrame:
-    round_filters = round_filters or dict()
-    ct_stats = filter_group_aggregate(
-        round_data,
-        filters=round_filters,
-        groupby=["ctTeam"],
-        aggregate={"ctStartEqVal": ["mean"], "ctRoundStartMoney": ["mean"], "ctSpend": ["mean"]},
-        rename=["Side", "Avg EQ Value", "Avg Cash", "Avg Spend"],
-    )
-    ct_stats["Side"] = ct_stats["Side"] + " CT"
-    ct_buys = filter_group_aggregate(
-        round_data,
-        filters=round_filters,
-        groupby=["ctTeam", "ctBuyType"],
-        aggregate={"ctBuyType": ["size"]},
-        rename=["Side", "Buy Type", "Counts"],
-    )
-    ct_buys = ct_buys.pivot(index="Side", columns="Buy Type", values="Counts")
-    ct_buys.reset_index(inplace=True)
-    ct_buys.rename_axis(None, axis=1, inplace=True)
-    ct_buys["Side"] = ct_buys["Side"] + " CT"
-    t_stats = filter_group_aggregate(
-        round_data,
-        filters=round_filters,
-        groupby=["tTeam"],
-        aggregate={"tStartEqVal": ["mean"], "tRoundStartMoney": ["mean"], "tSpend": ["mean"]},
-        rename=["Side", "Avg EQ Value", "Avg Cash", "Avg Spend"],
-    )
-    t_stats["Side"] = t_stats["Side"] + " T"
-    t_buys = filter_group_aggregate(
-        round_data,
-        filters=round_filters,
-        groupby=["tTeam", "tBuyType"],
-        aggregate={"tBuyType": ["size"]},
-        rename=["Side", "Buy Type", "Counts"],
-    )
-    t_buys = t_buys.pivot(index="Side", columns="Buy Type", values="Counts")
-    t_buys.reset_index(inplace=True)
-    t_buys.rename_axis(None, axis=1, inplace=True)
-    t_buys["Side"] = t_buys["Side"] + " T"
-    econ_buys = ct_buys.append(t_buys)
-    econ_stats = ct_stats.append(t_stats)
-    econ_stats = econ_buys.merge(econ_stats, how="outer")
-    econ_stats.fillna(0, inplace=True)
-    econ_stats.iloc[:, 1:] = econ_stats.iloc[:, 1:].astype(int)
+    econ = melt_econ_rounds(round_data, round_filters)
+    econ_stats = _aggregate_econ(econ, ["Side", "Team"], "mean").fillna(0).astype(int).reset_index()
+    econ_stats.insert(0, "Side", econ_stats.pop("Team") + " " + econ_stats.pop("Side"))
     return econ_stats
 
 
+def calc_team_econ_stats(
+        round_data: pd.DataFrame,
+        round_filters: Dict[str, Union[List[bool], List[str]]] = None,
+) -> pd.DataFrame:
+    """Number of rounds of each buy type and economy values per round of each team on both sides"""
+    econ = melt_econ_rounds(round_data, round_filters)
+    e_stats = _aggregate_econ(econ, ["Team"], "sum").reset_index()
+    # both sides of each round are melted, so total number of rounds is half of rows
+    e_stats.iloc[:, -3:] = (e_stats.iloc[:, -3:] / (len(econ) // 2)).astype(int)
+    return e_stats
+
+
 # Helper function for kill_breakdown()
 def calc_weapon_type(weapon: str) -> str:
-    if weapon in ["Knife"]:
-        return "Melee Kills"
-    elif weapon in [
-        "CZ-75 Auto",
-        "Desert Eagle",
-        "Dual Berettas",
-        "Five-SeveN",
-        "Glock-18",
-        "P2000",
-        "P250",
-        "R8 Revolver",
-        "Tec-9",
-        "USP-S",
-    ]:
-        return "Pistol Kills"
-    elif weapon in ["MAG-7", "Nova", "Sawed-Off", "XM1014"]:
-        return "Shotgun Kills"
-    elif weapon in ["MAC-10", "MP5-SD", "MP7", "MP9", "P90", "PP-Bizon", "UMP-45"]:
-        return "SMG Kills"
-    elif weapon in ["AK-47", "AUG", "FAMAS", "Galil AR", "M4A1-S", "M4A4", "SG 553"]:
-        return "Assault Rifle Kills"
-    elif weapon in ["M249", "Negev"]:
-        return "Machine Gun Kills"
-    elif weapon in ["AWP", "G3SG1", "SCAR-20", "SSG 08"]:
-        return "Sniper Rifle Kills"
-    else:
-        return "Utility Kills"
+    return WEAPON_KILL_TYPES.get(weapon, UNKNOWN_KILL_TYPE)
+
+
+def calc_weapon_types(weapons: pd.Series) -> pd.Series:
+    """Kill type of each weapon as categorical, each distinct weapon is looked up only once"""
+    codes, uniques = pd.factorize(weapons)
+    type_codes = np.array([KILL_TYPES.index(calc_weapon_type(it)) for it in uniques] + [
+        # code -1 of factorize is missed weapon
+        KILL_TYPES.index(UNKNOWN_KILL_TYPE)
+    ], dtype=np.int8)
+    kill_types = pd.Categorical.from_codes(type_codes[codes], dtype=KILL_TYPE_DTYPE)
+    return pd.Series(kill_types, index=weapons.index, name=weapons.name)
 
 
 def calc_kill_breakdown(
@@ -731,9 +715,7 @@ def calc_kill_breakdown(
     kill_breakdown = kill_data.loc[
         kill_data["attackerTeam"] != kill_data["victimTeam"]
         ].copy()
-    kill_breakdown["Kills Type"] = kill_breakdown.apply(
-        lambda row: calc_weapon_type(row["weapon"]), axis=1
-    )
+    kill_breakdown["Kills Type"] = calc_weapon_types(kill_breakdown["weapon"])
     kill_breakdown = filter_group_aggregate(
         kill_breakdown,
         filters=kill_filters,
@@ -744,16 +726,8 @@ def calc_kill_breakdown(
     kill_breakdown = kill_breakdown.pivot(
         index=stats[1], columns="Kills Type", values="Kills"
     )
-    for col in [
-        "Melee Kills",
-        "Pistol Kills",
-        "Shotgun Kills",
-        "SMG Kills",
-        "Assault Rifle Kills",
-        "Machine Gun Kills",
-        "Sniper Rifle Kills",
-        "Utility Kills",
-    ]:
+    kill_breakdown.columns = kill_breakdown.columns.astype(str)
+    for col in KILL_TYPES:
         if not col in kill_breakdown.columns:
             kill_breakdown.insert(0, col, 0)
         kill_breakdown[col].fillna(0, inplace=True)
@@ -762,18 +736,7 @@ def calc_kill_breakdown(
     kill_breakdown.reset_index(inplace=True)
     kill_breakdown.rename_axis(None, axis=1, inplace=True)
     kill_breakdown = kill_breakdown[
-        [
-            stats[1],
-            "Melee Kills",
-            "Pistol Kills",
-            "Shotgun Kills",
-            "SMG Kills",
-            "Assault Rifle Kills",
-            "Machine Gun Kills",
-            "Sniper Rifle Kills",
-            "Utility Kills",
-            "Total Kills",
-        ]
+        [stats[1]] + KILL_TYPES + ["Total Kills"]
     ]
     kill_breakdown.sort_values(by="Total Kills", ascending=False, inplace=True)
     kill_breakdown.reset_index(drop=True, inplace=True)
@@ -794,7 +757,7 @@ def calc_util_dmg_breakdown(
 
     utils_dms_filter = \
         (damage_data["attackerTeam"] != damage_data["victimTeam"]) & \
-        (damage_data["weapon"].isin(["HE Grenade", "Incendiary Grenade", "Molotov"]))
+        (damage_data["weapon"].isin(UTILITY_DAMAGE_WEAPONS))
     util_dmg = filter_group_aggregate(
         damage_data.loc[utils_dms_filter],
         filters=damage_filters,
@@ -803,7 +766,7 @@ def calc_util_dmg_breakdown(
         rename=[stats[2], "Nade Type", "Given UD", "UD"],
     )
 
-    nades_thrown_filter = grenade_data["grenadeType"].isin(["HE Grenade", "Incendiary Grenade", "Molotov"])
+    nades_thrown_filter = grenade_data["grenadeType"].isin(UTILITY_DAMAGE_WEAPONS)
     nades_thrown = filter_group_aggregate(
         grenade_data.loc[nades_thrown_filter],
         filters=grenade_filters,
@@ -903,8 +866,6 @@ def calc_player_box_score(
         team=False,
         damage_filters=damage_filters,
         round_filters=round_filters)
-    adr_stats = adr_stats[["Player", "Norm ADR"]]
-    adr_stats.columns = ["Player", "ADR"]
 
     ud_stats = calc_util_dmg(
         damage_data,
@@ -934,7 +895,13 @@ def calc_player_box_score(
         damage_filters=damage_filters,
         death_filters=death_filters,
         kill_filters=kill_filters,
-        round_filters=round_filters)
+        round_filters=round_filters,
+        # KAST and ADR are already calculated for the box score
+        kast_stats=k_stats,
+        adr_stats=adr_stats)
+
+    adr_stats = adr_stats[["Player", "Norm ADR"]]
+    adr_stats.columns = ["Player", "ADR"]
 
     box_score = k_stats.merge(adr_stats, how="outer").fillna(0)
     box_score = box_score.merge(ud_stats, how="outer").fillna(0)
@@ -943,6 +910,151 @@ def calc_player_box_score(
     return box_score
 
 
+# sufficient statistics of player box score, they are summed when matches are merged
+SUMMARY_COLUMNS = [
+    "K",
+    "D",
+    "A",
+    "FA",
+    "HS",
+    "Weapon Fires",
+    "Hits",
+    "Headshots",
+    "KAST Rounds",
+    "KAST Total",
+    "Damage",
+    "rounds",
+    "UD",
+    "Nades Thrown",
+    "EF",
+    "Flashes Thrown",
+]
+
+
+def calc_player_summary(
+        damage_data: pd.DataFrame,
+        flash_data: pd.DataFrame,
+        grenade_data: pd.DataFrame,
+        kill_data: pd.DataFrame,
+        round_data: pd.DataFrame,
+        weapon_fire_data: pd.DataFrame,
+        damage_filters: Dict[str, Union[List[bool], List[str]]] = None,
+        flash_filters: Dict[str, Union[List[bool], List[str]]] = None,
+        grenade_filters: Dict[str, Union[List[bool], List[str]]] = None,
+        kill_filters: Dict[str, Union[List[bool], List[str]]] = None,
+        death_filters: Dict[str, Union[List[bool], List[str]]] = None,
+        round_filters: Dict[str, Union[List[bool], List[str]]] = None,
+        weapon_fire_filters: Dict[str, Union[List[bool], List[str]]] = None,
+) -> pd.DataFrame:
+    """
+    Returns per player sums and counts (SUMMARY_COLUMNS) indexed by player, every column of player box score
+    is derived from them by calc_summary_box_score(). Summaries of matches are merged by adding them up,
+    so statistics of many matches are aggregated without keeping their events.
+    Filters have the same meaning as for calc_player_box_score().
+    """
+    enemy_kills = kill_data["attackerTeam"] != kill_data["victimTeam"]
+    kills = aggregate_many(
+        kill_data,
+        [
+            Aggregation("K", "attackerName", mask=enemy_kills, filters=kill_filters),
+            Aggregation("D", "victimName", filters=death_filters),
+            Aggregation("A", "assisterName", mask=kill_data["assisterTeam"] != kill_data["victimTeam"],
+                        filters=kill_filters),
+            Aggregation("FA", "flashThrowerName", mask=kill_data["flashThrowerTeam"] != kill_data["victimTeam"],
+                        filters=kill_filters),
+            Aggregation("HS", "attackerName", mask=enemy_kills & (kill_data["isHeadshot"] == True),
+                        filters=kill_filters),
+        ]
+    )
+
+    enemy_damages = damage_data["attackerTeam"] != damage_data["victimTeam"]
+    damages = aggregate_many(
+        damage_data,
+        [
+            Aggregation("Hits", "attackerName", mask=enemy_damages, filters=damage_filters),
+            Aggregation("Headshots", "attackerName", mask=enemy_damages & (damage_data["hitGroup"] == "Head"),
+                        filters=damage_filters),
+            Aggregation("Damage", "attackerName", "sum", "hpDamageTaken", mask=enemy_damages,
+                        filters=damage_filters),
+            Aggregation("UD", "attackerName", "sum", "hpDamage",
+                        mask=enemy_damages & damage_data["weapon"].isin(UTILITY_DAMAGE_WEAPONS),
+                        filters=damage_filters),
+        ]
+    )
+
+    fires = aggregate_many(
+        weapon_fire_data, [Aggregation("Weapon Fires", "playerName", filters=weapon_fire_filters)])
+
+    grenades = aggregate_many(
+        grenade_data,
+        [
+            Aggregation("Nades Thrown", "throwerName", mask=grenade_data["grenadeType"].isin(UTILITY_DAMAGE_WEAPONS),
+                        filters=grenade_filters),
+            Aggregation("Flashes Thrown", "throwerName", mask=grenade_data["grenadeType"] == "Flashbang",
+                        filters=flash_filters),
+        ]
+    )
+
+    flashes = aggregate_many(
+        flash_data,
+        [Aggregation("EF", "attackerName", mask=flash_data["attackerTeam"] != flash_data["playerTeam"],
+                     filters=flash_filters)]
+    )
+
+    kast_rounds, _ = _calc_kast_rounds(kill_data, "KAST", True, kill_filters, death_filters)
+    kast = pd.DataFrame({
+        "Player": kast_rounds.columns,
+        "KAST Rounds": kast_rounds.sum().values,
+        "KAST Total": len(kast_rounds.index),
+    })
+
+    rounds = rounds_by_player(round_data, players_teams(damage_data), round_filters)
+
+    tables = [kills, damages, fires, grenades, flashes, kast, rounds]
+    summary = pd.concat([it.dropna(subset=["Player"]).groupby("Player").sum() for it in tables], axis=1)
+    return summary.reindex(columns=SUMMARY_COLUMNS).fillna(0)
+
+
+def calc_summary_box_score(summary: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns player box score of summary returned by calc_player_summary() or sum of such summaries.
+    For one match it equals calc_player_box_score() up to order of players with the same number of kills.
+
+    Rates are calculated from totals, so e.g. ADR of many matches is total damage by total rounds.
+    It differs from box score of concatenated events of the matches: rounds of different matches with
+    the same number are not mixed in KAST% and rounds of a player are counted only in matches the player played.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        box_score = pd.DataFrame({
+            "Player": summary.index,
+            "K": summary["K"].values,
+            "D": summary["D"].values,
+            "A": summary["A"].values,
+            "FA": summary["FA"].values,
+            "HS%": summary["HS"].values / summary["K"].values * 100.0,
+            "ACC%": summary["Hits"].values / summary["Weapon Fires"].values * 100.0,
+            "HS ACC%": summary["Headshots"].values / summary["Weapon Fires"].values * 100.0,
+            "KDR": summary["K"].values / summary["D"].values,
+            "KAST%": summary["KAST Rounds"].values / summary["KAST Total"].values * 100.0,
+            "ADR": summary["Damage"].values / summary["rounds"].values,
+            "UD": summary["UD"].values,
+            "UD Per Nade": summary["UD"].values / summary["Nades Thrown"].values,
+            "EF": summary["EF"].values,
+            "EF Per Throw": summary["EF"].values / summary["Flashes Thrown"].values,
+            "KPR": summary["K"].values / summary["rounds"].values,
+            "DPR": summary["D"].values / summary["rounds"].values,
+            "APR": summary["A"].values / summary["rounds"].values,
+        }).fillna(0)
+
+    box_score[["K", "D", "A", "FA"]] = box_score[["K", "D", "A", "FA"]].astype(int)
+    box_score["Impact"] = calc_impact_ex(box_score)
+    box_score["Rating"] = calc_rating_ex(box_score.rename(columns={"KAST%": "KAST"}))
+    box_score = box_score.drop(columns=["KPR", "DPR", "APR"])
+    box_score.sort_values(by="K", ascending=False, kind="stable", inplace=True)
+    box_score.reset_index(drop=True, inplace=True)
+    return box_score
+
+
 def calc_win_breakdown(
         round_data: pd.DataFrame,
         round_filters: Dict[str, Union[List[bool], List[str]]] = None,
@@ -988,7 +1100,7 @@ def calc_win_breakdown(
         )
     ].sum(axis=1)
 
-    win_breakdown_stats["Total Wins"] = win_breakdown_stats.iloc[0:, 0:-2].sum(axis=1)
+    win_breakdown_stats["Total Wins"] = win_breakdown_stats.iloc[0:, 0:-2].sum(axis=1, numeric_only=True)
     win_breakdown_stats.iloc[:, 1:] = win_breakdown_stats.iloc[:, 1:].astype(int)
     return win_breakdown_stats
 
@@ -1044,17 +1156,7 @@ def calc_team_box_score(
         grenade_filters,
         kill_filters,
     )
-    e_stats = calc_econ_stats(round_data, round_filters)
-    for index in e_stats.index:
-        e_stats.iloc[index, 0] = e_stats["Side"].str.rsplit(n=1)[index][0]
-        rounds = e_stats.iloc[index, 1:-4].sum()
-        e_stats.iloc[index, -3:] = e_stats.iloc[index, -3:] * rounds
-    e_stats = e_stats.groupby(["Side"]).sum()
-    e_stats.reset_index(inplace=True)
-    e_stats.iloc[:, -3:] = (
-            e_stats.iloc[:, -3:] / len(filter_df(round_data, round_filters))
-    ).astype(int)
-    e_stats.rename(columns={"Side": "Team"}, inplace=True)
+    e_stats = calc_team_econ_stats(round_data, round_filters)
     box_score = k_stats.merge(acc_stats, how="outer")
     box_score = box_score.merge(adr_stats, how="outer")
     box_score = box_score.merge(ud_stats, how="outer")
@@ -1083,31 +1185,31 @@ def calc_team_box_score(
     box_score.columns = box_score.iloc[0]
     box_score.drop("Team", inplace=True)
     box_score.rename_axis(None, axis=1, inplace=True)
-    box_score = box_score.loc[
-                [
-                    "Score",
-                    "CT Wins",
-                    "T Wins",
-                    "K",
-                    "D",
-                    "A",
-                    "FA",
-                    "+/-",
-                    "FK",
-                    "HS",
-                    "HS%",
-                    "Strafe%",
-                    "ACC%",
-                    "HS ACC%",
-                    "ADR",
-                    "UD",
-                    "Nades Thrown",
-                    "UD Per Nade",
-                    "EF",
-                    "Flashes Thrown",
-                    "EF Per Throw",
-                    "EBT Per Enemy",
-                ],
-                :,
-                ].append(box_score.iloc[31:, :])
+    rows = [
+        "Score",
+        "CT Wins",
+        "T Wins",
+        "K",
+        "D",
+        "A",
+        "FA",
+        "+/-",
+        "FK",
+        "HS",
+        "HS%",
+        "Strafe%",
+        "ACC%",
+        "HS ACC%",
+        "ADR",
+        "UD",
+        "Nades Thrown",
+        "UD Per Nade",
+        "EF",
+        "Flashes Thrown",
+        "EF Per Throw",
+        "EBT Per Enemy",
+    ]
+    # economy and win breakdown statistics follow the main ones
+    econ_start = box_score.index.get_loc(e_stats.columns[1])
+    box_score = pd.concat([box_score.loc[rows, :], box_score.iloc[econ_start:, :]])
     return box_score
@@ -1,15 +1,35 @@
+import functools
+import json
 import shutil
+import time
 import zipfile
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, fields
 from pathlib import Path
-from typing import Callable, Union, Dict, List, Optional
+from typing import Callable, Union, Dict, List, Optional, Iterable, Iterator, Tuple, TypeVar, Any
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 from awpy import DemoParser
 
-from demo.analytics import calc_player_box_score
-from demo.utils import clear_data, clear_rounds
-from utils.functions import slice2range
+from demo.analytics import calc_player_box_score, calc_player_summary, calc_summary_box_score, ANALYTICS_VERSION
+from demo.cache import read_tables, write_tables, demo_cache_path, write_frames, open_frames, FRAMES_SUFFIX
+from demo.utils import clear_data, clear_rounds, compact_dtypes
+from utils.functions import slice2range, file_digest, obj_digest
+from utils.logging import logger
+from utils.processes import process_unordered
+
+
+log = logger()
+
+T = TypeVar('T')
+
+# increase to invalidate tables cached by previous versions
+DEMO_CACHE_VERSION = 2
+
+DEMO_TABLES = ["rounds", "damages", "kills", "flashes", "weaponFires", "grenades"]
+FRAMES_TABLE = "playerFrames"
 
 
 @dataclass
@@ -27,32 +47,96 @@ class Demo:
     frames: pd.DataFrame
 
     @classmethod
-    def load(cls, demo_path: Union[Path, str], force: bool = False, parse_rate: Optional[int] = None):
+    def load(
+            cls,
+            demo_path: Union[Path, str],
+            force: bool = False,
+            parse_rate: Optional[int] = None,
+            frames_columns: Optional[List[str]] = None,
+            rounds: Optional[Tuple[int, int]] = None,
+            ticks: Optional[Tuple[int, int]] = None,
+            compact: bool = True
+    ):
+        """
+        Parse demo or load it from cache.
+
+        :param demo_path: path to .dem file
+        :param force: force to re-parse demo even if it cached
+        :param parse_rate: frames parse rate, frames not parsed if None
+        :param frames_columns: columns of frames to load, all if None
+        :param rounds: first and last (inclusive) round of frames to load, all if None
+        :param ticks: first and last (inclusive) tick of frames to load, all if None
+        :param compact: reduce memory of tables: int32 numbers, float32 and categorical strings in frames
+        """
+        start = time.perf_counter()
+
         demo_path = Path(demo_path)
 
         out_path = demo_path.parent
 
         json_path = Path(out_path, demo_path.stem).with_suffix(".json")
+        # parser options json was produced with, json of other options (e.g. without frames) is not reused
+        json_options_path = Path(out_path, f"{demo_path.stem}{_JSON_OPTIONS_SUFFIX}")
 
-        demo_parser = DemoParser(
-            demofile=str(demo_path.absolute()).replace("\\", "/"),
-            log=True,
-            # TODO: there is bug in DemoParser.parse_demo() in self.output_file ... lead to ERROR logging
-            outpath=str(out_path.absolute()).replace("\\", "/"),
+        options = dict(
             trade_time=5,
             buy_style="hltv",
-            json_indentation=False,
             parse_frames=parse_rate is not None,
             parse_rate=parse_rate or 128
         )
 
-        if force or not json_path.is_file():
-            # output results to a dictionary of dataframes.
-            demo: Dict[str, pd.DataFrame] = demo_parser.parse(return_type="df")
+        tables = DEMO_TABLES + [FRAMES_TABLE] if options["parse_frames"] else DEMO_TABLES
+
+        cache_key = obj_digest([DEMO_CACHE_VERSION, file_digest(demo_path), options])
+        cache_path = demo_cache_path(demo_path, cache_key[:16])
+
+        frames_filters = _range_filters("roundNum", rounds) + _range_filters("tick", ticks)
+
+        demo: Optional[Dict[str, pd.DataFrame]] = None if force else read_tables(
+            cache_path,
+            tables,
+            columns={FRAMES_TABLE: frames_columns} if frames_columns is not None else None,
+            filters={FRAMES_TABLE: frames_filters})
+
+        if demo is not None:
+            source = "cache"
         else:
-            # read to also internal state... why
-            demo_parser.read_json(str(json_path))
-            demo: Dict[str, pd.DataFrame] = demo_parser.parse_json_to_df()
+            demo_parser = DemoParser(
+                demofile=str(demo_path.absolute()).replace("\\", "/"),
+                log=True,
+                # TODO: there is bug in DemoParser.parse_demo() in self.output_file ... lead to ERROR logging
+                outpath=str(out_path.absolute()).replace("\\", "/"),
+                json_indentation=False,
+                **options
+            )
+
+            if force or not json_path.is_file() or _read_json_options(json_options_path) != options:
+                source = "demo"
+                json_options_path.unlink(missing_ok=True)
+                # output results to a dictionary of dataframes.
+                demo = demo_parser.parse(return_type="df")
+                if json_path.is_file():
+                    json_options_path.write_text(json.dumps(options))
+            else:
+                source = "json"
+                # read to also internal state... why
+                demo_parser.read_json(str(json_path))
+                demo = demo_parser.parse_json_to_df()
+
+            write_tables(cache_path, {name: demo[name] for name in tables})
+
+            if FRAMES_TABLE in tables:
+                demo[FRAMES_TABLE] = _select(demo[FRAMES_TABLE], frames_columns, frames_filters)
+
+        if compact:
+            # floats of frames are positions and angles, float32 is enough for them unlike e.g. damages and
+            # economy values summed up by analytics
+            demo = {
+                name: compact_dtypes(demo[name], floats=name == FRAMES_TABLE, categories=name == FRAMES_TABLE)
+                for name in tables
+            }
+
+        log.info(f"Demo {demo_path.name} loaded from {source} in {time.perf_counter() - start:.2f}s")
 
         return Demo(
             demo_path,
@@ -63,9 +147,85 @@ class Demo:
             flashes=demo["flashes"],
             weapons_fires=demo["weaponFires"],
             grenades=demo["grenades"],
-            frames=demo.get("playerFrames", None)
+            frames=demo.get(FRAMES_TABLE, None)
         )
 
+    @classmethod
+    def load_many(
+            cls,
+            demo_paths: Iterable[Union[Path, str]],
+            workers: int = 1,
+            force: bool = False,
+            parse_rate: Optional[int] = None,
+            reduce: Optional[Callable[["Demo"], T]] = None
+    ) -> Iterator[Tuple[Path, Optional[Union["Demo", T]]]]:
+        """
+        Parse demos in a pool of processes and yield (path, demo) in order of parsing completion.
+        Demo paths are consumed lazily and at most `workers` demos are parsed at a time, so they can be
+        produced while previous demos are parsing. If demo failed to parse or its process crashed then
+        error is logged and None yielded instead of the demo, the remaining demos are not affected.
+
+        :param demo_paths: paths to .dem files
+        :param workers: number of processes to parse demos, if 1 then demos parsed in current process
+        :param force: force to re-parse demos even if they cached
+        :param parse_rate: frames parse rate, frames not parsed if None
+        :param reduce: picklable function called with demo in the parsing process, its result yielded
+                       instead of the demo, so heavy tables are not sent between processes
+        """
+        load = functools.partial(_load_reduced, force=force, parse_rate=parse_rate, reduce=reduce)
+
+        if workers <= 1:
+            for demo_path in map(Path, demo_paths):
+                try:
+                    result = load(demo_path)
+                except Exception as error:
+                    log.error(f"Can't parse demo {demo_path} due to {error!r}")
+                    result = None
+                yield demo_path, result
+            return
+
+        for demo_path, result, error in process_unordered(load, map(Path, demo_paths), workers):
+            if error is not None:
+                log.error(f"Can't parse demo {demo_path} due to {error!r}")
+            yield demo_path, result
+
+
+def _load_reduced(
+        demo_path: Path,
+        force: bool,
+        parse_rate: Optional[int],
+        reduce: Optional[Callable[[Demo], Any]]
+) -> Any:
+    demo = Demo.load(demo_path, force, parse_rate)
+    return reduce(demo) if reduce is not None else demo
+
+
+_JSON_OPTIONS_SUFFIX = ".options.json"
+
+
+def _read_json_options(path: Path) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _range_filters(column: str, bounds: Optional[Tuple[int, int]]) -> List[tuple]:
+    if bounds is None:
+        return []
+    first, last = bounds
+    return [(column, ">=", first), (column, "<=", last)]
+
+
+def _select(df: pd.DataFrame, columns: Optional[List[str]], filters: List[tuple]) -> pd.DataFrame:
+    """The same selection of rows and columns as done by read_tables() for table already in memory"""
+    if filters:
+        mask = np.ones(len(df), dtype=bool)
+        for column, op, value in filters:
+            mask &= (df[column] >= value).values if op == ">=" else (df[column] <= value).values
+        df = df.loc[mask].reset_index(drop=True)
+    return df[columns] if columns is not None else df
+
 
 @dataclass
 class Statistics:
@@ -78,7 +238,7 @@ class Statistics:
 
     @classmethod
     def from_demo(cls, demo: Demo, clear: bool = True):
-        offset, rounds = clear_rounds(demo.rounds) if clear else -1, demo.rounds
+        offset, rounds = clear_rounds(demo.rounds) if clear else (-1, demo.rounds)
 
         def do_clear(df: pd.DataFrame) -> pd.DataFrame:
             return clear_data(df, offset, rounds) if clear else df
@@ -92,64 +252,270 @@ class Statistics:
             grenades=do_clear(demo.grenades)
         )
 
-    def player_box_score(self):
+    def player_box_score(self, **filters):
         return calc_player_box_score(
-            self.damages, self.flashes, self.grenades, self.kills, self.rounds, self.weapons_fires)
+            self.damages, self.flashes, self.grenades, self.kills, self.rounds, self.weapons_fires, **filters)
 
     def concat(self, other: "Statistics") -> "Statistics":
-        return Statistics(
-            rounds=pd.concat([self.rounds, other.rounds], ignore_index=True),
-            damages=pd.concat([self.damages, other.damages], ignore_index=True),
-            kills=pd.concat([self.kills, other.kills], ignore_index=True),
-            flashes=pd.concat([self.flashes, other.flashes], ignore_index=True),
-            weapons_fires=pd.concat([self.weapons_fires, other.weapons_fires], ignore_index=True),
-            grenades=pd.concat([self.grenades, other.grenades], ignore_index=True),
-        )
+        return Statistics.concat_all([self, other])
+
+    @classmethod
+    def concat_all(cls, statistics: Iterable["Statistics"]) -> "Statistics":
+        """Concatenate statistics of many matches at once, each table is copied only one time"""
+        statistics = list(statistics)
+        tables = {
+            field.name: pd.concat([getattr(it, field.name) for it in statistics], ignore_index=True)
+            for field in fields(cls)
+        }
+        return Statistics(**tables)
 
 
 @dataclass
-class Frames:
-    __rounds: Dict[int, pd.DataFrame]
+class Summary:
+    """
+    Per player sums and counts of one or many matches, enough to calculate player box score.
+    Summary takes a few rows per player, so summaries of many matches are merged in constant memory
+    per match while events of each match are released as soon as the match is reduced.
+
+    :param players: table returned by calc_player_summary() indexed by player
+    :param matches: number of merged matches
+    """
+    players: pd.DataFrame
+    matches: int = 1
 
     @classmethod
-    def from_demo(cls, demo: Demo):
-        rounds = {num: group.reset_index(drop=True) for num, group in demo.frames.groupby(by="roundNum")}
-        return Frames(rounds)
+    def from_statistics(cls, stats: Statistics, filters: Optional[Dict[str, dict]] = None) -> "Summary":
+        """
+        :param stats: statistics of the match
+        :param filters: filters of events as keyword arguments of calc_player_box_score()
+        """
+        players = calc_player_summary(
+            stats.damages, stats.flashes, stats.grenades, stats.kills, stats.rounds, stats.weapons_fires,
+            **(filters or dict()))
+        return Summary(players)
 
     @classmethod
-    def from_zip(cls, path: Union[Path, str], to_load: Optional[List[int]] = None):
-        rounds = dict()
-        path = Path(path)
+    def from_cache(cls, demo_path: Union[Path, str], filters: Optional[Dict[str, dict]] = None) -> Optional["Summary"]:
+        """
+        Returns summary of the demo stored by to_cache() or None if not cached yet.
+        Cached summary is invalidated if demo or analytics version changed.
+
+        :param demo_path: path to .dem file summary calculated from
+        :param filters: filters summary was calculated with
+        """
+        tables = read_tables(_summary_cache_path(Path(demo_path), filters), [_SUMMARY_TABLE])
+        return Summary(tables[_SUMMARY_TABLE]) if tables is not None else None
+
+    def to_cache(self, demo_path: Union[Path, str], filters: Optional[Dict[str, dict]] = None):
+        write_tables(_summary_cache_path(Path(demo_path), filters), {_SUMMARY_TABLE: self.players})
+
+    @classmethod
+    def analyze(
+            cls,
+            demo_path: Union[Path, str],
+            force: bool = False,
+            filters: Optional[Dict[str, dict]] = None
+    ) -> "Summary":
+        """
+        Returns summary of the demo from cache or parse the demo, reduce it to summary and cache it.
+        Only summary is returned, so it is cheap to run in another process.
+
+        :param demo_path: path to .dem file
+        :param force: force to re-parse demo and re-calculate summary even if it cached
+        :param filters: filters of events as keyword arguments of calc_player_box_score()
+        """
+        cached = cls.from_cache(demo_path, filters) if not force else None
+        if cached is not None:
+            log.info(f"Summary for {demo_path} loaded from cache")
+            return cached
+        return cls.reduce(Demo.load(Path(demo_path), force), filters)
+
+    @classmethod
+    def reduce(cls, demo: Demo, filters: Optional[Dict[str, dict]] = None) -> "Summary":
+        """
+        Returns summary of the parsed demo and caches it, suitable as reduce function of Demo.load_many().
+
+        :param demo: parsed demo
+        :param filters: filters of events as keyword arguments of calc_player_box_score()
+        """
+        summary = cls.from_statistics(Statistics.from_demo(demo), filters)
+        summary.to_cache(demo.dem_path, filters)
+        return summary
+
+    def player_box_score(self) -> pd.DataFrame:
+        return calc_summary_box_score(self.players)
+
+    def merge(self, other: "Summary") -> "Summary":
+        return Summary.merge_all([self, other])
+
+    @classmethod
+    def merge_all(cls, summaries: Iterable["Summary"]) -> "Summary":
+        """
+        Sum summaries of many matches, players are matched by name.
+        Rates of the merged summary are ratios of summed counts, see calc_summary_box_score().
+        """
+        summaries = list(summaries)
+        players = pd.concat([it.players for it in summaries]).groupby(level=0).sum()
+        return Summary(players, sum(it.matches for it in summaries))
+
+
+_SUMMARY_TABLE = "summary"
+
+
+def _summary_cache_path(demo_path: Path, filters: Optional[Dict[str, dict]]) -> Path:
+    key = obj_digest([ANALYTICS_VERSION, file_digest(demo_path), filters or dict()])
+    return demo_cache_path(demo_path, "summary", key[:16])
+
+
+class _FramesSource(object):
+    """Storage frames of rounds are loaded from"""
+
+    def rounds(self) -> List[int]:
+        raise NotImplementedError()
+
+    def load(self, num: int) -> pd.DataFrame:
+        raise NotImplementedError()
+
+    def load_range(self, nums: List[int]) -> Optional[pd.DataFrame]:
+        """Returns frames of consecutive rounds at once if storage supports it or None otherwise"""
+        return None
+
+
+class _TableFramesSource(_FramesSource):
+    """Frames of all rounds in one table (pandas or arrow) ordered by round, rounds are slices of it"""
+
+    def __init__(self, table: Union[pd.DataFrame, pa.Table], offsets: Dict[int, Tuple[int, int]]):
+        self._table = table
+        self._offsets = offsets
+
+    def _slice(self, start: int, stop: int) -> pd.DataFrame:
+        if isinstance(self._table, pa.Table):
+            # arrow slice is zero-copy, only rows of slice converted
+            return self._table.slice(start, stop - start).to_pandas()
+        # row slice of pandas table is a view, so data are not copied
+        df = self._table.iloc[start:stop]
+        df.index = pd.RangeIndex(stop - start)
+        return df
+
+    def rounds(self) -> List[int]:
+        return list(self._offsets)
+
+    def load(self, num: int) -> pd.DataFrame:
+        offset, length = self._offsets[num]
+        return self._slice(offset, offset + length)
+
+    def load_range(self, nums: List[int]) -> Optional[pd.DataFrame]:
+        start, _ = self._offsets[nums[0]]
+        stop = start
+        for num in nums:
+            offset, length = self._offsets[num]
+            if offset != stop:
+                return None
+            stop += length
+        return self._slice(start, stop)
+
+
+class _ZipFramesSource(_FramesSource):
+    """Frames of rounds stored by Frames.dump() as json file per round in zip"""
+
+    def __init__(self, path: Path, to_load: Optional[List[int]] = None):
+        self._path = path
         with zipfile.ZipFile(str(path), "r") as file:
-            for name in file.namelist():
-                stem = Path(name).stem
-                num = int(stem)
-                if to_load is None or num in to_load:
-                    text = file.read(name).decode("utf-8")
-                    rounds[num] = pd.read_json(text).reset_index(drop=True)
-        return Frames(rounds)
+            names = {int(Path(name).stem): name for name in file.namelist()}
+        self._names = {num: name for num, name in sorted(names.items()) if to_load is None or num in to_load}
+
+    def rounds(self) -> List[int]:
+        return list(self._names)
+
+    def load(self, num: int) -> pd.DataFrame:
+        with zipfile.ZipFile(str(self._path), "r") as file:
+            text = file.read(self._names[num]).decode("utf-8")
+        return pd.read_json(text).reset_index(drop=True)
+
+
+class Frames(object):
+    """
+    Players frames of demo rounds. Rounds are loaded on the first access and kept in memory,
+    if max_rounds specified then least recently used rounds are unloaded.
+
+    Frames of rounds (and ranges of consecutive rounds) may be views of one backing table,
+    so copy them before modification in place.
+    """
+
+    def __init__(self, source: _FramesSource, max_rounds: Optional[int] = None):
+        self._source = source
+        self._max_rounds = max_rounds
+        self._loaded: "OrderedDict[int, pd.DataFrame]" = OrderedDict()
+
+    @classmethod
+    def from_demo(cls, demo: Demo, max_rounds: Optional[int] = None):
+        frames = demo.frames.sort_values(by="roundNum", kind="stable", ignore_index=True)
+        sizes = frames.groupby(by="roundNum", sort=True).size()
+        starts = sizes.cumsum() - sizes
+        offsets = {int(num): (int(start), int(size)) for num, start, size in zip(sizes.index, starts, sizes)}
+        return Frames(_TableFramesSource(frames, offsets), max_rounds)
+
+    @classmethod
+    def from_zip(cls, path: Union[Path, str], to_load: Optional[List[int]] = None, max_rounds: Optional[int] = None):
+        return Frames(_ZipFramesSource(Path(path), to_load), max_rounds)
+
+    @classmethod
+    def from_arrow(cls, path: Union[Path, str], to_load: Optional[List[int]] = None, max_rounds: Optional[int] = None):
+        """Open rounds frames stored by dump_arrow(), file is memory-mapped and only rows of used rounds read"""
+        table, offsets = open_frames(Path(path))
+        offsets = {num: it for num, it in offsets.items() if to_load is None or num in to_load}
+        return Frames(_TableFramesSource(table, offsets), max_rounds)
+
+    def dump_arrow(self, path: Union[Path, str], to_save: Optional[List[int]] = None):
+        rounds = {num: df for num, df in self.items() if to_save is None or num in to_save}
+        write_frames(Path(path), rounds)
+        return self
 
     def dump(self, path: Union[Path, str], to_save: Optional[List[int]] = None):
         path = Path(path)
         with zipfile.ZipFile(str(path), "w") as file:
-            for num, df in self.__rounds.items():
+            for num, df in self.items():
                 name = f"{num}.json"
                 if to_save is None or num in to_save:
                     data = df.to_json()
                     file.writestr(name, data, compresslevel=9)
         return self
 
+    def _round(self, num: int) -> pd.DataFrame:
+        if num in self._loaded:
+            self._loaded.move_to_end(num)
+            return self._loaded[num]
+        df = self._source.load(num)
+        self._loaded[num] = df
+        if self._max_rounds is not None and len(self._loaded) > self._max_rounds:
+            self._loaded.popitem(last=False)
+        return df
+
     def __getitem__(self, item: Union[slice, int]):
         if isinstance(item, slice):
-            rounds = (self.__rounds[it] for it in slice2range(item))
-            return pd.concat(rounds, ignore_index=True)
+            nums = list(slice2range(item))
+            if item.step in (None, 1) and nums:
+                df = self._source.load_range(nums)
+                if df is not None:
+                    return df
+            return pd.concat([self._round(it) for it in nums], ignore_index=True)
         elif isinstance(item, int):
-            return self.__rounds[item]
+            return self._round(item)
         else:
             raise TypeError("item must slice or int")
 
     def __iter__(self):
-        return self.__rounds.__iter__()
+        return iter(self._source.rounds())
 
     def items(self):
-        return self.__rounds.items()
+        return ((num, self._round(num)) for num in self)
+
+
+def convert_frames(zip_path: Union[Path, str], arrow_path: Optional[Union[Path, str]] = None) -> Path:
+    """Convert frames stored by Frames.dump() into memory-mappable file, next to zip if path not specified"""
+    zip_path = Path(zip_path)
+    arrow_path = Path(arrow_path) if arrow_path is not None else zip_path.with_suffix(FRAMES_SUFFIX)
+    start = time.perf_counter()
+    Frames.from_zip(zip_path).dump_arrow(arrow_path)
+    log.info(f"Frames {zip_path.name} converted into {arrow_path.name} in {time.perf_counter() - start:.2f}s")
+    return arrow_path
@@ -0,0 +1,108 @@
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, List
+
+import pandas as pd
+import pyarrow as pa
+
+from utils.logging import logger
+
+
+log = logger()
+
+_TABLE_SUFFIX = ".parquet"
+# small enough row groups to skip not requested rounds of frames table
+_ROW_GROUP_SIZE = 64 * 1024
+
+FRAMES_SUFFIX = ".arrow"
+
+_ROUNDS_METADATA_KEY = b"rounds"
+
+
+def demo_cache_path(demo_path: Path, *parts: str) -> Path:
+    """Directory to cache data derived from the demo, placed next to the demo"""
+    return Path(demo_path.parent, f"{demo_path.stem}.cache", *parts)
+
+
+def read_tables(
+        path: Path,
+        names: Iterable[str],
+        columns: Optional[Dict[str, List[str]]] = None,
+        filters: Optional[Dict[str, List[tuple]]] = None
+) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    Read tables stored by write_tables() or return None if any of them is missing or can't be read.
+
+    :param path: directory with tables
+    :param names: names of tables to read
+    :param columns: columns to read for some of tables, all columns read for other tables
+    :param filters: row filters in form [(column, op, value), ...] for some of tables,
+        row groups not matching filters are skipped without reading
+    """
+    columns = columns or dict()
+    filters = filters or dict()
+    paths = {name: path / f"{name}{_TABLE_SUFFIX}" for name in names}
+    if not all(it.is_file() for it in paths.values()):
+        return None
+    try:
+        return {
+            name: pd.read_parquet(table_path, columns=columns.get(name, None), filters=filters.get(name, None) or None)
+            for name, table_path in paths.items()
+        }
+    except Exception as error:
+        log.warning(f"Can't read cached tables from {path} due to {error!r}")
+        return None
+
+
+def write_tables(path: Path, tables: Dict[str, pd.DataFrame]) -> bool:
+    """
+    Store each table into separate parquet file in the directory.
+    Tables written into temporary directory and renamed, so partially written cache never read.
+    """
+    temp_path = path.with_name(f"{path.name}.tmp")
+    shutil.rmtree(temp_path, ignore_errors=True)
+    temp_path.mkdir(parents=True)
+    try:
+        for name, df in tables.items():
+            df.to_parquet(temp_path / f"{name}{_TABLE_SUFFIX}", row_group_size=_ROW_GROUP_SIZE)
+    except Exception as error:
+        log.warning(f"Can't cache tables into {path} due to {error!r}")
+        shutil.rmtree(temp_path, ignore_errors=True)
+        return False
+    shutil.rmtree(path, ignore_errors=True)
+    temp_path.rename(path)
+    return True
+
+
+def write_frames(path: Path, rounds: Dict[int, pd.DataFrame]):
+    """
+    Store frames of all rounds as one uncompressed Arrow IPC file, so it can be memory-mapped.
+    Rounds are placed one after another, offset and length of each round kept in schema metadata.
+    """
+    offsets: Dict[int, Tuple[int, int]] = dict()
+    position = 0
+    for num, df in sorted(rounds.items()):
+        offsets[num] = (position, len(df))
+        position += len(df)
+
+    df = pd.concat([rounds[num] for num in offsets], ignore_index=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = {**table.schema.metadata, _ROUNDS_METADATA_KEY: json.dumps(offsets).encode("utf-8")}
+    table = table.replace_schema_metadata(metadata)
+
+    temp_path = path.with_name(f"{path.name}.tmp")
+    with pa.OSFile(str(temp_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(temp_path, path)
+
+
+def open_frames(path: Path) -> Tuple[pa.Table, Dict[int, Tuple[int, int]]]:
+    """
+    Memory-map frames file stored by write_frames() and returns table with (offset, length) of each round.
+    Data are not read until table (or its slice) converted, only pages of used rows are loaded.
+    """
+    table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+    offsets = json.loads(table.schema.metadata[_ROUNDS_METADATA_KEY])
+    return table, {int(num): (offset, length) for num, (offset, length) in offsets.items()}
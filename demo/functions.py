@@ -1,6 +1,10 @@
+import functools
 import operator
-from typing import Dict, Union, List, Tuple
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Union, List, Tuple, Optional, Callable, Any, Mapping
 
+import numpy as np
 import pandas as pd
 
 
@@ -19,11 +23,7 @@ def players_teams(
     return teams
 
 
-def rounds_by_player(
-        round_data: pd.DataFrame,
-        teams: pd.DataFrame,
-        round_filters: dict = None
-) -> pd.DataFrame:
+def rounds_by_team(round_data: pd.DataFrame, round_filters: dict = None) -> pd.DataFrame:
     ct_win_rounds = filter_group_aggregate(
         round_data,
         filters=round_filters,
@@ -43,8 +43,15 @@ def rounds_by_player(
     win_rounds = ct_win_rounds.merge(t_win_rounds, how="outer").fillna(0)
 
     win_rounds["rounds"] = win_rounds.t_wins + win_rounds.ct_wins
+    return win_rounds[["team", "rounds"]]
 
-    rounds_stats = teams.merge(win_rounds, on="team", how="outer")
+
+def rounds_by_player(
+        round_data: pd.DataFrame,
+        teams: pd.DataFrame,
+        round_filters: dict = None
+) -> pd.DataFrame:
+    rounds_stats = teams.merge(rounds_by_team(round_data, round_filters), on="team", how="outer")
     return rounds_stats[["Player", "rounds"]]
 
 
@@ -83,12 +90,21 @@ def extract_num_filters(
 
 
 def check_filters(df: pd.DataFrame, filters: Dict[str, Union[List[bool], List[str]]]):
+    _check_filters(df.dtypes, filters)
+
+
+def _is_string_dtype(dtype) -> bool:
+    """Strings columns as object, categorical (e.g. compacted frames) or pandas string dtype"""
+    return dtype == "O" or isinstance(dtype, pd.CategoricalDtype) or isinstance(dtype, pd.StringDtype)
+
+
+def _check_filters(dtypes: Mapping[str, np.dtype], filters: Dict[str, Union[List[bool], List[str]]]):
     for key in filters:
-        if df.dtypes[key] == "bool":
+        if dtypes[key] == "bool":
             for index in filters[key]:
                 if not isinstance(index, bool):
                     raise ValueError(f'Filter(s) for column "{key}" must be ' f"of type boolean")
-        elif df.dtypes[key] == "O":
+        elif _is_string_dtype(dtypes[key]):
             for index in filters[key]:
                 if not isinstance(index, str):
                     raise ValueError(f'Filter(s) for column "{key}" must be ' f"of type string")
@@ -96,30 +112,71 @@ def check_filters(df: pd.DataFrame, filters: Dict[str, Union[List[bool], List[st
             extract_num_filters(filters, key)
 
 
+_NUM_OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<=": operator.le,
+    ">=": operator.ge,
+    "<": operator.lt,
+    ">": operator.gt,
+}
+
+
 def num_filter_df(df: pd.DataFrame, col: str, sign: str, val: float) -> pd.DataFrame:
-    ops = {
-        "==": operator.eq(df[col], val),
-        "!=": operator.ne(df[col], val),
-        "<=": operator.le(df[col], val),
-        ">=": operator.ge(df[col], val),
-        "<": operator.lt(df[col], val),
-        ">": operator.gt(df[col], val),
-    }
-    filtered_df = df.loc[ops[sign]]
-    return filtered_df
+    return df.loc[_NUM_OPERATORS[sign](df[col], val)]
 
 
-def filter_df(df: pd.DataFrame, filters: Dict[str, Union[List[bool], List[str]]]) -> pd.DataFrame:
-    df_copy = df.copy()
-    check_filters(df_copy, filters)
-    for key in filters:
-        if df_copy.dtypes[key] == "bool" or df_copy.dtypes[key] == "O":
-            df_copy = df_copy.loc[df_copy[key].isin(filters[key])]
+# filter condition: column, comparison operator (isin if None) and value to compare with
+_Condition = Tuple[str, Optional[Callable], Any]
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_filters(
+        filters: Tuple[Tuple[str, Tuple[Union[bool, str], ...]], ...],
+        dtypes: Tuple[np.dtype, ...]
+) -> Tuple[_Condition, ...]:
+    filters = {key: list(values) for key, values in filters}
+    _check_filters(dict(zip(filters, dtypes)), filters)
+    conditions = []
+    for (key, values), dtype in zip(filters.items(), dtypes):
+        if dtype == "bool" or _is_string_dtype(dtype):
+            conditions.append((key, None, tuple(values)))
         else:
-            for i, sign in enumerate(extract_num_filters(filters, key)[0]):
-                val = extract_num_filters(filters, key)[1][i]
-                df_copy = num_filter_df(df_copy, key, extract_num_filters(filters, key)[0][i], val)
-    return df_copy
+            signs, vals = extract_num_filters(filters, key)
+            conditions.extend((key, _NUM_OPERATORS[sign], val) for sign, val in zip(signs, vals))
+    return tuple(conditions)
+
+
+def filter_mask(df: pd.DataFrame, filters: Dict[str, Union[List[bool], List[str]]]) -> np.ndarray:
+    """
+    Returns boolean mask of df rows matched all filters.
+    Filters compiled once per filters and columns dtypes and evaluated without copying the df.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    if not filters:
+        return mask
+    key = tuple((column, tuple(values)) for column, values in filters.items())
+    dtypes = df.dtypes
+    dtypes = tuple(dtypes[column] for column in filters)
+    try:
+        conditions = _compile_filters(key, dtypes)
+    except TypeError:
+        # unhashable values (e.g. nested lists) can't be cached, compiled as is to report invalid filter
+        conditions = _compile_filters.__wrapped__(key, dtypes)
+    for column, compare, value in conditions:
+        matched = df[column].isin(value) if compare is None else compare(df[column], value)
+        mask &= matched.to_numpy(dtype=bool)
+    return mask
+
+
+def filter_df(df: pd.DataFrame, filters: Dict[str, Union[List[bool], List[str]]]) -> pd.DataFrame:
+    """
+    Returns rows of df matched all filters. Without filters returns shallow copy: columns of the result
+    can be assigned, added, dropped or renamed, but values must not be modified in place.
+    """
+    if not filters:
+        return df.copy(deep=False)
+    return df.loc[filter_mask(df, filters)]
 
 
 def filter_group_aggregate(
@@ -155,3 +212,84 @@ def calc_stats(
         df_copy = df_copy.groupby(col_to_groupby).agg(agg_dict).reset_index()
     df_copy.columns = col_names
     return df_copy
+
+
+@dataclass
+class Aggregation:
+    """
+    Declarative aggregation over the event table: rows selected by mask and filters are grouped by
+    groupby column and aggregated with func ("size", "sum" or "mean") of column into the column name.
+    """
+    name: str
+    groupby: str
+    func: str = "size"
+    column: Optional[str] = None
+    mask: Optional[pd.Series] = None
+    filters: Optional[Dict[str, Union[List[bool], List[str]]]] = None
+
+
+def aggregate_many(df: pd.DataFrame, aggregations: List[Aggregation], key: str = "Player") -> pd.DataFrame:
+    """
+    Computes aggregations with one groupby pass over the table per distinct groupby column.
+
+    Result is the same as outer merge of filter_group_aggregate() of each aggregation in the given order
+    with missing values filled by zeros (and such columns converted to float).
+    """
+    filter_masks: List[Tuple[dict, np.ndarray]] = []
+
+    def selected(aggregation: Aggregation) -> np.ndarray:
+        filters = aggregation.filters or dict()
+        mask = next((it for f, it in filter_masks if f == filters), None)
+        if mask is None:
+            mask = filter_mask(df, filters)
+            filter_masks.append((filters, mask))
+        if aggregation.mask is not None:
+            mask = mask & aggregation.mask.to_numpy(dtype=bool)
+        return mask
+
+    by_groupby: Dict[str, List[int]] = defaultdict(list)
+    for index, aggregation in enumerate(aggregations):
+        by_groupby[aggregation.groupby].append(index)
+
+    counts = []
+    values = []
+    for groupby, indexes in by_groupby.items():
+        columns = dict()
+        for index in indexes:
+            aggregation = aggregations[index]
+            mask = selected(aggregation)
+            columns[f"count{index}"] = mask
+            if aggregation.func != "size":
+                columns[f"value{index}"] = df[aggregation.column].where(mask).to_numpy(dtype=float)
+        grouped = pd.DataFrame(columns).groupby(df[groupby].to_numpy()).sum()
+        counts.append(grouped[[f"count{index}" for index in indexes]])
+        values.append(grouped[[f"value{index}" for index in indexes if f"value{index}" in grouped]])
+
+    counts = pd.concat(counts, axis=1).fillna(0)
+    values = pd.concat(values, axis=1).reindex(counts.index).fillna(0)
+
+    # keys ordered as outer merges do: by first aggregation where key appeared then by key itself
+    present = counts[[f"count{index}" for index in range(len(aggregations))]].to_numpy() > 0
+    order = pd.DataFrame({"first": present.argmax(axis=1), "key": counts.index})
+    order = order.loc[present.any(axis=1)].sort_values(by=["first", "key"], kind="mergesort")
+    counts = counts.iloc[order.index]
+    values = values.iloc[order.index]
+
+    result = pd.DataFrame({key: counts.index})
+    for index, aggregation in enumerate(aggregations):
+        count = counts[f"count{index}"].to_numpy()
+        if aggregation.func == "size":
+            column = count.astype(np.int64)
+        elif aggregation.func == "sum":
+            column = values[f"value{index}"].to_numpy()
+            if pd.api.types.is_integer_dtype(df[aggregation.column]) or \
+                    pd.api.types.is_bool_dtype(df[aggregation.column]):
+                column = column.astype(np.int64)
+        elif aggregation.func == "mean":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                column = np.nan_to_num(values[f"value{index}"].to_numpy() / count)
+        else:
+            raise ValueError(f"Unsupported aggregation function {aggregation.func}")
+        # keys missing for the aggregation would be filled with NaN by outer merge
+        result[aggregation.name] = column.astype(float) if (count == 0).any() else column
+    return result
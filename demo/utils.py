@@ -1,5 +1,6 @@
 from typing import Tuple
 
+import numpy as np
 import pandas as pd
 
 pd.options.mode.chained_assignment = None  # default='warn'
@@ -33,3 +34,22 @@ def clear_data(df: pd.DataFrame, offset: int, rounds: pd.DataFrame) -> pd.DataFr
     df.reset_index(inplace=True, drop=True)
 
     return df
+
+
+def compact_dtypes(df: pd.DataFrame, floats: bool = False, categories: bool = False) -> pd.DataFrame:
+    """
+    Reduce memory used by table: int64 columns downcast to int32 if values fit, if floats specified
+    then float64 downcast to float32 (loses precision) and if categories specified then string columns
+    converted to categorical.
+    """
+    int32 = np.iinfo(np.int32)
+    columns = dict()
+    for name, column in df.items():
+        if column.dtype == np.int64:
+            if column.empty or (int32.min <= column.min() and column.max() <= int32.max):
+                columns[name] = column.astype(np.int32)
+        elif floats and column.dtype == np.float64:
+            columns[name] = column.astype(np.float32)
+        elif categories and column.dtype == object and pd.api.types.infer_dtype(column, skipna=True) == "string":
+            columns[name] = column.astype("category")
+    return df.assign(**columns) if columns else df
@@ -0,0 +1,43 @@
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+from faceit.cache import DirectoryMatchCache, SqliteMatchCache, migrate_match_cache
+from utils.logging import logger
+
+log = logger()
+
+
+def main(argv: List[str]):
+    parser = argparse.ArgumentParser(
+        prog="faceit-cache-migrate",
+        description="Migrate matches cached as json files in directory into SQLite match cache")
+    parser.add_argument('-s', '--source', type=str, default="_faceit_cache_",
+                        help="Path to directory with <match_id>.json files")
+    parser.add_argument('-t', '--target', type=str, default=None,
+                        help="Path to SQLite match cache, matches.sqlite in source directory if not specified")
+    parser.add_argument('--delete', action="store_true", help="Delete json files of migrated matches")
+    args = parser.parse_args(argv[1:])
+
+    log.info(args)
+
+    source_path = Path(args.source)
+    if not source_path.is_dir():
+        sys.exit(f"Cache directory {source_path} not found")
+
+    target_path = Path(args.target) if args.target is not None else source_path / "matches.sqlite"
+
+    source = DirectoryMatchCache(source_path)
+    migrated = migrate_match_cache(source, SqliteMatchCache(target_path))
+
+    log.info(f"{len(migrated)} matches migrated from {source_path} into {target_path}")
+
+    if args.delete:
+        # files that were not migrated (e.g. corrupted) are kept
+        for match_id in migrated:
+            source.remove(match_id)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
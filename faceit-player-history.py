@@ -7,7 +7,7 @@ import numpy as np
 import pandas as pd
 from matplotlib import pyplot as plt
 
-from faceit.faceit import Faceit
+from faceit.faceit import Faceit, DEFAULT_API_RATE
 from faceit.functions import statistics2dataframe
 from faceit.visualization import draw_faceit_score_history
 from utils.logging import logger
@@ -15,9 +15,9 @@ from utils.logging import logger
 log = logger()
 
 
-def show_player_statistics(faceit: Faceit, nickname: str):
+def show_player_statistics(faceit: Faceit, nickname: str, window: int = 1):
     player = faceit.player(nickname)
-    statistics = faceit.matches_stats(player.player_id)
+    statistics = faceit.player_history(player.player_id, window=window)
 
     df = statistics2dataframe(statistics)
     draw_faceit_score_history(df)
@@ -25,14 +25,13 @@ def show_player_statistics(faceit: Faceit, nickname: str):
     plt.show()
 
 
-def show_player_kda_for_elo(faceit: Faceit, nickname: str):
+def show_player_kda_for_elo(faceit: Faceit, nickname: str, window: int = 1, workers: int = 1):
     player = faceit.player(nickname)
-    statistics = faceit.matches_stats(player.player_id, 300)
+    statistics = faceit.player_history(player.player_id, 300, window=window)
+    matches = faceit.matches((it.match_id for it in statistics), workers=workers)
 
     table = []
-    for index, stats in enumerate(statistics):
-        log.info(f"Get {index + 1} match details for {stats.match_id}")
-        match = faceit.match(stats.match_id)
+    for stats, match in zip(statistics, matches):
         for teammate in match.get_players_team(player):
             entry = {
                 "match_id": match.match_id,
@@ -70,6 +69,12 @@ def main(argv: List[str]):
     parser = argparse.ArgumentParser(prog="faceit-player-history")
     parser.add_argument('-c', '--config', required=True, type=str, help="Path to config. file")
     parser.add_argument('-p', '--player', required=True, type=str, help="Player id")
+    parser.add_argument('--history_window', '--history-window', type=int, default=8,
+                        help="Number of player history pages requested concurrently")
+    parser.add_argument('--match_workers', '--match-workers', type=int, default=8,
+                        help="Number of matches details requested concurrently")
+    parser.add_argument('--api_rate', '--api-rate', type=float, default=DEFAULT_API_RATE,
+                        help="Maximum number of Faceit API requests per second")
     args = parser.parse_args(argv[1:])
 
     log.info(args)
@@ -79,9 +84,11 @@ def main(argv: List[str]):
     if not os.path.isfile(args.config):
         sys.exit(f"Configuration file {args.config} not found")
 
-    faceit = Faceit()
-    # show_player_statistics(faceit, nickname)
-    show_player_kda_for_elo(faceit, nickname)
+    faceit = Faceit(rate=args.api_rate)
+    # show_player_statistics(faceit, nickname, args.history_window)
+    show_player_kda_for_elo(faceit, nickname, args.history_window, args.match_workers)
+
+    log.info(f"Faceit API {faceit.api_stats()}")
 
 
 if __name__ == '__main__':
@@ -1,33 +1,138 @@
 import argparse
+import functools
+import itertools
 import json
 import os.path
 import sys
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Iterable, Iterator, Dict, Tuple
 
-from demo.base import Demo, Statistics, Frames
-from faceit.faceit import Faceit
+import pandas as pd
+
+from demo.aim import aim_reports
+from demo.base import Summary, Frames
+from faceit.faceit import Faceit, Match, HostLimiter, DEFAULT_API_RATE
 from utils.logging import logger
+from utils.pipeline import Pipeline, Stage
+from utils.processes import process_unordered
 
 
 log = logger()
 
 
+def played_matches(faceit: Faceit, championship: str) -> List[Match]:
+    return [it for it in faceit.championship_matches(championship) if it.demo_url is not None]
+
+
+def analyze_match(item: Tuple[Match, Path], force: bool = False) -> Tuple[Match, Summary]:
+    match, dem_path = item
+    return match, Summary.analyze(dem_path, force)
+
+
+def analyze_matches(
+        faceit: Faceit,
+        matches: Iterable[Match],
+        demos_dir: Path,
+        args: argparse.Namespace
+) -> Tuple[Dict[str, Summary], Dict[str, Path]]:
+    """
+    Download, parse and reduce demo of each match into summary in a pipeline of stages, each stage has its
+    own workers: downloads run in threads, parsing in a pool of processes. Stages are connected by bounded
+    queues, so downloads wait when parsing is behind and number of demos in flight stays bounded.
+    Cached summaries are reused. Throughput of each stage printed at the end.
+    Returns summary of each successfully analyzed match and path of each downloaded demo by match id.
+    """
+    match_summaries: Dict[str, Summary] = dict()
+    dem_paths: Dict[str, Path] = dict()
+    limiter = HostLimiter(args.download_host_workers)
+    analyze = functools.partial(analyze_match, force=args.force_analyze)
+
+    def download(match: Match) -> Tuple[Match, Path]:
+        dem_path = faceit.download_demo(match, demos_dir, args.force_download, limiter)
+        dem_paths[match.match_id] = dem_path
+        return match, dem_path
+
+    def parse(items: Iterator[Tuple[Match, Path]]) -> Iterator[tuple]:
+        return process_unordered(analyze, items, args.parse_workers)
+
+    def aggregate(item: Tuple[Match, Summary]) -> Summary:
+        match, summary = item
+        match_summaries[match.match_id] = summary
+        return summary
+
+    if args.parse_workers > 1:
+        parse_stage = Stage("parse", parse, args.parse_workers, args.queue_size, stream=True)
+    else:
+        parse_stage = Stage("parse", analyze, 1, args.queue_size)
+
+    pipeline = Pipeline(
+        Stage("download", download, args.download_workers, args.queue_size),
+        parse_stage,
+        Stage("aggregate", aggregate, 1, args.queue_size))
+
+    for summary in pipeline.run(matches):
+        if args.match_stats:
+            print(summary.player_box_score().to_string())
+
+    for stage_stats in pipeline.stats():
+        print(stage_stats)
+
+    return match_summaries, dem_paths
+
+
+def print_box_score(name: str, match_summaries: List[Summary]):
+    if not match_summaries:
+        log.warning(f"No demos analyzed for {name}")
+        return
+
+    summary = Summary.merge_all(match_summaries)
+
+    print(summary.player_box_score().to_string())
+
+
 def analyze_championship(faceit: Faceit, championship: str, demos_dir: Path, args: argparse.Namespace):
-    matches = faceit.championship_matches(championship)
+    match_summaries, dem_paths = analyze_matches(faceit, played_matches(faceit, championship), demos_dir, args)
+    print_box_score(f"championship {championship}", list(match_summaries.values()))
 
-    played_matches = list(filter(lambda it: it.demo_url is not None, matches))
+    if args.aim_report:
+        print(aim_report(dem_paths.values(), args).to_string())
 
-    full_stats: Optional[Statistics] = None
-    for match in played_matches:
-        dem_path = faceit.download_demo(match, demos_dir, args.force_download)
-        demo = Demo.load(dem_path, args.force_analyze)
-        stats = Statistics.from_demo(demo)
-        if args.match_stats:
-            print(stats.player_box_score().to_string())
-        full_stats = full_stats.concat(stats) if full_stats is not None else stats
 
-    print(full_stats.player_box_score().to_string())
+def aim_report(dem_paths: Iterable[Path], args: argparse.Namespace) -> pd.DataFrame:
+    return aim_reports(list(dem_paths), args.parse_workers, force=args.force_analyze)
+
+
+def analyze_championships(faceit: Faceit, championships: List[str], demos_dir: Path, args: argparse.Namespace):
+    """
+    Analyze championships together: match lists resolved first, so each match shared by several
+    championships is downloaded, parsed and analyzed only once. Box score of each championship
+    is printed followed by combined box score of all of them.
+    """
+    championship_matches = {it: played_matches(faceit, it) for it in championships}
+
+    matches: Dict[str, Match] = dict()
+    for championship_match in itertools.chain.from_iterable(championship_matches.values()):
+        matches.setdefault(championship_match.match_id, championship_match)
+
+    total = sum(len(it) for it in championship_matches.values())
+    log.info(f"{len(matches)} unique matches of {total} in {len(championships)} championships")
+
+    match_summaries, dem_paths = analyze_matches(faceit, matches.values(), demos_dir, args)
+
+    for championship, championship_match in championship_matches.items():
+        print(f"Championship {championship}")
+        summaries = [match_summaries[it.match_id] for it in championship_match if it.match_id in match_summaries]
+        print_box_score(f"championship {championship}", summaries)
+
+    print(f"Championships {' '.join(championships)}")
+    print_box_score("championships", list(match_summaries.values()))
+
+    if args.aim_report:
+        report = aim_report(dem_paths.values(), args)
+        for championship, championship_match in championship_matches.items():
+            names = [dem_paths[it.match_id].stem for it in championship_match if it.match_id in dem_paths]
+            print(f"Championship {championship}")
+            print(report.loc[report["demo"].isin(names)].to_string())
 
 
 def main(argv: List[str]):
@@ -35,6 +140,20 @@ def main(argv: List[str]):
     parser.add_argument('--force_analyze', action="store_true", help="Force to re-analyze demo")
     parser.add_argument('--force_download', action="store_true", help="Force to re-download demo")
     parser.add_argument('--match_stats', action="store_true", help="Print each match statistics")
+    parser.add_argument('--download_workers', '--download-workers', type=int, default=4,
+                        help="Number of demos downloaded simultaneously")
+    parser.add_argument('--download_host_workers', '--download-host-workers', type=int, default=None,
+                        help="Number of demos downloaded simultaneously from the same host")
+    parser.add_argument('--parse_workers', '--parse-workers', type=int, default=1,
+                        help="Number of processes to parse demos simultaneously")
+    parser.add_argument('--api_rate', '--api-rate', type=float, default=DEFAULT_API_RATE,
+                        help="Maximum number of Faceit API requests per second")
+    parser.add_argument('--queue_size', '--queue-size', type=int, default=None,
+                        help="Maximum number of demos waiting for each stage, number of stage workers if not specified")
+    parser.add_argument('--aim_report', '--aim-report', action="store_true",
+                        help="Print report of hits done right after view snap (parses players frames, slow)")
+    parser.add_argument('--batch', action="store_true",
+                        help="Analyze championships together, matches shared by championships are analyzed once")
     parser.add_argument('-c', '--config', required=True, type=str, help="Path to config. file")
     parser.add_argument('championships', type=str, nargs='+', help="Identifier of championships to analyze")
     args = parser.parse_args(argv[1:])
@@ -54,9 +173,15 @@ def main(argv: List[str]):
     if len(args.championships) == 0:
         sys.exit("Specify at least one championship id in program arguments")
 
-    faceit = Faceit()
-    for championship in args.championships:
-        analyze_championship(faceit, championship, demos_dir, args)
+    faceit = Faceit(rate=args.api_rate)
+
+    if args.batch:
+        analyze_championships(faceit, args.championships, demos_dir, args)
+    else:
+        for championship in args.championships:
+            analyze_championship(faceit, championship, demos_dir, args)
+
+    log.info(f"Faceit API {faceit.api_stats()}")
 
 
 if __name__ == '__main__':
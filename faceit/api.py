@@ -1,11 +1,17 @@
+import asyncio
 import json
-import time
+import random
 from dataclasses import dataclass
-from typing import Any
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
 
+import aiohttp
 import requests
 from requests import Response
+from requests.adapters import HTTPAdapter
 
+from faceit.limiter import RateLimiter, RateLimiterStats
 from utils.logging import logger
 
 FACEIT_API_URL = "https://api.faceit.com"
@@ -16,6 +22,15 @@ MATCH_V2_ENDPOINT = "match/v2"
 
 _GET_REQUEST = "GET"
 
+_HEADERS = {'accept': 'application/json'}
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 30.0
+DEFAULT_MAX_DELAY = 120.0
+
+_TOO_MANY_REQUESTS = 429
+
 
 log = logger()
 
@@ -25,32 +40,108 @@ class FaceitApiRequestError(Exception):
     error: Any
 
 
-class FaceitApi(object):
+def _parse_content(content: bytes):
+    result = json.loads(content.decode('utf-8'))
+    return result["payload"] if "payload" in result else result
+
+
+def _is_retryable(status: int) -> bool:
+    return status == _TOO_MANY_REQUESTS or 500 <= status < 600
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Returns seconds from Retry-After header value that can be either number of seconds or HTTP date"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+class BaseFaceitApi(object):
+    """
+    Faceit endpoints shared by synchronous and asynchronous clients.
+    Subclasses implement _request() and endpoint methods return whatever it returns
+    i.e. result for FaceitApi and awaitable for AsyncFaceitApi.
+    """
 
-    def __init__(self, base_url: str = FACEIT_API_URL, retries: int = 10, delay: float = 5.0):
+    def __init__(
+            self,
+            base_url: str = FACEIT_API_URL,
+            retries: int = 10,
+            delay: float = 5.0,
+            pool_size: int = DEFAULT_POOL_SIZE,
+            connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+            read_timeout: float = DEFAULT_READ_TIMEOUT,
+            rate: Optional[float] = None,
+            max_delay: float = DEFAULT_MAX_DELAY,
+            limiter: Optional[RateLimiter] = None
+    ):
+        """
+        :param base_url: Faceit API url
+        :param retries: number of attempts for request failed due to transient error
+        :param delay: base delay before retry, doubled on each next retry
+        :param pool_size: maximum number of simultaneous connections kept alive
+        :param connect_timeout: timeout to connect to server in seconds
+        :param read_timeout: timeout to wait data from server in seconds
+        :param rate: maximum number of requests per second, not limited if None
+        :param max_delay: maximum delay before retry
+        :param limiter: rate limiter shared with other clients, if None then created using rate
+        """
         self._base_url = base_url
         self._retries = retries
         self._delay = delay
+        self._max_delay = max_delay
+        self._pool_size = pool_size
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._limiter = limiter if limiter is not None else RateLimiter(rate)
 
-    def __request_internal(self, request: str, endpoint: str, url: str):
-        headers = {'accept': 'application/json'}
-        api = f"{self._base_url}/{endpoint}/{url}"
-        response: Response = requests.request(request, url=api, headers=headers)
-        if response.status_code != 200:
+    def stats(self) -> RateLimiterStats:
+        return self._limiter.stats()
+
+    def _url(self, endpoint: str, url: str) -> str:
+        return f"{self._base_url}/{endpoint}/{url}"
+
+    def _retry_delay(self, retry: int, status: Optional[int] = None, retry_after: Optional[str] = None) -> float:
+        """
+        Returns delay before next retry: either requested by server or exponential backoff with jitter.
+        If server responded with 429 then all requests using the same limiter are paused.
+        """
+        delay = _parse_retry_after(retry_after)
+        if delay is None:
+            backoff = min(self._max_delay, self._delay * 2 ** retry)
+            delay = backoff / 2 + random.uniform(0, backoff / 2)
+        if status == _TOO_MANY_REQUESTS:
+            self._limiter.pause(delay)
+        self._limiter.retried(delay)
+        return delay
+
+    def _check_response(self, retry: int, status: int, retry_after: Optional[str], response: Any) -> float:
+        """Returns delay before retry of request failed with given status or raises error if can't retry"""
+        if not _is_retryable(status) or retry == self._retries - 1:
             raise FaceitApiRequestError(response)
-        content = response.content.decode('utf-8')
-        result = json.loads(content)
-        return result["payload"] if "payload" in result else result
+        delay = self._retry_delay(retry, status, retry_after)
+        log.warning(f"{response.url} -> {status}, retry in {delay:.1f}s")
+        return delay
+
+    def _check_error(self, retry: int, url: str, error: Exception) -> float:
+        """Returns delay before retry of request failed with given error or raises error if can't retry"""
+        log.error(f"{url} -> {error!r}")
+        if retry == self._retries - 1:
+            raise FaceitApiRequestError(error)
+        return self._retry_delay(retry)
 
     def _request(self, request: str, endpoint: str, url: str):
-        for retry in range(self._retries):
-            try:
-                return self.__request_internal(request, endpoint, url)
-            except (UnicodeDecodeError, TimeoutError) as error:
-                log.error(f"{self._base_url}/{endpoint}/{url} -> {error}")
-                if retry == self._retries - 1:
-                    raise FaceitApiRequestError(error)
-                time.sleep(5.0)
+        raise NotImplementedError()
 
     def _get_request(self, endpoint: str, url: str):
         return self._request(_GET_REQUEST, endpoint, url)
@@ -80,4 +171,96 @@ class FaceitApi(object):
         return self._match_v2_request(f"match?entityId={championship_id}&entityType=championship")
 
 
+class FaceitApi(BaseFaceitApi):
+    """
+    Synchronous client, connections are kept alive and reused. All threads share one session,
+    connection pool of urllib3 is thread-safe, so number of open connections is bounded by pool size
+    no matter how many threads (or short-lived thread pools) use the client.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        adapter = HTTPAdapter(pool_connections=self._pool_size, pool_maxsize=self._pool_size)
+        self._session = requests.Session()
+        self._session.headers.update(_HEADERS)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def close(self):
+        self._session.close()
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _request(self, request: str, endpoint: str, url: str):
+        api = self._url(endpoint, url)
+        timeout = (self._connect_timeout, self._read_timeout)
+        delay = 0.0
+        for retry in range(self._retries):
+            self._limiter.acquire(delay)
+            try:
+                response: Response = self._session.request(request, url=api, timeout=timeout)
+                if response.status_code == 200:
+                    return _parse_content(response.content)
+            # ValueError: response truncated by broken connection is not valid json (or utf-8)
+            except (ValueError, TimeoutError, requests.Timeout, requests.ConnectionError,
+                    requests.exceptions.ChunkedEncodingError) as error:
+                delay = self._check_error(retry, api, error)
+            else:
+                delay = self._check_response(
+                    retry, response.status_code, response.headers.get("Retry-After"), response)
+
+
+class AsyncFaceitApi(BaseFaceitApi):
+    """
+    Asynchronous client to request many endpoints concurrently, i.e.:
+
+        async with AsyncFaceitApi() as api:
+            matches = await asyncio.gather(*(api.match_details(it) for it in match_ids))
+
+    Number of simultaneous connections limited by pool size, other requests wait for free connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # session must be created inside running event loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=_HEADERS,
+                connector=aiohttp.TCPConnector(limit=self._pool_size),
+                timeout=aiohttp.ClientTimeout(connect=self._connect_timeout, sock_read=self._read_timeout))
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _request(self, request: str, endpoint: str, url: str):
+        api = self._url(endpoint, url)
+        delay = 0.0
+        for retry in range(self._retries):
+            await self._limiter.acquire_async(delay)
+            try:
+                async with self._get_session().request(request, api) as response:
+                    content = await response.read()
+                    if response.status == 200:
+                        return _parse_content(content)
+            # ValueError: response truncated by broken connection is not valid json (or utf-8)
+            except (ValueError, asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError) \
+                    as error:
+                delay = self._check_error(retry, api, error)
+            else:
+                delay = self._check_response(retry, response.status, response.headers.get("Retry-After"), response)
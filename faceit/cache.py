@@ -0,0 +1,203 @@
+import itertools
+import json
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import closing
+from pathlib import Path
+from typing import Optional, Union, Dict, Iterable, Iterator, Tuple, List
+
+from utils.functions import read_json, split
+from utils.logging import logger
+
+log = logger()
+
+# SQLite limits number of host parameters in one statement
+_SQLITE_BATCH_SIZE = 500
+
+UNFINISHED_MATCH_TTL = 10 * 60
+
+_FINAL_MATCH_STATUSES = {"FINISHED", "CANCELLED"}
+
+
+def is_match_finished(data: dict) -> bool:
+    """Details of finished match don't change anymore, so they can be cached forever"""
+    status = data.get("status", None)
+    return status in _FINAL_MATCH_STATUSES if status is not None else "demoURLs" in data
+
+
+class MatchCache(object):
+    """Storage of raw match details received from Faceit API"""
+
+    def get(self, match_id: str) -> Optional[dict]:
+        raise NotImplementedError()
+
+    def get_many(self, match_ids: Iterable[str]) -> Dict[str, dict]:
+        """Returns matches found in cache, missed matches are absent in the result"""
+        result = dict()
+        for match_id in match_ids:
+            data = self.get(match_id)
+            if data is not None:
+                result[match_id] = data
+        return result
+
+    def put(self, match_id: str, data: dict, ttl: Optional[float] = None):
+        """
+        Store match details in cache.
+
+        :param match_id: id of match
+        :param data: match details
+        :param ttl: time in seconds while entry is valid, stored forever if None
+        """
+        raise NotImplementedError()
+
+    def put_many(self, items: Iterable[Tuple[str, dict]], ttl: Optional[float] = None):
+        for match_id, data in items:
+            self.put(match_id, data, ttl)
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        raise NotImplementedError()
+
+
+class DirectoryMatchCache(MatchCache):
+    """
+    Legacy cache layout: one <match_id>.json file per match in directory.
+    Entries with TTL are not stored because file has no place to keep expiration time.
+    """
+
+    def __init__(self, path: Union[Path, str]):
+        self._path = Path(path)
+        self._path.mkdir(exist_ok=True)
+
+    def _match_path(self, match_id: str) -> Path:
+        return self._path / Path(match_id).with_suffix(".json")
+
+    def get(self, match_id: str) -> Optional[dict]:
+        match_path = self._match_path(match_id)
+        return read_json(match_path) if match_path.is_file() else None
+
+    def put(self, match_id: str, data: dict, ttl: Optional[float] = None):
+        if ttl is not None:
+            return
+        match_path = self._match_path(match_id)
+        temp_path = match_path.with_name(f"{match_path.name}.{os.getpid()}.tmp")
+        temp_path.write_text(json.dumps(data))
+        os.replace(temp_path, match_path)
+
+    def remove(self, match_id: str):
+        self._match_path(match_id).unlink(missing_ok=True)
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        for match_path in self._path.glob("*.json"):
+            try:
+                yield match_path.stem, read_json(match_path)
+            except ValueError as error:
+                log.warning(f"Skip corrupted cache file {match_path} due to {error}")
+
+
+class SqliteMatchCache(MatchCache):
+    """
+    Cache of zlib compressed match details in SQLite database.
+    If cache size exceeds max_size then least recently used entries are evicted.
+    Each call opens own connection, so cache can be shared between threads.
+    """
+
+    def __init__(self, path: Union[Path, str], max_size: Optional[int] = None, timeout: float = 30.0):
+        """
+        :param path: path to database file
+        :param max_size: maximum total size of compressed entries in bytes, not limited if None
+        :param timeout: time to wait for database lock held by another connection
+        """
+        self._path = str(path)
+        self._max_size = max_size
+        self._timeout = timeout
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS matches ("
+                "match_id TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, "
+                "expires REAL, accessed REAL NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS matches_accessed ON matches (accessed)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._path, timeout=self._timeout)
+
+    def get(self, match_id: str) -> Optional[dict]:
+        return self.get_many([match_id]).get(match_id, None)
+
+    def get_many(self, match_ids: Iterable[str]) -> Dict[str, dict]:
+        now = time.time()
+        result = dict()
+        with closing(self._connect()) as connection, connection:
+            for batch in split(list(dict.fromkeys(match_ids)), _SQLITE_BATCH_SIZE):
+                placeholders = ", ".join("?" * len(batch))
+                rows = connection.execute(
+                    f"SELECT match_id, data FROM matches "
+                    f"WHERE match_id IN ({placeholders}) AND (expires IS NULL OR expires > ?)",
+                    (*batch, now)
+                ).fetchall()
+                accessed = [(now, match_id) for match_id, _ in rows]
+                connection.executemany("UPDATE matches SET accessed = ? WHERE match_id = ?", accessed)
+                result.update((match_id, json.loads(zlib.decompress(data))) for match_id, data in rows)
+        return result
+
+    def put(self, match_id: str, data: dict, ttl: Optional[float] = None):
+        self.put_many([(match_id, data)], ttl)
+
+    def put_many(self, items: Iterable[Tuple[str, dict]], ttl: Optional[float] = None):
+        now = time.time()
+        expires = now + ttl if ttl is not None else None
+        rows: List[tuple] = []
+        for match_id, data in items:
+            blob = zlib.compress(json.dumps(data).encode("utf-8"))
+            rows.append((match_id, blob, len(blob), expires, now))
+        # whole batch written in one transaction, so readers never see partially written entries
+        with closing(self._connect()) as connection, connection:
+            connection.executemany("INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?, ?)", rows)
+            connection.execute("DELETE FROM matches WHERE expires IS NOT NULL AND expires <= ?", (now,))
+            if self._max_size is not None:
+                self._evict(connection)
+
+    def _evict(self, connection: sqlite3.Connection):
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM matches").fetchone()[0]
+        if total <= self._max_size:
+            return
+        evicted = []
+        for match_id, size in connection.execute("SELECT match_id, size FROM matches ORDER BY accessed"):
+            if total <= self._max_size:
+                break
+            evicted.append((match_id,))
+            total -= size
+        connection.executemany("DELETE FROM matches WHERE match_id = ?", evicted)
+        log.debug(f"Evicted {len(evicted)} matches from cache {self._path}")
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        with closing(self._connect()) as connection:
+            rows = connection.execute("SELECT match_id, data FROM matches WHERE expires IS NULL OR expires > ?",
+                                      (time.time(),))
+            for match_id, data in rows:
+                yield match_id, json.loads(zlib.decompress(data))
+
+
+def migrate_match_cache(
+        source: MatchCache,
+        target: MatchCache,
+        batch_size: int = 1000,
+        unfinished_ttl: float = UNFINISHED_MATCH_TTL
+) -> List[str]:
+    """
+    Copy all entries from source cache to target cache, returns ids of copied entries.
+    Not finished matches are copied with unfinished_ttl as Faceit.match() would cache them.
+    Entries source failed to read (e.g. corrupted files) are not copied and not returned.
+    """
+    migrated: List[str] = []
+    items = source.items()
+    while batch := list(itertools.islice(items, batch_size)):
+        finished = [it for it in batch if is_match_finished(it[1])]
+        unfinished = [it for it in batch if not is_match_finished(it[1])]
+        target.put_many(finished)
+        if unfinished:
+            target.put_many(unfinished, unfinished_ttl)
+        migrated.extend(match_id for match_id, _ in batch)
+        log.info(f"Migrated {len(migrated)} matches")
+    return migrated
@@ -1,17 +1,44 @@
+import contextlib
+import itertools
+import os
+import threading
 import time
 import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Iterable, Union, List, Dict
+from typing import Optional, Iterable, Union, List, Dict, Iterator, Tuple, BinaryIO, Callable, TypeVar
+from urllib.error import HTTPError
+from urllib.parse import urlparse
 from urllib.request import Request, urlopen
 
 from faceit.api import FaceitApi, FaceitApiRequestError
-from utils.functions import dict_get_or_default, read_json, write_json
+from faceit.cache import MatchCache, SqliteMatchCache, UNFINISHED_MATCH_TTL, is_match_finished
+from faceit.history import PlayerHistoryStore
+from faceit.limiter import RateLimiter, RateLimiterStats
+from utils.functions import dict_get_or_default
+from utils.lru import LruCache, LruCacheStats
 from utils.logging import logger
 
 log = logger()
 
+T = TypeVar('T')
+
+_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# number of demos submitted for download per worker while the oldest one is not consumed
+_DOWNLOAD_AHEAD = 2
+
+MATCH_CACHE_MAX_SIZE = 1024 * 1024 * 1024
+# requests per second used by scripts and bot to stay below Faceit API limits
+DEFAULT_API_RATE = 10.0
+
+
+def _read_chunks(file: BinaryIO, size: int = _DOWNLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+    return iter(lambda: file.read(size), b"")
+
 
 @dataclass
 class Player:
@@ -152,27 +179,126 @@ class Match:
         return next(it for it in self.teams if it.has_player(player))
 
 
+class HostLimiter(object):
+    """Limits number of simultaneous connections to each host"""
+
+    def __init__(self, limit: Optional[int]):
+        self._limit = limit
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = dict()
+
+    def get(self, url: str) -> Optional[threading.BoundedSemaphore]:
+        if self._limit is None:
+            return None
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self._limit)
+            return self._semaphores[host]
+
+
 class Faceit(object):
 
-    def __init__(self):
-        self._api = FaceitApi()
+    def __init__(
+            self,
+            match_cache: Optional[MatchCache] = None,
+            unfinished_ttl: float = UNFINISHED_MATCH_TTL,
+            memory_cache: Optional[LruCache] = None,
+            api: Optional[FaceitApi] = None,
+            rate: Optional[float] = None,
+            limiter: Optional[RateLimiter] = None
+    ):
+        """
+        :param match_cache: cache of match details, SQLite database in cache directory if None
+        :param unfinished_ttl: time in seconds while details of not finished match are cached
+        :param memory_cache: in-memory cache of player details and history pages, not used if None
+        :param api: Faceit API client, if None then created with rate and limiter
+        :param rate: maximum number of API requests per second, not limited if None
+        :param limiter: rate limiter shared with other clients, if None then created using rate
+        """
+        self._api = api if api is not None else FaceitApi(rate=rate, limiter=limiter)
         self._cache_path = Path("_faceit_cache_")
         self._cache_path.mkdir(exist_ok=True)
+        self._history = PlayerHistoryStore(self._cache_path / "history.sqlite")
+        self._match_cache = match_cache if match_cache is not None else SqliteMatchCache(
+            self._cache_path / "matches.sqlite", max_size=MATCH_CACHE_MAX_SIZE)
+        self._unfinished_ttl = unfinished_ttl
+        self._memory_cache = memory_cache
+
+    def _cached(self, key: tuple, loader: Callable[[], T]) -> T:
+        return self._memory_cache.get_or_load(key, loader) if self._memory_cache is not None else loader()
+
+    def memory_cache_stats(self) -> Optional[LruCacheStats]:
+        return self._memory_cache.stats() if self._memory_cache is not None else None
+
+    def api_stats(self) -> RateLimiterStats:
+        """Number of API requests, retries and time they were throttled by rate limiter"""
+        return self._api.stats()
 
     def championship_matches(self, championship_id) -> Iterable[Match]:
         matches_data = self._api.championship_matches(championship_id)
         return [Match.from_data(item) for item in matches_data]
 
+    def _fetch_match_data(self, match_id: str) -> dict:
+        data = self._api.match_details(match_id)
+        # details of not finished match will change, so they cached only for a while
+        ttl = None if is_match_finished(data) else self._unfinished_ttl
+        self._match_cache.put(match_id, data, ttl)
+        return data
+
     def match(self, match_id: str, force: bool = False) -> Match:
-        match_cache_path = self._cache_path / Path(match_id).with_suffix(".json")
-        if not force and match_cache_path.is_file():
-            data = read_json(match_cache_path)
-        else:
-            data = self._api.match_details(match_id)
-            write_json(match_cache_path, data)
+        data = None if force else self._match_cache.get(match_id)
+        if data is None:
+            data = self._fetch_match_data(match_id)
         return Match.from_data(data)
 
-    def download_demo(self, match: Union[Match, str], directory: Path, force: bool = False):
+    def matches(self, match_ids: Iterable[str], force: bool = False, workers: int = 1) -> List[Match]:
+        """
+        Returns matches details for many matches in order of given ids.
+        Duplicated ids requested only once, cached matches read first and the rest requested concurrently.
+
+        :param match_ids: ids of matches
+        :param force: request matches details even if they cached
+        :param workers: number of simultaneous requests
+        """
+        match_ids = list(match_ids)
+
+        matches: Dict[str, Match] = dict()
+        missed: List[str] = []
+
+        cached = dict() if force else self._match_cache.get_many(match_ids)
+
+        for match_id in dict.fromkeys(match_ids):
+            if match_id in cached:
+                matches[match_id] = Match.from_data(cached[match_id])
+            else:
+                missed.append(match_id)
+
+        log.info(f"Request {len(missed)} matches details, {len(matches)} found in cache")
+
+        if workers <= 1:
+            fetched = map(self._fetch_match_data, missed)
+            matches.update(zip(missed, map(Match.from_data, fetched)))
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="match-details") as executor:
+                fetched = executor.map(self._fetch_match_data, missed)
+                matches.update(zip(missed, map(Match.from_data, fetched)))
+
+        return [matches[it] for it in match_ids]
+
+    def download_demo(
+            self,
+            match: Union[Match, str],
+            directory: Path,
+            force: bool = False,
+            host_limiter: Optional[HostLimiter] = None
+    ):
+        """
+        :param match: match or match id to download demo for
+        :param directory: directory to store demo
+        :param force: re-download demo even if it already downloaded
+        :param host_limiter: limiter of simultaneous downloads from the same host shared by concurrent downloads
+        """
         log.info(f"Download demo for {match} into {directory}")
 
         if isinstance(match, Match):
@@ -182,54 +308,255 @@ class Faceit(object):
         else:
             raise TypeError(f"Only Match or str supported as input type for match but got {type(match)}")
 
-        url_path = Path(match.demo_url)
+        url_path = Path(demo_url)
 
         demo_path = directory / url_path.name.rstrip(".gz")
         if not force and demo_path.is_file():
             return demo_path
 
-        request = Request(demo_url, headers={'User-Agent': 'Mozilla/5.0'})
+        # compressed data downloaded so far, kept to resume download if it was interrupted
+        part_path = directory / f"{url_path.name}.part"
+        temp_path = directory / f"{demo_path.name}.tmp"
 
-        with urlopen(request) as input_file:
-            compressed = input_file.read()
+        if force:
+            part_path.unlink(missing_ok=True)
 
-            data = zlib.decompress(compressed, 15 + 32)
+        semaphore = host_limiter.get(demo_url) if host_limiter is not None else None
 
-            with open(demo_path, "wb") as output_file:
-                output_file.write(data)
+        try:
+            with semaphore if semaphore is not None else contextlib.nullcontext():
+                self._fetch_demo(demo_url, part_path, temp_path)
+        except BaseException as error:
+            temp_path.unlink(missing_ok=True)
+            # corrupted data can't be resumed, so start from scratch next time
+            if isinstance(error, zlib.error):
+                part_path.unlink(missing_ok=True)
+            raise
+
+        os.replace(temp_path, demo_path)
+        part_path.unlink()
 
         return demo_path
 
-    def download_all_demos(self, matches: Iterable[Match], directory: Path, force: bool = False) -> Dict[Match, Path]:
-        return {match: self.download_demo(match, directory, force) for match in matches}
+    @staticmethod
+    def _fetch_demo(demo_url: str, part_path: Path, temp_path: Path):
+        offset = part_path.stat().st_size if part_path.is_file() else 0
+
+        headers = {'User-Agent': 'Mozilla/5.0'}
+        if offset != 0:
+            log.info(f"Resume download of {demo_url} from {offset} bytes")
+            headers["Range"] = f"bytes={offset}-"
+
+        try:
+            input_file = urlopen(Request(demo_url, headers=headers))
+        except HTTPError as error:
+            # whole demo was downloaded but not yet unpacked
+            if error.code != 416 or offset == 0:
+                raise
+            input_file = None
+
+        decompressor = zlib.decompressobj(15 + 32)
+
+        with open(temp_path, "wb") as output_file:
+            if input_file is None or input_file.status == 206:
+                with open(part_path, "rb") as part_file:
+                    for chunk in _read_chunks(part_file):
+                        output_file.write(decompressor.decompress(chunk))
+
+            if input_file is not None:
+                with input_file, open(part_path, "ab" if input_file.status == 206 else "wb") as part_file:
+                    for chunk in _read_chunks(input_file):
+                        part_file.write(chunk)
+                        output_file.write(decompressor.decompress(chunk))
+
+            output_file.write(decompressor.flush())
+
+        if not decompressor.eof:
+            raise EOFError(f"Demo {demo_url} compressed stream ended before the end-of-stream marker was reached")
+
+    def download_demos(
+            self,
+            matches: Iterable[Match],
+            directory: Path,
+            force: bool = False,
+            workers: int = 1,
+            host_workers: Optional[int] = None
+    ) -> Iterator[Tuple[Match, Path]]:
+        """
+        Download demos of matches using pool of workers and yield (match, path) in the order of matches
+        as soon as demo is ready, so it can be processed while next demos are still downloading.
+
+        :param matches: matches to download demos for
+        :param directory: directory to store demos
+        :param force: re-download demos even if they already downloaded
+        :param workers: number of simultaneous downloads
+        :param host_workers: number of simultaneous downloads from the same host (not limited if None)
+        """
+        if workers <= 1:
+            for match in matches:
+                yield match, self.download_demo(match, directory, force)
+            return
+
+        limiter = HostLimiter(host_workers)
+        matches = iter(matches)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="demo-download") as executor:
+            def submit(match: Match) -> Tuple[Match, Future]:
+                return match, executor.submit(self.download_demo, match, directory, force, limiter)
+
+            # only a few downloads ahead of the consumer, next match is submitted when the oldest one is consumed
+            futures = deque(submit(match) for match in itertools.islice(matches, workers * _DOWNLOAD_AHEAD))
+            try:
+                while futures:
+                    match, future = futures.popleft()
+                    yield match, future.result()
+                    futures.extend(submit(match) for match in itertools.islice(matches, 1))
+            finally:
+                for _, future in futures:
+                    future.cancel()
+
+    def download_all_demos(
+            self,
+            matches: Iterable[Match],
+            directory: Path,
+            force: bool = False,
+            workers: int = 1,
+            host_workers: Optional[int] = None
+    ) -> Dict[Match, Path]:
+        return dict(self.download_demos(matches, directory, force, workers, host_workers))
 
     def player(self, nickname: str) -> Optional[Player]:
         log.info(f"Request player {nickname} details")
 
         try:
-            player_details = self._api.player_details_by_name(nickname)
+            player_details = self._cached(
+                ("player", nickname), lambda: self._api.player_details_by_name(nickname))
         except FaceitApiRequestError as error:
             log.error(f"Can't get player for nickname '{nickname}' due to {error}")
             return None
         else:
             return Player.from_details(player_details)
 
-    def matches_stats(self, player: Union[Player, str], count: Optional[int] = None) -> Iterable[Statistic]:
+    def _matches_stats_items(self, player_id: str, page_size: int = 0, window: int = 1) -> Iterator[dict]:
+        """
+        Yields raw player matches statistics items from the newest to the oldest until the first empty page
+        or page shorter than the previous ones (server may return less than page_size, so it's not compared).
+        """
+
+        def request_page(page: int) -> list:
+            log.debug(f"Requesting player {player_id} matches for page {page}")
+            return self._cached(
+                ("matches_stats", player_id, page, page_size),
+                lambda: self._api.player_matches_stats(player_id, "csgo", page, page_size))
+
+        if window <= 1:
+            pages = (request_page(page) for page in itertools.count())
+        else:
+            pages = _fetch_pages(request_page, window)
+
+        # closed explicitly when caller stops early, so requests of pages in the window are cancelled right away
+        size = 0
+        with contextlib.closing(pages):
+            for matches in pages:
+                if not matches:
+                    return
+                yield from matches
+                if len(matches) < size:
+                    return
+                size = len(matches)
+
+    def matches_stats(
+            self,
+            player: Union[Player, str],
+            count: Optional[int] = None,
+            page_size: int = 0,
+            window: int = 1
+    ) -> Iterable[Statistic]:
+        """
+        Yields player matches statistics from the newest to the oldest.
+
+        :param player: player or player id
+        :param count: maximum number of matches to yield, all if None
+        :param page_size: number of matches requested per page, if 0 then default of API used
+        :param window: number of pages requested concurrently, pages are fetched until the first empty page
+        """
         log.info(f"Request {player} statistics history")
 
         player_id = player.player_id if isinstance(player, Player) else player
 
-        index = 0
-        page = 0
-
-        while True:
-            log.debug(f"Requesting player {player} matches for page {page}")
-            matches = self._api.player_matches_stats(player_id, "csgo", page)
-            if not matches:
-                break
-            for item in matches:
-                index += 1
+        with contextlib.closing(self._matches_stats_items(player_id, page_size, window)) as items:
+            for item in itertools.islice(items, count):
                 yield Statistic.from_data(item)
-                if count is not None and index >= count:
+
+    def player_history(
+            self,
+            player: Union[Player, str],
+            count: Optional[int] = None,
+            page_size: int = 0,
+            window: int = 1
+    ) -> List[Statistic]:
+        """
+        Returns player matches statistics from the newest to the oldest using persistent history store.
+        Only matches played since the last request are fetched: pages are requested until already
+        stored match found, then new matches merged into the store.
+
+        :param player: player or player id
+        :param count: maximum number of matches to return, all if None
+        :param page_size: number of matches requested per page, if 0 then default of API used
+        :param window: number of pages requested concurrently when there is nothing stored yet
+        """
+        player_id = player.player_id if isinstance(player, Player) else player
+
+        info = self._history.info(player_id)
+        known = self._history.match_ids(player_id)
+        complete = info is not None and info.complete
+
+        def enough(stored: int) -> bool:
+            return complete or (count is not None and stored >= count)
+
+        log.info(f"Sync {player} statistics history, {len(known)} matches stored")
+
+        # stored matches are always the newest part of history at the moment of previous sync,
+        # so they are found as one contiguous run right after new matches
+        fetched = []
+        seen = 0
+        reached_end = True
+        items = self._matches_stats_items(player_id, page_size, window if not enough(len(known)) else 1)
+        with contextlib.closing(items):
+            for item in items:
+                if item["matchId"] in known:
+                    seen += 1
+                    if enough(len(known) + len(fetched)):
+                        reached_end = False
+                        break
+                else:
+                    fetched.append(item)
+                    # all stored matches already passed (or nothing stored) so no gap between them and fetched ones
+                    if seen == len(known) and count is not None and len(known) + len(fetched) >= count:
+                        reached_end = False
+                        break
+
+        log.info(f"Fetched {len(fetched)} new matches of {player}")
+
+        self._history.merge(player_id, fetched, complete or reached_end)
+
+        return [Statistic.from_data(it) for it in self._history.items(player_id, count)]
+
+
+def _fetch_pages(request_page: Callable[[int], list], window: int) -> Iterator[list]:
+    """
+    Request pages using sliding window of concurrent requests and yield them in order.
+    Next page is requested when the oldest page in the window is consumed.
+    """
+    with ThreadPoolExecutor(max_workers=window, thread_name_prefix="faceit-page") as executor:
+        futures = deque(executor.submit(request_page, page) for page in range(window))
+        try:
+            for page in itertools.count(window):
+                matches = futures.popleft().result()
+                yield matches
+                if not matches:
                     return
-            page += 1
+                futures.append(executor.submit(request_page, page))
+        finally:
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,96 @@
+import json
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union, List, Set, Iterable
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS statistics (
+    player_id TEXT NOT NULL,
+    match_id TEXT NOT NULL,
+    date INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (player_id, match_id)
+);
+CREATE TABLE IF NOT EXISTS players (
+    player_id TEXT PRIMARY KEY,
+    newest_match_id TEXT,
+    newest_date INTEGER,
+    complete INTEGER NOT NULL,
+    synced_at REAL NOT NULL
+);
+"""
+
+
+@dataclass
+class PlayerHistoryInfo:
+    player_id: str
+    newest_match_id: Optional[str]
+    newest_date: Optional[int]
+    complete: bool
+    synced_at: float
+
+
+class PlayerHistoryStore(object):
+    """
+    Persistent storage of players matches statistics (raw API items) in SQLite database.
+    Each call opens own connection, so store can be shared between threads.
+    """
+
+    def __init__(self, path: Union[Path, str], timeout: float = 30.0):
+        self._path = str(path)
+        self._timeout = timeout
+        with closing(self._connect()) as connection, connection:
+            connection.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._path, timeout=self._timeout)
+
+    def info(self, player_id: str) -> Optional[PlayerHistoryInfo]:
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT player_id, newest_match_id, newest_date, complete, synced_at FROM players WHERE player_id = ?",
+                (player_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return PlayerHistoryInfo(row[0], row[1], row[2], bool(row[3]), row[4])
+
+    def match_ids(self, player_id: str) -> Set[str]:
+        with closing(self._connect()) as connection:
+            rows = connection.execute("SELECT match_id FROM statistics WHERE player_id = ?", (player_id,))
+            return {it[0] for it in rows}
+
+    def items(self, player_id: str, count: Optional[int] = None) -> List[dict]:
+        """Returns stored statistics items of player from the newest to the oldest"""
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT data FROM statistics WHERE player_id = ? ORDER BY date DESC, match_id DESC LIMIT ?",
+                (player_id, -1 if count is None else count)
+            )
+            return [json.loads(it[0]) for it in rows]
+
+    def merge(self, player_id: str, items: Iterable[dict], complete: bool):
+        """
+        Insert new or replace existing statistics items of player.
+
+        :param player_id: player id
+        :param items: raw statistics items from API
+        :param complete: whether all history of player stored
+        """
+        rows = [(player_id, it["matchId"], int(it["date"]), json.dumps(it)) for it in items]
+        with closing(self._connect()) as connection, connection:
+            connection.executemany("INSERT OR REPLACE INTO statistics VALUES (?, ?, ?, ?)", rows)
+            newest = connection.execute(
+                "SELECT match_id, date FROM statistics WHERE player_id = ? ORDER BY date DESC, match_id DESC LIMIT 1",
+                (player_id,)
+            ).fetchone() or (None, None)
+            # history once fully stored stays complete when new matches merged
+            connection.execute(
+                "INSERT INTO players VALUES (?, ?, ?, ?, ?) ON CONFLICT(player_id) DO UPDATE SET "
+                "newest_match_id = excluded.newest_match_id, newest_date = excluded.newest_date, "
+                "complete = max(complete, excluded.complete), synced_at = excluded.synced_at",
+                (player_id, newest[0], newest[1], int(complete), time.time())
+            )
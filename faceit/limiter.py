@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Optional
+
+
+@dataclass
+class RateLimiterStats:
+    requests: int = 0
+    throttled: int = 0
+    throttled_time: float = 0.0
+    retries: int = 0
+    backoff_time: float = 0.0
+
+
+class RateLimiter(object):
+    """
+    Token bucket requests rate limiter that can be shared between threads and asyncio tasks.
+
+    Each request takes a token from the bucket refilled with given rate, when bucket is empty
+    request waits for the next token. Tokens are reserved in order of arrival, so waiting requests
+    are served fairly. Server may also ask to stop requesting for a while using pause().
+
+    :param rate: requests per second, if None rate is not limited (only pauses applied)
+    :param burst: maximum number of requests that can be made at once after idle
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: int = 1):
+        self._rate = rate
+        self._burst = burst
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._stats = RateLimiterStats()
+
+    def _reserve(self, delay: float) -> float:
+        """Take token and returns time to wait before request can be made (at least delay)"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._paused_until - now)
+            if self._rate is not None:
+                self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                self._tokens -= 1
+                if self._tokens < 0:
+                    wait = max(wait, -self._tokens / self._rate)
+            self._stats.requests += 1
+            if wait > delay:
+                self._stats.throttled += 1
+                self._stats.throttled_time += wait - max(0.0, delay)
+            return max(wait, delay)
+
+    def acquire(self, delay: float = 0.0):
+        """
+        Blocks current thread until request can be made.
+
+        :param delay: minimum time to wait, i.e. backoff before retry
+        """
+        wait = self._reserve(delay)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, delay: float = 0.0):
+        """The same as acquire() but waits without blocking event loop"""
+        wait = self._reserve(delay)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Stop all requests for the given time, i.e. when server responded with Retry-After"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def retried(self, delay: float):
+        with self._lock:
+            self._stats.retries += 1
+            self._stats.backoff_time += delay
+
+    def stats(self) -> RateLimiterStats:
+        with self._lock:
+            return replace(self._stats)
@@ -0,0 +1,69 @@
+"""
+Statistics of many matches combined by folding Statistics.concat() match by match and by
+one Statistics.concat_all() on synthetic matches, run as:
+
+    python tests/bench_concat.py [--matches N] [--rows N]
+"""
+import argparse
+import functools
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+ROOT_PATH = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_PATH))
+
+from demo.base import Statistics  # noqa: E402
+
+
+def _table(rng: np.random.Generator, rows: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "roundNum": rng.integers(1, 31, rows),
+        "tick": rng.integers(0, 200000, rows),
+        "attackerName": rng.choice([f"player{it}" for it in range(10)], rows),
+        "hpDamageTaken": rng.integers(0, 100, rows),
+        "weapon": rng.choice(["AK-47", "M4A1", "AWP", "Glock-18"], rows),
+    })
+
+
+def _statistics(rng: np.random.Generator, rows: int) -> Statistics:
+    return Statistics(
+        rounds=_table(rng, 30),
+        damages=_table(rng, rows),
+        kills=_table(rng, rows // 4),
+        flashes=_table(rng, rows // 8),
+        weapons_fires=_table(rng, rows * 4),
+        grenades=_table(rng, rows // 8),
+    )
+
+
+def main(argv: List[str]):
+    parser = argparse.ArgumentParser(prog="bench_concat", description="Fold concat vs concat_all benchmark")
+    parser.add_argument('--matches', type=int, nargs='+', default=[10, 50, 200], help="Numbers of matches")
+    parser.add_argument('--rows', type=int, default=2000, help="Number of damages per match")
+    args = parser.parse_args(argv[1:])
+
+    rng = np.random.default_rng(0)
+
+    print(f"{'matches':>8} {'fold, s':>10} {'once, s':>10} {'speedup':>10}")
+    for count in args.matches:
+        statistics = [_statistics(rng, args.rows) for _ in range(count)]
+
+        start = time.perf_counter()
+        folded = functools.reduce(Statistics.concat, statistics)
+        fold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        concatenated = Statistics.concat_all(statistics)
+        once = time.perf_counter() - start
+
+        pd.testing.assert_frame_equal(folded.weapons_fires, concatenated.weapons_fires)
+        print(f"{count:>8} {fold:>10.3f} {once:>10.3f} {fold / once:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,44 @@
+"""
+Cold vs warm Demo.load() timing on real demos, run as:
+
+    python tests/bench_demo_load.py [--parse_rate N] [--repeat N] path/to/match.dem ...
+
+Cold load parses demo with awpy (parser json is not reused) and stores tables cache,
+warm load reads the cache. Parsed tables cache of the demos is replaced by the benchmark.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+ROOT_PATH = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_PATH))
+
+from demo.base import Demo  # noqa: E402
+
+
+def _timed_load(dem_path: Path, force: bool, parse_rate: Optional[int]) -> float:
+    start = time.perf_counter()
+    Demo.load(dem_path, force, parse_rate)
+    return time.perf_counter() - start
+
+
+def main(argv: List[str]):
+    parser = argparse.ArgumentParser(prog="bench_demo_load", description="Cold vs warm demo load benchmark")
+    parser.add_argument('--parse_rate', type=int, default=None, help="Frames parse rate, frames not parsed if None")
+    parser.add_argument('--repeat', type=int, default=3, help="Number of warm loads, the best one is reported")
+    parser.add_argument('demos', type=str, nargs='+', help="Paths to .dem files")
+    args = parser.parse_args(argv[1:])
+
+    print(f"{'demo':<40} {'cold, s':>10} {'warm, s':>10} {'speedup':>10}")
+    for dem_path in map(Path, args.demos):
+        # json of parser is removed, so cold load is a real parse
+        Path(dem_path.parent, dem_path.stem).with_suffix(".json").unlink(missing_ok=True)
+        cold = _timed_load(dem_path, True, args.parse_rate)
+        warm = min(_timed_load(dem_path, False, args.parse_rate) for _ in range(args.repeat))
+        print(f"{dem_path.name:<40} {cold:>10.2f} {warm:>10.2f} {cold / warm:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
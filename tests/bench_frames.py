@@ -0,0 +1,72 @@
+"""
+Load time of players frames stored as json per round in zip (Frames.dump) and as memory-mapped
+Arrow file (Frames.dump_arrow) on synthetic frames, run as:
+
+    python tests/bench_frames.py [--rounds N] [--rows N]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Callable
+
+import numpy as np
+import pandas as pd
+
+ROOT_PATH = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_PATH))
+
+from demo.base import Frames, convert_frames  # noqa: E402
+
+
+def _frames(rounds: int, rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    size = rounds * rows
+    return pd.DataFrame({
+        "name": rng.choice([f"player{it}" for it in range(10)], size),
+        "roundNum": np.repeat(np.arange(1, rounds + 1), rows),
+        "tick": np.arange(size),
+        "x": rng.uniform(-3000, 3000, size),
+        "y": rng.uniform(-3000, 3000, size),
+        "z": rng.uniform(-500, 500, size),
+        "viewX": rng.uniform(0, 360, size),
+        "viewY": rng.uniform(-90, 90, size),
+        "isAlive": rng.random(size) > 0.2,
+    })
+
+
+def _timed(name: str, load: Callable[[], Frames], rounds: List[int]) -> float:
+    start = time.perf_counter()
+    frames = load()
+    for num in rounds:
+        _ = frames[num]
+    elapsed = time.perf_counter() - start
+    print(f"{name:<40} {elapsed:>10.3f}")
+    return elapsed
+
+
+def main(argv: List[str]):
+    parser = argparse.ArgumentParser(prog="bench_frames", description="Zip vs arrow frames load benchmark")
+    parser.add_argument('--rounds', type=int, default=30, help="Number of rounds")
+    parser.add_argument('--rows', type=int, default=2000, help="Number of frames per round")
+    args = parser.parse_args(argv[1:])
+
+    with tempfile.TemporaryDirectory() as directory:
+        zip_path = Path(directory, "frames.zip")
+        Frames.from_demo(SimpleNamespace(frames=_frames(args.rounds, args.rows))).dump(zip_path)
+        arrow_path = convert_frames(zip_path)
+
+        everything = list(range(1, args.rounds + 1))
+        half = everything[::2]
+
+        print(f"{'load':<40} {'time, s':>10}")
+        _timed("zip, all rounds", lambda: Frames.from_zip(zip_path), everything)
+        _timed("arrow, all rounds", lambda: Frames.from_arrow(arrow_path), everything)
+        _timed("zip, every other round", lambda: Frames.from_zip(zip_path, half), half)
+        _timed("arrow, every other round", lambda: Frames.from_arrow(arrow_path, half), half)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,28 @@
+import threading
+from http.server import BaseHTTPRequestHandler
+from typing import Type, List, Callable
+
+import pytest
+
+from http_stub import StubServer
+
+
+@pytest.fixture
+def stub_server() -> Callable[..., StubServer]:
+    """
+    Starts stub servers as stub_server(handler, **attributes), servers are stopped at the end of the test
+    """
+    servers: List[StubServer] = []
+
+    def start(handler: Type[BaseHTTPRequestHandler], **attributes) -> StubServer:
+        server = StubServer(handler)
+        vars(server).update(attributes)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
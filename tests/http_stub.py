@@ -0,0 +1,19 @@
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Type
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Local HTTP server on a free port handling requests in background threads.
+    Handlers find scripted responses and record requests in attributes given to stub_server().
+    """
+    daemon_threads = True
+
+    def __init__(self, handler: Type[BaseHTTPRequestHandler]):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
@@ -0,0 +1,97 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from demo.aim import angle_diff, calc_view_speed, join_ticks, find_aim_snaps, aim_report, aim_reports
+
+
+def _frames(name: str, ticks, view_x, view_y=None, round_num: int = 1) -> pd.DataFrame:
+    return pd.DataFrame({
+        "name": name,
+        "roundNum": round_num,
+        "tick": ticks,
+        "viewX": view_x,
+        "viewY": view_y if view_y is not None else [0.0] * len(ticks),
+        "isAlive": True,
+        "activeWeapon": "AK-47",
+    })
+
+
+def test_angle_diff_wraps_around():
+    a = np.array([350.0, 10.0, 0.0, 90.0, 179.0])
+    b = np.array([10.0, 350.0, 180.0, 90.0, -179.0])
+
+    assert angle_diff(a, b).tolist() == [20.0, -20.0, -180.0, 0.0, 2.0]
+
+
+def test_calc_view_speed():
+    frames = pd.concat([
+        # crosses 0/360 degrees: 20 degrees in 8 ticks of 128 tick server
+        _frames("alice", [8, 0], [5.0, 345.0]),
+        _frames("bob", [0, 16], [0.0, 0.0], [0.0, 30.0]),
+        # new round starts from scratch
+        _frames("bob", [0], [90.0], round_num=2),
+    ], ignore_index=True)
+
+    df = calc_view_speed(frames, tick_rate=128)
+
+    assert df["name"].tolist() == ["alice", "alice", "bob", "bob", "bob"]
+    assert df["tick"].tolist() == [0, 8, 0, 16, 0]
+    assert np.isnan(df["dView"][0]) and np.isnan(df["dView"][2]) and np.isnan(df["dView"][4])
+    assert df["dViewX"][1] == pytest.approx(20.0 * 16)
+    assert df["dViewY"][3] == pytest.approx(30.0 * 8)
+    assert df["dView"][3] == pytest.approx(30.0 * 8)
+
+
+def test_join_ticks_boundaries():
+    frame_ticks = np.array([10, 20, 30, 40])
+    event_ticks = np.array([5, 22, 25, 45, 100])
+
+    frame_index, event_index = join_ticks(frame_ticks, event_ticks, 5)
+
+    pairs = sorted(zip(event_index.tolist(), frame_index.tolist()))
+    # ticks exactly at distance of window are joined, farther ones are not
+    assert pairs == [(0, 0), (1, 1), (2, 1), (2, 2), (3, 3)]
+
+
+def test_join_ticks_empty():
+    frame_index, event_index = join_ticks(np.array([10, 20]), np.array([], dtype=int), 5)
+
+    assert len(frame_index) == 0 and len(event_index) == 0
+
+
+def test_find_aim_snaps():
+    frames = pd.concat([
+        # 45 degrees in one tick right before hit at tick 103
+        _frames("alice", [100, 101, 102], [0.0, 45.0, 45.0]),
+        # slow turn
+        _frames("bob", [100, 101, 102], [0.0, 1.0, 2.0]),
+    ], ignore_index=True)
+    damages = pd.DataFrame({
+        "attackerName": ["alice", "alice", "bob", "alice"],
+        "tick": [103, 200, 103, 104],
+        "hpDamageTaken": [27, 30, 100, 0],
+    })
+
+    hits = find_aim_snaps(frames, damages, threshold=2000.0, window=2, tick_rate=128)
+
+    assert hits["attackerName"].tolist() == ["alice", "alice", "bob"]
+    assert hits["snap"].tolist() == [True, False, False]
+    assert hits["snap_speed"][0] == pytest.approx(45.0 * 128)
+
+    report = aim_report(frames, damages, threshold=2000.0, window=2, tick_rate=128)
+
+    assert report["Player"].tolist() == ["alice", "bob"]
+    assert report["hits"].tolist() == [2, 1]
+    assert report["snaps"].tolist() == [1, 0]
+
+
+def test_aim_reports_skips_failed_demos(tmp_path: Path):
+    missing = [tmp_path / "missing-1.dem", tmp_path / "missing-2.dem"]
+
+    report = aim_reports(missing, workers=2)
+
+    assert report.empty
+    assert report.columns[0] == "demo"
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from faceit.api import FaceitApi, AsyncFaceitApi, FaceitApiRequestError
+from faceit.limiter import RateLimiter
+from http_stub import StubServer
+
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    """
+    Returns requested path as payload. Responses for some paths are scripted by server.failures:
+    path -> list of (status, headers) responded before success, failure with status 200 is truncated json.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests.append(self.path)
+            self.server.connections.add(self.client_address)
+            failures = self.server.failures.get(self.path, [])
+            failed = bool(failures)
+            status, headers = failures.pop(0) if failed else (200, dict())
+
+        if status == 200:
+            body = json.dumps({"payload": {"path": self.path}}).encode("utf-8")
+            if failed:
+                body = body[:len(body) // 2]
+        else:
+            body = json.dumps({"errors": [status]}).encode("utf-8")
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(stub_server) -> StubServer:
+    return stub_server(_ApiHandler, requests=[], connections=set(), failures=dict())
+
+
+def test_endpoints(server: StubServer):
+    with FaceitApi(base_url=server.url) as api:
+        assert api.match_details("1-abc") == {"path": "/match/v2/match/1-abc"}
+        assert api.player_details_by_name("s1mple") == {"path": "/users/v1/nicknames/s1mple"}
+        assert api.player_matches_stats("id", "csgo", 2, 50) == \
+               {"path": "/stats/v1/stats/time/users/id/games/csgo?page=2&size=50"}
+
+
+def test_connection_kept_alive(server: StubServer):
+    with FaceitApi(base_url=server.url) as api:
+        for index in range(10):
+            api.match_details(str(index))
+
+    assert len(server.requests) == 10
+    assert len(server.connections) == 1
+
+
+def test_threads_share_connections(server: StubServer):
+    match_ids = [str(index) for index in range(64)]
+
+    with FaceitApi(base_url=server.url) as api, ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(api.match_details, match_ids))
+
+    assert results == [{"path": f"/match/v2/match/{it}"} for it in match_ids]
+    assert len(server.connections) <= 8
+
+
+def test_short_lived_pools_reuse_connections(server: StubServer):
+    with FaceitApi(base_url=server.url, pool_size=8) as api:
+        # like Faceit.matches() and matches_stats(window) each call starts its own thread pool
+        for pool in range(20):
+            match_ids = [f"{pool}-{index}" for index in range(16)]
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(api.match_details, match_ids))
+
+    assert len(server.requests) == 20 * 16
+    assert len(server.connections) <= 8
+
+
+def test_retry_after_too_many_requests(server: StubServer):
+    server.failures["/match/v2/match/1"] = [(429, {"Retry-After": "0.2"}), (503, dict())]
+
+    with FaceitApi(base_url=server.url, delay=0.01) as api:
+        start = time.monotonic()
+        assert api.match_details("1") == {"path": "/match/v2/match/1"}
+        elapsed = time.monotonic() - start
+        stats = api.stats()
+
+    assert server.requests == ["/match/v2/match/1"] * 3
+    assert elapsed >= 0.2
+    assert stats.retries == 2
+
+
+def test_retry_truncated_response(server: StubServer):
+    server.failures["/match/v2/match/1"] = [(200, dict())] * 2
+
+    with FaceitApi(base_url=server.url, delay=0.01) as api:
+        assert api.match_details("1") == {"path": "/match/v2/match/1"}
+        stats = api.stats()
+
+    assert server.requests == ["/match/v2/match/1"] * 3
+    assert stats.retries == 2
+
+
+def test_truncated_response_retries_exhausted(server: StubServer):
+    server.failures["/match/v2/match/1"] = [(200, dict())] * 2
+
+    with FaceitApi(base_url=server.url, retries=2, delay=0.01) as api:
+        with pytest.raises(FaceitApiRequestError) as error:
+            api.match_details("1")
+
+    assert isinstance(error.value.error, ValueError)
+
+
+def test_not_retryable_error(server: StubServer):
+    server.failures["/match/v2/match/1"] = [(404, dict())]
+
+    with FaceitApi(base_url=server.url, delay=0.01) as api:
+        with pytest.raises(FaceitApiRequestError):
+            api.match_details("1")
+
+    assert len(server.requests) == 1
+
+
+def test_retries_exhausted(server: StubServer):
+    server.failures["/match/v2/match/1"] = [(500, dict())] * 3
+
+    with FaceitApi(base_url=server.url, retries=3, delay=0.01) as api:
+        with pytest.raises(FaceitApiRequestError):
+            api.match_details("1")
+
+    assert len(server.requests) == 3
+
+
+def test_rate_limit_shared(server: StubServer):
+    limiter = RateLimiter(rate=50.0)
+
+    first = FaceitApi(base_url=server.url, limiter=limiter)
+    second = FaceitApi(base_url=server.url, limiter=limiter)
+    with first, second:
+        start = time.monotonic()
+        for index in range(10):
+            (first if index % 2 else second).match_details(str(index))
+        elapsed = time.monotonic() - start
+
+    # the first request is served from the initial token, the rest are spaced by 1 / rate
+    assert elapsed >= 9 / 50.0 * 0.9
+    assert limiter.stats().throttled > 0
+
+
+def test_async_endpoints(server: StubServer):
+    match_ids = [str(index) for index in range(100)]
+
+    async def fetch():
+        async with AsyncFaceitApi(base_url=server.url, pool_size=4) as api:
+            return await asyncio.gather(*(api.match_details(it) for it in match_ids))
+
+    results = asyncio.run(fetch())
+
+    assert results == [{"path": f"/match/v2/match/{it}"} for it in match_ids]
+    assert len(server.connections) <= 4
+
+
+def test_async_retry_and_error(server: StubServer):
+    server.failures["/match/v2/match/1"] = [(429, {"Retry-After": "0.1"})]
+    server.failures["/match/v2/match/2"] = [(404, dict())]
+
+    async def fetch():
+        async with AsyncFaceitApi(base_url=server.url, delay=0.01) as api:
+            first = await api.match_details("1")
+            with pytest.raises(FaceitApiRequestError):
+                await api.match_details("2")
+            return first, api.stats()
+
+    result, stats = asyncio.run(fetch())
+
+    assert result == {"path": "/match/v2/match/1"}
+    assert stats.retries == 1
+
+
+def test_async_retry_truncated_response(server: StubServer):
+    server.failures["/match/v2/match/1"] = [(200, dict())]
+
+    async def fetch():
+        async with AsyncFaceitApi(base_url=server.url, delay=0.01) as api:
+            return await api.match_details("1"), api.stats()
+
+    result, stats = asyncio.run(fetch())
+
+    assert result == {"path": "/match/v2/match/1"}
+    assert server.requests == ["/match/v2/match/1"] * 2
+    assert stats.retries == 1
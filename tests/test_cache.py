@@ -0,0 +1,135 @@
+import json
+import runpy
+import zlib
+from pathlib import Path
+
+import pytest
+
+import faceit.cache
+from faceit.cache import DirectoryMatchCache, SqliteMatchCache, migrate_match_cache, UNFINISHED_MATCH_TTL
+
+_MIGRATE_SCRIPT = Path(__file__).parent.parent / "faceit-cache-migrate.py"
+
+_FINISHED = {"status": "FINISHED", "results": {"winner": "faction1"}}
+_ONGOING = {"status": "ONGOING"}
+
+
+class _Clock(object):
+    """Stands for time module in faceit.cache"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> _Clock:
+    clock = _Clock()
+    monkeypatch.setattr(faceit.cache, "time", clock)
+    return clock
+
+
+def _match(index: int) -> dict:
+    # the same size of compressed entries, so eviction depends only on access time
+    return {"status": "FINISHED", "match_id": f"match-{index}"}
+
+
+def _size(data: dict) -> int:
+    return len(zlib.compress(json.dumps(data).encode("utf-8")))
+
+
+def test_get_put(tmp_path: Path):
+    cache = SqliteMatchCache(tmp_path / "matches.sqlite")
+    cache.put_many([("a", _FINISHED), ("b", _ONGOING)])
+
+    assert cache.get("a") == _FINISHED
+    assert cache.get("c") is None
+    assert cache.get_many(["a", "b", "c", "a"]) == {"a": _FINISHED, "b": _ONGOING}
+    assert dict(cache.items()) == {"a": _FINISHED, "b": _ONGOING}
+
+
+def test_ttl_expires_unfinished(tmp_path: Path, clock: _Clock):
+    cache = SqliteMatchCache(tmp_path / "matches.sqlite")
+    cache.put("finished", _FINISHED)
+    cache.put("ongoing", _ONGOING, ttl=UNFINISHED_MATCH_TTL)
+
+    clock.now += UNFINISHED_MATCH_TTL - 1
+    assert cache.get_many(["finished", "ongoing"]) == {"finished": _FINISHED, "ongoing": _ONGOING}
+
+    clock.now += 1
+    assert cache.get("ongoing") is None
+    assert cache.get("finished") == _FINISHED
+    assert dict(cache.items()) == {"finished": _FINISHED}
+
+
+def test_put_again_renews_ttl(tmp_path: Path, clock: _Clock):
+    cache = SqliteMatchCache(tmp_path / "matches.sqlite")
+    cache.put("ongoing", _ONGOING, ttl=UNFINISHED_MATCH_TTL)
+
+    clock.now += UNFINISHED_MATCH_TTL - 1
+    cache.put("ongoing", _FINISHED)
+    clock.now += UNFINISHED_MATCH_TTL
+
+    assert cache.get("ongoing") == _FINISHED
+
+
+def test_evicts_least_recently_accessed(tmp_path: Path, clock: _Clock):
+    size = _size(_match(0))
+    cache = SqliteMatchCache(tmp_path / "matches.sqlite", max_size=3 * size)
+    for index in range(3):
+        clock.now += 1
+        cache.put(f"match-{index}", _match(index))
+
+    # read of the oldest entry makes match-1 the least recently used
+    clock.now += 1
+    assert cache.get("match-0") is not None
+
+    clock.now += 1
+    cache.put("match-3", _match(3))
+
+    assert set(dict(cache.items())) == {"match-0", "match-2", "match-3"}
+
+    clock.now += 1
+    cache.put_many([("match-4", _match(4)), ("match-5", _match(5))])
+
+    assert set(dict(cache.items())) == {"match-3", "match-4", "match-5"}
+
+
+def _write_directory_cache(path: Path):
+    source = DirectoryMatchCache(path)
+    source.put("finished", _FINISHED)
+    source.put("ongoing", _ONGOING)
+    (path / "corrupted.json").write_text("{\"status\": ")
+
+
+def test_migrate(tmp_path: Path, clock: _Clock):
+    _write_directory_cache(tmp_path)
+    target = SqliteMatchCache(tmp_path / "matches.sqlite")
+
+    migrated = migrate_match_cache(DirectoryMatchCache(tmp_path), target, batch_size=1)
+
+    assert sorted(migrated) == ["finished", "ongoing"]
+    assert dict(target.items()) == {"finished": _FINISHED, "ongoing": _ONGOING}
+
+    # not finished match is migrated with TTL
+    clock.now += UNFINISHED_MATCH_TTL
+    assert dict(target.items()) == {"finished": _FINISHED}
+
+
+@pytest.mark.parametrize("delete", [False, True])
+def test_migrate_script(tmp_path: Path, delete: bool):
+    _write_directory_cache(tmp_path)
+    main = runpy.run_path(str(_MIGRATE_SCRIPT))["main"]
+
+    main(["faceit-cache-migrate", "--source", str(tmp_path)] + (["--delete"] if delete else []))
+
+    target = SqliteMatchCache(tmp_path / "matches.sqlite")
+    assert dict(target.items()) == {"finished": _FINISHED, "ongoing": _ONGOING}
+    json_files = sorted(it.name for it in tmp_path.glob("*.json"))
+    # corrupted file was not migrated, so it is never deleted
+    if delete:
+        assert json_files == ["corrupted.json"]
+    else:
+        assert json_files == ["corrupted.json", "finished.json", "ongoing.json"]
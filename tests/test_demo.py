@@ -0,0 +1,177 @@
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import demo.base
+from demo.base import Demo
+from demo.functions import check_filters, filter_df
+
+_ROUNDS = 3
+_FRAMES_PER_ROUND = 4
+
+
+def _events(rows: int = 6) -> pd.DataFrame:
+    return pd.DataFrame({
+        "roundNum": np.arange(rows) % _ROUNDS + 1,
+        "tick": np.arange(rows) * 100,
+        "attackerName": [f"player{it % 2}" for it in range(rows)],
+        "hpDamageTaken": np.linspace(0.1, 100.3, rows),
+    })
+
+
+def _frames() -> pd.DataFrame:
+    rows = _ROUNDS * _FRAMES_PER_ROUND
+    return pd.DataFrame({
+        "roundNum": np.repeat(np.arange(1, _ROUNDS + 1), _FRAMES_PER_ROUND),
+        "tick": np.arange(rows) * 10,
+        "name": [f"player{it % 2}" for it in range(rows)],
+        "viewX": np.linspace(0.0, 359.9, rows),
+        "isAlive": True,
+    })
+
+
+class _FakeParser(object):
+    """Stands for awpy DemoParser, records options of each parse"""
+    parsed: List[dict] = []
+
+    def __init__(self, demofile: str, log: bool, outpath: str, json_indentation: bool, **options):
+        self.options = options
+
+    def parse(self, return_type: str) -> dict:
+        assert return_type == "df"
+        _FakeParser.parsed.append(self.options)
+        tables = {
+            "rounds": pd.DataFrame({"roundNum": np.arange(1, _ROUNDS + 1), "winningTeam": "Alpha"}),
+            "damages": _events(),
+            "kills": _events(),
+            "flashes": _events(),
+            "weaponFires": _events(),
+            "grenades": _events(),
+        }
+        if self.options["parse_frames"]:
+            tables["playerFrames"] = _frames()
+        return tables
+
+
+@pytest.fixture
+def parsed(monkeypatch) -> List[dict]:
+    monkeypatch.setattr(demo.base, "DemoParser", _FakeParser)
+    _FakeParser.parsed = []
+    return _FakeParser.parsed
+
+
+@pytest.fixture
+def dem_path(tmp_path: Path) -> Path:
+    path = tmp_path / "match.dem"
+    path.write_bytes(b"demo")
+    return path
+
+
+def test_cache_hit_skips_parser(parsed: List[dict], dem_path: Path):
+    cold = Demo.load(dem_path)
+    warm = Demo.load(dem_path)
+
+    assert len(parsed) == 1
+    pd.testing.assert_frame_equal(cold.damages, warm.damages)
+    pd.testing.assert_frame_equal(cold.rounds, warm.rounds)
+    assert warm.frames is None
+
+
+def test_force_parses_again(parsed: List[dict], dem_path: Path):
+    Demo.load(dem_path)
+    Demo.load(dem_path, force=True)
+
+    assert len(parsed) == 2
+
+
+def test_cache_invalidated_by_options(parsed: List[dict], dem_path: Path):
+    Demo.load(dem_path)
+    with_frames = Demo.load(dem_path, parse_rate=32)
+    Demo.load(dem_path, parse_rate=32)
+
+    assert [it["parse_rate"] for it in parsed] == [128, 32]
+    assert [it["parse_frames"] for it in parsed] == [False, True]
+    assert len(with_frames.frames) == _ROUNDS * _FRAMES_PER_ROUND
+
+
+def test_cache_invalidated_by_version(parsed: List[dict], dem_path: Path, monkeypatch):
+    Demo.load(dem_path)
+    monkeypatch.setattr(demo.base, "DEMO_CACHE_VERSION", demo.base.DEMO_CACHE_VERSION + 1)
+    Demo.load(dem_path)
+    Demo.load(dem_path)
+
+    assert len(parsed) == 2
+
+
+def test_cache_invalidated_by_demo_change(parsed: List[dict], dem_path: Path):
+    Demo.load(dem_path)
+    dem_path.write_bytes(b"other demo")
+    Demo.load(dem_path)
+
+    assert len(parsed) == 2
+
+
+@pytest.fixture(params=["parsed", "cached"])
+def load(request, parsed: List[dict], dem_path: Path):
+    """Loads demo with frames just parsed or from cache"""
+    if request.param == "cached":
+        Demo.load(dem_path, parse_rate=32)
+
+    def load(**kwargs) -> Demo:
+        return Demo.load(dem_path, parse_rate=32, **kwargs)
+
+    return load
+
+
+def test_frames_columns(load):
+    frames = load(frames_columns=["tick", "viewX"]).frames
+
+    assert list(frames.columns) == ["tick", "viewX"]
+    assert len(frames) == _ROUNDS * _FRAMES_PER_ROUND
+
+
+def test_frames_rounds_range(load):
+    frames = load(rounds=(2, 3)).frames
+
+    expected = _frames()
+    expected = expected.loc[expected["roundNum"] >= 2]
+    assert frames["tick"].tolist() == expected["tick"].tolist()
+    assert frames.index.tolist() == list(range(len(expected)))
+
+
+def test_frames_ticks_range(load):
+    frames = load(ticks=(20, 50), frames_columns=["roundNum", "tick"]).frames
+
+    assert frames["tick"].tolist() == [20, 30, 40, 50]
+    assert frames["roundNum"].tolist() == [1, 1, 2, 2]
+
+
+def test_compact_downcasts_only_frames_floats(load):
+    loaded = load()
+
+    assert loaded.damages["hpDamageTaken"].dtype == np.float64
+    assert loaded.damages["tick"].dtype == np.int32
+    assert loaded.damages["attackerName"].dtype == object
+    assert loaded.frames["viewX"].dtype == np.float32
+    assert loaded.frames["tick"].dtype == np.int32
+    assert isinstance(loaded.frames["name"].dtype, pd.CategoricalDtype)
+
+
+def test_not_compact(load):
+    loaded = load(compact=False)
+
+    assert loaded.frames["viewX"].dtype == np.float64
+    assert loaded.frames["name"].dtype == object
+
+
+def test_filter_categorical_frames(load):
+    frames = load().frames
+
+    filtered = filter_df(frames, {"name": ["player0"]})
+
+    assert filtered["name"].tolist() == ["player0"] * (len(frames) // 2)
+    with pytest.raises(ValueError):
+        check_filters(frames, {"name": [1]})
@@ -0,0 +1,159 @@
+import gzip
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Dict, Optional
+
+import pytest
+
+from faceit.faceit import Faceit, Match
+from http_stub import StubServer
+
+_DEMOS = {f"match-{index}.dem": bytes(range(256)) * (1024 * (index + 1)) for index in range(4)}
+
+
+class _DemoHandler(BaseHTTPRequestHandler):
+    """Serves gzipped demos, optionally supporting Range requests"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get("Range")))
+        data = self.server.files.get(self.path.lstrip("/"))
+        if data is None:
+            self._send(404, b"")
+            return
+
+        range_header = self.headers.get("Range")
+        if range_header is None or not self.server.ranges:
+            self._send(200, data)
+            return
+
+        start = int(range_header[len("bytes="):].rstrip("-"))
+        if start >= len(data):
+            self._send(416, b"", {"Content-Range": f"bytes */{len(data)}"})
+        else:
+            self._send(206, data[start:], {"Content-Range": f"bytes {start}-{len(data) - 1}/{len(data)}"})
+
+    def _send(self, code: int, body: bytes, headers: Optional[Dict[str, str]] = None):
+        self.send_response(code)
+        for name, value in (headers or dict()).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_server(stub_server, ranges: bool) -> StubServer:
+    files = {f"{name}.gz": gzip.compress(data) for name, data in _DEMOS.items()}
+    return stub_server(_DemoHandler, ranges=ranges, files=files, requests=[])
+
+
+@pytest.fixture
+def server(stub_server) -> StubServer:
+    return _start_server(stub_server, ranges=True)
+
+
+@pytest.fixture
+def no_range_server(stub_server) -> StubServer:
+    return _start_server(stub_server, ranges=False)
+
+
+@pytest.fixture
+def faceit(tmp_path: Path, monkeypatch) -> Faceit:
+    # faceit cache directory is created in current directory
+    monkeypatch.chdir(tmp_path)
+    return Faceit()
+
+
+def _match(server: StubServer, name: str) -> Match:
+    return Match(
+        teams=[], map="de_mirage", demo_url=f"{server.url}/{name}.gz", match_id=name, winner=None, date=None,
+        calculate_elo=True, is_played=True)
+
+
+def _write_part(directory: Path, server: StubServer, name: str, size: int):
+    data = server.files[f"{name}.gz"]
+    (directory / f"{name}.gz.part").write_bytes(data[:size])
+
+
+@pytest.mark.parametrize("workers,host_workers", [(1, None), (3, None), (3, 1)])
+def test_download_demos(faceit: Faceit, server: StubServer, tmp_path: Path, workers: int, host_workers: int):
+    matches = [_match(server, name) for name in _DEMOS]
+
+    demos = list(faceit.download_demos(matches, tmp_path, workers=workers, host_workers=host_workers))
+
+    assert [match for match, _ in demos] == matches
+    for match, demo_path in demos:
+        assert demo_path == tmp_path / match.match_id
+        assert demo_path.read_bytes() == _DEMOS[match.match_id]
+    assert not list(tmp_path.glob("*.part")) and not list(tmp_path.glob("*.tmp"))
+
+
+def test_download_demos_bounds_submitted(faceit: Faceit, server: StubServer, tmp_path: Path, monkeypatch):
+    monkeypatch.setattr("faceit.faceit._DOWNLOAD_AHEAD", 1)
+    pulled = []
+
+    def matches():
+        for name in _DEMOS:
+            pulled.append(name)
+            yield _match(server, name)
+
+    demos = faceit.download_demos(matches(), tmp_path, workers=2)
+
+    # two downloads are submitted at first and one more each time the oldest demo is consumed
+    match, _ = next(demos)
+    assert match.match_id == "match-0.dem"
+    assert pulled == ["match-0.dem", "match-1.dem"]
+
+    match, _ = next(demos)
+    assert match.match_id == "match-1.dem"
+    assert pulled == ["match-0.dem", "match-1.dem", "match-2.dem"]
+
+    assert [match.match_id for match, _ in demos] == ["match-2.dem", "match-3.dem"]
+    assert pulled == list(_DEMOS)
+
+
+def test_download_all_demos_skips_downloaded(faceit: Faceit, server: StubServer, tmp_path: Path):
+    matches = [_match(server, name) for name in _DEMOS]
+    faceit.download_all_demos(matches, tmp_path, workers=2)
+    server.requests.clear()
+
+    demos = faceit.download_all_demos(matches, tmp_path, workers=2)
+
+    assert set(demos) == set(matches)
+    assert server.requests == []
+
+
+def test_download_resumes_with_range(faceit: Faceit, server: StubServer, tmp_path: Path):
+    name = "match-2.dem"
+    _write_part(tmp_path, server, name, 1000)
+
+    demo_path = faceit.download_demo(_match(server, name), tmp_path)
+
+    assert demo_path.read_bytes() == _DEMOS[name]
+    assert server.requests == [(f"/{name}.gz", "bytes=1000-")]
+    assert not (tmp_path / f"{name}.gz.part").exists()
+
+
+def test_download_unpacks_completely_downloaded_part(faceit: Faceit, server: StubServer, tmp_path: Path):
+    name = "match-1.dem"
+    size = len(server.files[f"{name}.gz"])
+    _write_part(tmp_path, server, name, size)
+
+    demo_path = faceit.download_demo(_match(server, name), tmp_path)
+
+    # server responded 416 Range Not Satisfiable, demo is unpacked from already downloaded data
+    assert demo_path.read_bytes() == _DEMOS[name]
+    assert server.requests == [(f"/{name}.gz", f"bytes={size}-")]
+
+
+def test_download_restarts_without_range_support(faceit: Faceit, no_range_server: StubServer, tmp_path: Path):
+    name = "match-3.dem"
+    _write_part(tmp_path, no_range_server, name, 1000)
+
+    demo_path = faceit.download_demo(_match(no_range_server, name), tmp_path)
+
+    assert demo_path.read_bytes() == _DEMOS[name]
+    assert not (tmp_path / f"{name}.gz.part").exists()
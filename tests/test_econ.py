@@ -0,0 +1,47 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from demo.analytics import calc_econ_stats, calc_team_econ_stats
+
+_DATA_PATH = Path(__file__).parent / "data"
+
+_BUY_TYPES = ["Eco", "Full Buy", "Half Buy"]
+
+
+@pytest.fixture(scope="module")
+def round_data() -> pd.DataFrame:
+    """Economy of 4 rounds, teams swap sides after the second round"""
+    return pd.read_csv(_DATA_PATH / "rounds.csv")
+
+
+def test_econ_stats(round_data: pd.DataFrame):
+    expected = pd.DataFrame(
+        [
+            ["Alpha CT", 0, 2, 0, 4250, 1900, 2350],
+            ["Bravo CT", 1, 0, 1, 1750, 2250, 1150],
+            ["Alpha T", 0, 2, 0, 4650, 4550, 2150],
+            ["Bravo T", 1, 0, 1, 2000, 2150, 1250],
+        ],
+        columns=["Side"] + _BUY_TYPES + ["Avg EQ Value", "Avg Cash", "Avg Spend"])
+
+    pd.testing.assert_frame_equal(calc_econ_stats(round_data), expected)
+
+
+def test_econ_stats_filtered(round_data: pd.DataFrame):
+    econ_stats = calc_econ_stats(round_data, {"roundNum": ["<=2"]})
+
+    assert econ_stats["Side"].tolist() == ["Alpha CT", "Bravo T"]
+    assert econ_stats["Avg EQ Value"].tolist() == [4250, 2000]
+
+
+def test_team_econ_stats(round_data: pd.DataFrame):
+    expected = pd.DataFrame(
+        [
+            ["Alpha", 0, 4, 0, 4450, 3225, 2250],
+            ["Bravo", 2, 0, 2, 1875, 2200, 1200],
+        ],
+        columns=["Team"] + _BUY_TYPES + ["Avg EQ Value", "Avg Cash", "Avg Spend"])
+
+    pd.testing.assert_frame_equal(calc_team_econ_stats(round_data), expected, check_dtype=False)
@@ -0,0 +1,226 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from typing import List
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+from faceit.api import FaceitApi
+from faceit.faceit import Faceit
+from http_stub import StubServer
+
+_PLAYER_ID = "player"
+
+
+def _stat(index: int) -> dict:
+    """Statistics item of index-th match of player, the greater index the newer match"""
+    return {
+        "matchId": f"match-{index}", "date": 1600000000000 + index * 1000, "nickname": "player",
+        "i5": "team", "i1": "de_mirage", "gameMode": "5v5",
+        "i12": "24", "i6": "20", "i7": "5", "i8": "15", "i10": "3", "i13": "10",
+    }
+
+
+def _match_details(match_id: str) -> dict:
+    factions = {name: {"name": f"team-{name}"} for name in ["faction1", "faction2"]}
+    return {"id": match_id, "teams": factions, "results": [{"winner": "faction1"}], "calculateElo": True}
+
+
+class _FaceitHandler(BaseHTTPRequestHandler):
+    """
+    Serves pages of player statistics from server.history (the newest first), page size of 0 means
+    server.page_size and pages are delayed by server.delays. Pages are recorded in server.pages when requested
+    and in server.responded when responded.
+    Serves details of any match, requested ids are recorded in server.matches.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.startswith("/match/v2/match/"):
+            match_id = url.path.rsplit("/", 1)[-1]
+            with self.server.lock:
+                self.server.matches.append(match_id)
+            payload = {"payload": _match_details(match_id)}
+        else:
+            query = parse_qs(url.query)
+            page = int(query["page"][0])
+            size = int(query["size"][0]) or self.server.page_size
+            with self.server.lock:
+                self.server.pages.append(page)
+                payload = self.server.history[page * size:(page + 1) * size]
+            time.sleep(self.server.delays.get(page, 0.0))
+            with self.server.lock:
+                self.server.responded.append(page)
+
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(stub_server) -> StubServer:
+    return stub_server(_FaceitHandler, history=[], page_size=3, pages=[], delays=dict(), responded=[], matches=[])
+
+
+@pytest.fixture
+def faceit(server: StubServer, tmp_path: Path, monkeypatch) -> Faceit:
+    # faceit cache directory is created in current directory
+    monkeypatch.chdir(tmp_path)
+    with FaceitApi(base_url=server.url, retries=1) as api:
+        yield Faceit(api=api)
+
+
+def _played(server: StubServer, first: int, last: int):
+    """Player played matches from first to last (inclusive), the newest are at the beginning of history"""
+    server.history[:0] = [_stat(index) for index in reversed(range(first, last + 1))]
+
+
+def _match_ids(statistics) -> List[str]:
+    return [it.match_id for it in statistics]
+
+
+def _page_threads() -> List[threading.Thread]:
+    return [it for it in threading.enumerate() if it.name.startswith("faceit-page")]
+
+
+@pytest.mark.parametrize("window", [1, 3])
+def test_history_first_sync_fetches_all(faceit: Faceit, server: StubServer, window: int):
+    _played(server, 0, 9)
+
+    history = faceit.player_history(_PLAYER_ID, window=window)
+
+    assert _match_ids(history) == [f"match-{it}" for it in reversed(range(10))]
+    # the last page is shorter than previous ones, the window may request a few pages after it
+    assert set(range(4)) <= set(server.pages)
+    assert max(server.pages) < 4 + window
+
+
+def test_history_delta_stops_at_stored_match(faceit: Faceit, server: StubServer):
+    _played(server, 0, 9)
+    faceit.player_history(_PLAYER_ID)
+    server.pages.clear()
+
+    _played(server, 10, 13)
+    history = faceit.player_history(_PLAYER_ID)
+
+    assert _match_ids(history) == [f"match-{it}" for it in reversed(range(14))]
+    # the second page starts with a stored match, so there is nothing new after it
+    assert server.pages == [0, 1]
+
+
+def test_history_without_new_matches(faceit: Faceit, server: StubServer):
+    _played(server, 0, 9)
+    faceit.player_history(_PLAYER_ID)
+    server.pages.clear()
+
+    history = faceit.player_history(_PLAYER_ID, window=3)
+
+    assert len(history) == 10
+    assert server.pages == [0]
+
+
+def test_history_count_stops_early(faceit: Faceit, server: StubServer):
+    _played(server, 0, 9)
+
+    history = faceit.player_history(_PLAYER_ID, count=4)
+
+    assert _match_ids(history) == ["match-9", "match-8", "match-7", "match-6"]
+    assert server.pages == [0, 1]
+
+    # history is not complete, so the rest of it is fetched when all matches requested
+    server.pages.clear()
+    history = faceit.player_history(_PLAYER_ID)
+
+    assert _match_ids(history) == [f"match-{it}" for it in reversed(range(10))]
+    assert server.pages == [0, 1, 2, 3]
+
+
+def test_history_early_stop_closes_page_requests(faceit: Faceit, server: StubServer):
+    _played(server, 0, 29)
+
+    history = faceit.player_history(_PLAYER_ID, count=2, window=4)
+
+    assert _match_ids(history) == ["match-29", "match-28"]
+    # requests of the window are cancelled or finished and its threads are stopped on return
+    assert _page_threads() == []
+    assert set(server.pages) <= {0, 1, 2, 3}
+
+
+@pytest.mark.parametrize("window", [1, 3])
+@pytest.mark.parametrize("page_size", [0, 4, 5])
+def test_matches_stats_order(faceit: Faceit, server: StubServer, window: int, page_size: int):
+    _played(server, 0, 9)
+
+    statistics = faceit.matches_stats(_PLAYER_ID, page_size=page_size, window=window)
+
+    assert _match_ids(statistics) == [f"match-{it}" for it in reversed(range(10))]
+
+
+@pytest.mark.parametrize("page_size,pages", [(4, [0, 1, 2]), (5, [0, 1, 2]), (20, [0, 1])])
+def test_matches_stats_stops_on_short_or_empty_page(faceit: Faceit, server: StubServer, page_size: int, pages):
+    _played(server, 0, 9)
+
+    statistics = list(faceit.matches_stats(_PLAYER_ID, page_size=page_size))
+
+    assert len(statistics) == 10
+    # page shorter than the previous one is the last, else the empty page after it is requested
+    assert server.pages == pages
+
+
+def test_matches_stats_empty_history(faceit: Faceit, server: StubServer):
+    assert list(faceit.matches_stats(_PLAYER_ID, window=3)) == []
+    assert _page_threads() == []
+
+
+def test_fetch_pages_in_order_when_responses_are_not(faceit: Faceit, server: StubServer):
+    _played(server, 0, 11)
+    # the first pages of the window are responded the last
+    server.delays.update({0: 0.3, 1: 0.2, 2: 0.1})
+
+    statistics = faceit.matches_stats(_PLAYER_ID, window=4)
+
+    assert _match_ids(statistics) == [f"match-{it}" for it in reversed(range(12))]
+    assert server.responded.index(3) < server.responded.index(0)
+
+
+def test_matches_stats_count_closes_window(faceit: Faceit, server: StubServer):
+    _played(server, 0, 29)
+
+    statistics = list(faceit.matches_stats(_PLAYER_ID, count=4, window=3))
+
+    assert _match_ids(statistics) == ["match-29", "match-28", "match-27", "match-26"]
+    assert _page_threads() == []
+    assert max(server.pages) <= 4
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_matches_in_order_of_ids(faceit: Faceit, server: StubServer, workers: int):
+    faceit.match("match-3")
+    server.matches.clear()
+
+    ids = ["match-5", "match-3", "match-1", "match-5", "match-4", "match-2"]
+    matches = faceit.matches(ids, workers=workers)
+
+    assert [it.match_id for it in matches] == ids
+    # duplicated id requested once and cached match is not requested
+    assert sorted(server.matches) == ["match-1", "match-2", "match-4", "match-5"]
+
+
+def test_matches_force(faceit: Faceit, server: StubServer):
+    faceit.matches(["match-1", "match-2"])
+    server.matches.clear()
+
+    matches = faceit.matches(["match-2", "match-1"], force=True, workers=2)
+
+    assert [it.match_id for it in matches] == ["match-2", "match-1"]
+    assert sorted(server.matches) == ["match-1", "match-2"]
@@ -0,0 +1,83 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from demo.base import Frames, convert_frames
+from demo.cache import write_frames, open_frames
+
+# rounds of different length
+_ROUND_SIZES = {1: 5, 2: 3, 3: 7}
+
+
+def _round_frames(num: int, size: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "name": [f"player{it % 3}" for it in range(size)],
+        "roundNum": num,
+        "tick": np.arange(size) * 8 + num * 1000,
+        "viewX": np.arange(size) * 12.5 + num,
+        "isAlive": np.arange(size) % 2 == 0,
+    })
+
+
+@pytest.fixture
+def rounds() -> dict:
+    return {num: _round_frames(num, size) for num, size in _ROUND_SIZES.items()}
+
+
+@pytest.fixture
+def zip_path(tmp_path: Path, rounds: dict) -> Path:
+    path = tmp_path / "frames.zip"
+    demo = SimpleNamespace(frames=pd.concat(rounds.values(), ignore_index=True))
+    Frames.from_demo(demo).dump(path)
+    return path
+
+
+def test_write_and_open_frames(tmp_path: Path, rounds: dict):
+    path = tmp_path / "frames.arrow"
+    # rounds written in order of their numbers, not in order of dict
+    write_frames(path, dict(reversed(list(rounds.items()))))
+
+    table, offsets = open_frames(path)
+
+    assert offsets == {1: (0, 5), 2: (5, 3), 3: (8, 7)}
+    for num, (offset, length) in offsets.items():
+        pd.testing.assert_frame_equal(table.slice(offset, length).to_pandas(), rounds[num])
+
+
+def test_arrow_frames_match_zip_frames(tmp_path: Path, zip_path: Path, rounds: dict):
+    arrow_path = convert_frames(zip_path)
+
+    from_zip = Frames.from_zip(zip_path)
+    from_arrow = Frames.from_arrow(arrow_path)
+
+    assert arrow_path == zip_path.with_suffix(".arrow")
+    assert list(from_arrow) == list(from_zip) == list(_ROUND_SIZES)
+    for num in _ROUND_SIZES:
+        pd.testing.assert_frame_equal(from_arrow[num], from_zip[num], check_dtype=False)
+        pd.testing.assert_frame_equal(from_arrow[num], rounds[num])
+
+
+def test_arrow_frames_ranges(tmp_path: Path, rounds: dict):
+    path = tmp_path / "frames.arrow"
+    write_frames(path, rounds)
+
+    frames = Frames.from_arrow(path)
+
+    expected = pd.concat([rounds[2], rounds[3]], ignore_index=True)
+    pd.testing.assert_frame_equal(frames[2:4], expected)
+    pd.testing.assert_frame_equal(frames[1:4:2], pd.concat([rounds[1], rounds[3]], ignore_index=True))
+
+
+def test_arrow_frames_subset(tmp_path: Path, rounds: dict):
+    path = tmp_path / "frames.arrow"
+    write_frames(path, rounds)
+    Frames.from_arrow(path).dump_arrow(tmp_path / "subset.arrow", to_save=[1, 3])
+
+    frames = Frames.from_arrow(tmp_path / "subset.arrow", to_load=[3])
+
+    assert list(frames) == [3]
+    pd.testing.assert_frame_equal(frames[3], rounds[3])
+
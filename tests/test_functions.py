@@ -0,0 +1,167 @@
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import demo.functions
+from demo.functions import Aggregation, aggregate_many, calc_stats, filter_df, filter_group_aggregate, filter_mask
+
+_DATA_PATH = Path(__file__).parent / "data"
+
+
+@pytest.fixture(scope="module")
+def kill_data() -> pd.DataFrame:
+    kill_data = pd.read_csv(_DATA_PATH / "kills.csv")
+    kill_data["isHeadshot"] = np.arange(len(kill_data)) % 3 == 0
+    kill_data["isFirstKill"] = ~kill_data["roundNum"].duplicated()
+    return kill_data
+
+
+def legacy_aggregate_many(df: pd.DataFrame, aggregations: List[Aggregation], key: str = "Player") -> pd.DataFrame:
+    """filter_group_aggregate() per aggregation merged one by one as box score functions did before"""
+    result = None
+    for aggregation in aggregations:
+        selected = df.loc[aggregation.mask] if aggregation.mask is not None else df
+        column = aggregation.column if aggregation.column is not None else aggregation.groupby
+        table = filter_group_aggregate(
+            selected,
+            filters=aggregation.filters or dict(),
+            groupby=[aggregation.groupby],
+            aggregate={column: [aggregation.func]},
+            rename=[key, aggregation.name],
+        )
+        result = table if result is None else result.merge(table, how="outer")
+    return result.fillna(0)
+
+
+def _kill_aggregations(kill_data: pd.DataFrame, filters: dict) -> List[Aggregation]:
+    enemy_kills = kill_data["attackerTeam"] != kill_data["victimTeam"]
+    first_kills = enemy_kills & (kill_data["isFirstKill"] == True)
+    return [
+        Aggregation("K", "attackerName", mask=enemy_kills, filters=filters),
+        Aggregation("D", "victimName"),
+        Aggregation("A", "assisterName", mask=kill_data["assisterTeam"] != kill_data["victimTeam"], filters=filters),
+        Aggregation("FK", "attackerName", mask=first_kills, filters=filters),
+        Aggregation("FD", "victimName", mask=first_kills, filters=filters),
+        Aggregation("HS%", "attackerName", "mean", "isHeadshot", mask=enemy_kills, filters=filters),
+        Aggregation("HS", "attackerName", "sum", "isHeadshot", mask=enemy_kills, filters=filters),
+        Aggregation("Ticks", "victimName", "sum", "tick", filters=filters),
+    ]
+
+
+@pytest.mark.parametrize("filters", [dict(), {"roundNum": ["<=12"]}, {"roundNum": [">3", "<20"], "isTrade": [True]}])
+def test_aggregate_many_matches_legacy(kill_data: pd.DataFrame, filters: dict):
+    aggregations = _kill_aggregations(kill_data, filters)
+
+    expected = legacy_aggregate_many(kill_data, aggregations)
+    actual = aggregate_many(kill_data, aggregations)
+
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_aggregate_many_order_of_keys_and_columns():
+    df = pd.DataFrame({
+        "killer": ["c", "a", "c", None],
+        "victim": ["b", "d", "a", "c"],
+        "damage": [10, 20, 30, 40],
+    })
+
+    result = aggregate_many(
+        df,
+        [
+            Aggregation("Damage", "killer", "sum", "damage"),
+            Aggregation("Deaths", "victim"),
+        ],
+        key="Name")
+
+    # keys of the first aggregation sorted, then keys appeared only in the next one; rows without key dropped
+    assert list(result.columns) == ["Name", "Damage", "Deaths"]
+    assert result["Name"].tolist() == ["a", "c", "b", "d"]
+    assert result["Damage"].tolist() == [20, 40, 0, 0]
+    assert result["Deaths"].tolist() == [1, 1, 1, 1]
+    # "Damage" is missing for some keys so it is float as after outer merge, "Deaths" is not
+    assert result["Damage"].dtype == np.float64
+    assert result["Deaths"].dtype == np.int64
+
+
+def test_aggregate_many_unsupported_function(kill_data: pd.DataFrame):
+    with pytest.raises(ValueError):
+        aggregate_many(kill_data, [Aggregation("X", "attackerName", "max", "tick")])
+
+
+def test_filter_mask(kill_data: pd.DataFrame):
+    filters = {"roundNum": [">=2", "<5"], "attackerTeam": ["Alpha"], "isTrade": [False]}
+
+    mask = filter_mask(kill_data, filters)
+
+    expected = (kill_data["roundNum"] >= 2) & (kill_data["roundNum"] < 5) & \
+               (kill_data["attackerTeam"] == "Alpha") & (kill_data["isTrade"] == False)
+    assert mask.tolist() == expected.tolist()
+
+
+def test_filter_compiled_once(kill_data: pd.DataFrame):
+    demo.functions._compile_filters.cache_clear()
+
+    first = filter_df(kill_data, {"roundNum": ["<=12"], "attackerTeam": ["Alpha", "Bravo"]})
+    # the same filters as new lists are hits of the cache
+    second = filter_df(kill_data, {"roundNum": ["<=12"], "attackerTeam": ["Alpha", "Bravo"]})
+
+    pd.testing.assert_frame_equal(first, second)
+    info = demo.functions._compile_filters.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
+def test_filter_compiled_per_dtypes(kill_data: pd.DataFrame):
+    categorical = kill_data.assign(attackerTeam=kill_data["attackerTeam"].astype("category"))
+    filters = {"attackerTeam": ["Alpha"]}
+
+    expected = filter_df(kill_data, filters)
+    actual = filter_df(categorical, filters)
+
+    assert actual.index.tolist() == expected.index.tolist()
+
+
+@pytest.mark.parametrize("filters", [
+    {"attackerTeam": [["Alpha"]]},
+    {"attackerTeam": [{"team": "Alpha"}]},
+    {"isTrade": [[True]]},
+    {"attackerTeam": [1]},
+    {"isTrade": ["True"]},
+])
+def test_filter_invalid_values(kill_data: pd.DataFrame, filters: dict):
+    # unhashable values can't be cached, but they are reported as invalid filter as any other values
+    with pytest.raises(ValueError):
+        filter_df(kill_data, filters)
+
+
+def test_filter_invalid_numeric_value(kill_data: pd.DataFrame):
+    with pytest.raises(Exception, match="Invalid numerical value"):
+        filter_df(kill_data, {"roundNum": ["<=1x"]})
+
+
+def test_filter_without_filters_is_shallow_copy(kill_data: pd.DataFrame):
+    original = kill_data.copy()
+
+    result = filter_df(kill_data, dict())
+    result["tick"] = 0
+    result["new"] = 1
+    result.columns = [f"{it}_" for it in result.columns]
+
+    assert result is not kill_data
+    pd.testing.assert_frame_equal(kill_data, original)
+
+
+def test_filter_callers_do_not_modify_table(kill_data: pd.DataFrame):
+    original = kill_data.copy()
+
+    renamed = filter_group_aggregate(kill_data, rename=[f"{it}_" for it in kill_data.columns])
+    renamed["tick_"] = 0
+    aggregated = filter_group_aggregate(
+        kill_data, groupby=["attackerName"], aggregate={"tick": ["sum"]}, rename=["Player", "Ticks"])
+    stats = calc_stats(kill_data, dict(), [], [], [], [f"{it}_" for it in kill_data.columns])
+    stats["roundNum_"] = 0
+
+    assert list(aggregated.columns) == ["Player", "Ticks"]
+    pd.testing.assert_frame_equal(kill_data, original)
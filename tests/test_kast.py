@@ -0,0 +1,152 @@
+from pathlib import Path
+from typing import Dict, List, Union
+
+import pandas as pd
+import pytest
+
+from demo.analytics import calc_kast
+from demo.functions import filter_group_aggregate
+
+_DATA_PATH = Path(__file__).parent / "data"
+
+
+@pytest.fixture(scope="module")
+def kill_data() -> pd.DataFrame:
+    """Kills of a 24 rounds match with team kills, assists, flash assists and trades"""
+    return pd.read_csv(_DATA_PATH / "kills.csv")
+
+
+def legacy_calc_kast(
+        kill_data: pd.DataFrame,
+        kast_string: str = "KAST",
+        flash_assists: bool = True,
+        kill_filters: Dict[str, Union[List[bool], List[str]]] = None,
+) -> pd.DataFrame:
+    """Per round and per player loop calc_kast() was implemented with before, kept as reference"""
+    kill_filters = kill_filters or dict()
+
+    columns = ["Player", f"{kast_string.upper()}%"]
+    kast_counts = dict()
+    kast_rounds = dict()
+
+    columns.extend(list(kast_string.upper()))
+
+    killers = filter_group_aggregate(
+        kill_data.loc[kill_data["attackerTeam"] != kill_data["victimTeam"]],
+        filters=kill_filters,
+        groupby=["roundNum"],
+        aggregate={"attackerName": ["sum"]},
+        rename=["RoundNum", "Killers"],
+    )
+    victims = filter_group_aggregate(
+        kill_data,
+        filters=kill_filters,
+        groupby=["roundNum"],
+        aggregate={"victimName": ["sum"]},
+        rename=["RoundNum", "Victims"],
+    )
+    assisters = filter_group_aggregate(
+        kill_data.loc[kill_data["assisterTeam"] != kill_data["victimTeam"]].fillna(""),
+        filters=kill_filters,
+        groupby=["roundNum"],
+        aggregate={"assisterName": ["sum"]},
+        rename=["RoundNum", "Assisters"],
+    )
+    traded = filter_group_aggregate(
+        kill_data.loc[(kill_data["attackerTeam"] != kill_data["victimTeam"]) & (kill_data["isTrade"] == True)]
+        .fillna(""),
+        filters=kill_filters,
+        groupby=["roundNum"],
+        aggregate={"playerTradedName": ["sum"]},
+        rename=["RoundNum", "Traded"],
+    )
+    if flash_assists:
+        flash_assisters = filter_group_aggregate(
+            kill_data.loc[kill_data["flashThrowerTeam"] != kill_data["victimTeam"]].fillna(""),
+            filters=kill_filters,
+            groupby=["roundNum"],
+            aggregate={"flashThrowerName": ["sum"]},
+            rename=["RoundNum", "Flash Assisters"],
+        )
+        assisters = assisters.merge(flash_assisters, on="RoundNum")
+        assisters["Assisters"] = assisters["Assisters"] + assisters["Flash Assisters"]
+        assisters = assisters[["RoundNum", "Assisters"]]
+    kast_data = killers.merge(assisters, how="outer").fillna("")
+    kast_data = kast_data.merge(victims, how="outer").fillna("")
+    kast_data = kast_data.merge(traded, how="outer").fillna("")
+    for player in kill_data["attackerName"].unique():
+        kast_counts[player] = [[0, 0, 0, 0] for _ in range(len(kast_data))]
+        kast_rounds[player] = [0, 0, 0, 0, 0]
+    for rd in kast_data.index:
+        for player in kast_counts:
+            if "K" in kast_string.upper():
+                kast_counts[player][rd][0] = kast_data.iloc[rd]["Killers"].count(player)
+                kast_rounds[player][1] += kast_data.iloc[rd]["Killers"].count(player)
+            if "A" in kast_string.upper():
+                kast_counts[player][rd][1] = kast_data.iloc[rd]["Assisters"].count(player)
+                kast_rounds[player][2] += kast_data.iloc[rd]["Assisters"].count(player)
+            if "S" in kast_string.upper():
+                if player not in kast_data.iloc[rd]["Victims"]:
+                    kast_counts[player][rd][2] = 1
+                    kast_rounds[player][3] += 1
+            if "T" in kast_string.upper():
+                kast_counts[player][rd][3] = kast_data.iloc[rd]["Traded"].count(player)
+                kast_rounds[player][4] += kast_data.iloc[rd]["Traded"].count(player)
+    for player in kast_rounds:
+        for rd in kast_counts[player]:
+            if any(rd):
+                kast_rounds[player][0] += 1
+        kast_rounds[player][0] /= len(kast_data)
+    kast = pd.DataFrame.from_dict(kast_rounds, orient="index").reset_index()
+    kast.columns = ["Player", f"{kast_string.upper()}%", "K", "A", "S", "T"]
+    kast = kast[columns]
+    kast[f"{kast_string.upper()}%"] = kast[f"{kast_string.upper()}%"] * 100.0
+    kast.fillna(0, inplace=True)
+    return kast
+
+
+@pytest.mark.parametrize("flash_assists", [True, False])
+@pytest.mark.parametrize("kast_string", ["KAST", "KA", "KS", "T", "kast"])
+def test_calc_kast_matches_legacy(kill_data: pd.DataFrame, kast_string: str, flash_assists: bool):
+    expected = legacy_calc_kast(kill_data, kast_string, flash_assists)
+    actual = calc_kast(kill_data, kast_string, flash_assists)
+
+    expected = expected.sort_values(by="Player", ignore_index=True)
+    actual = actual.sort_values(by="Player", ignore_index=True)
+
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_calc_kast_matches_legacy_filtered(kill_data: pd.DataFrame):
+    filters = {"roundNum": ["<=12"]}
+
+    expected = legacy_calc_kast(kill_data, kill_filters=filters).sort_values(by="Player", ignore_index=True)
+    actual = calc_kast(kill_data, kill_filters=filters).sort_values(by="Player", ignore_index=True)
+
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_calc_kast_prefix_names():
+    # "bob" is a prefix of "bob2" and names are matched exactly: kill of bob2 in round 1 and death of bob2
+    # in round 2 are not counted for bob, so bob has one kill and survived all three rounds
+    kill_data = pd.DataFrame(
+        [
+            [1, "bob2", "Alpha", "x", "Bravo"],
+            [2, "x", "Bravo", "bob2", "Alpha"],
+            [3, "bob", "Alpha", "x", "Bravo"],
+        ],
+        columns=["roundNum", "attackerName", "attackerTeam", "victimName", "victimTeam"])
+    for column in ["assisterName", "assisterTeam", "flashThrowerName", "flashThrowerTeam", "playerTradedName"]:
+        kill_data[column] = None
+    kill_data["isTrade"] = False
+
+    expected = pd.DataFrame(
+        [
+            ["bob", 100.0, 1, 0, 3, 0],
+            ["bob2", 200.0 / 3.0, 1, 0, 2, 0],
+            ["x", 100.0 / 3.0, 1, 0, 1, 0],
+        ],
+        columns=["Player", "KAST%", "K", "A", "S", "T"])
+    actual = calc_kast(kill_data).sort_values(by="Player", ignore_index=True)
+
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
@@ -0,0 +1,170 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import utils.lru
+from utils.lru import LruCache, LruCacheStats
+
+_WAITERS = 4
+
+
+class _Clock(object):
+    """Stands for time module in utils.lru"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> _Clock:
+    clock = _Clock()
+    monkeypatch.setattr(utils.lru, "time", clock)
+    return clock
+
+
+class _Loader(object):
+    """Loader blocked until released, counts calls"""
+
+    def __init__(self, value=None, error: BaseException = None):
+        self.value = value
+        self.error = error
+        self.calls = 0
+        self.released = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        assert self.released.wait(timeout=10.0)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def _wait_coalesced(cache: LruCache, count: int):
+    deadline = time.monotonic() + 10.0
+    while cache.stats().coalesced < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_hit_and_miss():
+    cache = LruCache()
+
+    assert cache.get_or_load("a", lambda: 1) == 1
+    assert cache.get_or_load("a", lambda: 2) == 1
+    assert cache.get_or_load("b", lambda: 3) == 3
+
+    assert cache.stats() == LruCacheStats(hits=1, misses=2, coalesced=0, evictions=0, size=2)
+
+
+def test_invalidate():
+    cache = LruCache()
+    cache.get_or_load("a", lambda: 1)
+
+    cache.invalidate("a")
+    cache.invalidate("missed")
+
+    assert cache.get_or_load("a", lambda: 2) == 2
+    assert cache.stats().misses == 2
+
+
+def test_default_ttl(clock: _Clock):
+    cache = LruCache(ttl=10.0)
+    cache.get_or_load("a", lambda: 1)
+
+    clock.now += 9.9
+    assert cache.get_or_load("a", lambda: 2) == 1
+
+    clock.now += 0.1
+    assert cache.get_or_load("a", lambda: 3) == 3
+    assert cache.stats() == LruCacheStats(hits=1, misses=2, coalesced=0, evictions=0, size=1)
+
+
+def test_entry_ttl_overrides_default(clock: _Clock):
+    cache = LruCache(ttl=10.0)
+    cache.get_or_load("short", lambda: 1, ttl=1.0)
+    cache.get_or_load("forever", lambda: 2)
+    cache.get_or_load("long", lambda: 3, ttl=100.0)
+
+    clock.now += 50.0
+
+    assert cache.get_or_load("short", lambda: 4) == 4
+    assert cache.get_or_load("forever", lambda: 5) == 5
+    assert cache.get_or_load("long", lambda: 6) == 3
+
+
+def test_no_ttl_never_expires(clock: _Clock):
+    cache = LruCache()
+    cache.get_or_load("a", lambda: 1)
+
+    clock.now += 1e9
+
+    assert cache.get_or_load("a", lambda: 2) == 1
+
+
+def test_eviction_order():
+    cache = LruCache(max_size=2)
+    cache.get_or_load("a", lambda: 1)
+    cache.get_or_load("b", lambda: 2)
+    cache.get_or_load("a", lambda: None)
+    cache.get_or_load("c", lambda: 3)
+
+    assert cache.stats() == LruCacheStats(hits=1, misses=3, coalesced=0, evictions=1, size=2)
+    # "b" was evicted, "a" and "c" are kept
+    assert cache.get_or_load("a", lambda: None) == 1
+    assert cache.get_or_load("c", lambda: None) == 3
+    assert cache.get_or_load("b", lambda: 4) == 4
+
+
+def test_single_flight_loads_once():
+    cache = LruCache()
+    loader = _Loader(value=42)
+
+    with ThreadPoolExecutor(max_workers=_WAITERS + 1) as executor:
+        futures = [executor.submit(cache.get_or_load, "a", loader) for _ in range(_WAITERS + 1)]
+        _wait_coalesced(cache, _WAITERS)
+        loader.released.set()
+        results = [it.result() for it in futures]
+
+    assert results == [42] * (_WAITERS + 1)
+    assert loader.calls == 1
+    assert cache.stats() == LruCacheStats(hits=0, misses=1, coalesced=_WAITERS, evictions=0, size=1)
+
+
+def test_single_flight_error_reaches_all_waiters_and_not_cached():
+    cache = LruCache()
+    error = ValueError("failed")
+    loader = _Loader(error=error)
+
+    with ThreadPoolExecutor(max_workers=_WAITERS + 1) as executor:
+        futures = [executor.submit(cache.get_or_load, "a", loader) for _ in range(_WAITERS + 1)]
+        _wait_coalesced(cache, _WAITERS)
+        loader.released.set()
+        errors = [it.exception() for it in futures]
+
+    assert errors == [error] * (_WAITERS + 1)
+    assert loader.calls == 1
+    assert cache.stats().size == 0
+
+    # the next call loads again
+    assert cache.get_or_load("a", lambda: 1) == 1
+    assert cache.stats() == LruCacheStats(hits=0, misses=2, coalesced=_WAITERS, evictions=0, size=1)
+
+
+def test_different_keys_load_concurrently():
+    cache = LruCache()
+    first = _Loader(value=1)
+    second = _Loader(value=2)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        a = executor.submit(cache.get_or_load, "a", first)
+        b = executor.submit(cache.get_or_load, "b", second)
+        # the second key is loaded while loader of the first one is still blocked
+        second.released.set()
+        assert b.result(timeout=10.0) == 2
+        first.released.set()
+        assert a.result(timeout=10.0) == 1
@@ -0,0 +1,100 @@
+import threading
+import time
+from typing import Iterator
+
+import pytest
+
+from utils.pipeline import Pipeline, Stage
+
+
+def _stream_square(items: Iterator[int]) -> Iterator[tuple]:
+    for item in items:
+        if item == 3:
+            yield item, None, ValueError(item)
+        else:
+            yield item, item * item, None
+
+
+def test_stages_applied_in_order():
+    pipeline = Pipeline(
+        Stage("add", lambda it: it + 1, workers=3),
+        Stage("double", lambda it: it * 2, workers=2),
+        Stage("format", str, workers=1))
+
+    results = list(pipeline.run(range(20)))
+
+    assert sorted(results, key=int) == [str((it + 1) * 2) for it in range(20)]
+    assert [(it.name, it.items, it.errors) for it in pipeline.stats()] == \
+           [("add", 20, 0), ("double", 20, 0), ("format", 20, 0)]
+
+
+def test_errors_dropped_and_counted():
+    def check(item: int) -> int:
+        if item % 5 == 0:
+            raise ValueError(item)
+        return item
+
+    pipeline = Pipeline(
+        Stage("check", check, workers=2),
+        Stage("skip", lambda it: None if it % 2 else it, workers=2),
+        Stage("identity", lambda it: it))
+
+    results = sorted(pipeline.run(range(20)))
+
+    assert results == [it for it in range(20) if it % 5 != 0 and it % 2 == 0]
+    check_stats, skip_stats, identity_stats = pipeline.stats()
+    assert (check_stats.items, check_stats.errors) == (20, 4)
+    # None result drops item without error
+    assert (skip_stats.items, skip_stats.errors) == (16, 0)
+    assert identity_stats.items == len(results)
+
+
+def test_stream_stage():
+    pipeline = Pipeline(
+        Stage("add", lambda it: it + 1, workers=2),
+        Stage("square", _stream_square, workers=4, stream=True),
+        Stage("identity", lambda it: it, workers=2))
+
+    results = sorted(pipeline.run(range(10)))
+
+    assert results == sorted((it + 1) ** 2 for it in range(10) if it + 1 != 3)
+    square_stats = pipeline.stats()[1]
+    assert (square_stats.workers, square_stats.items, square_stats.errors) == (4, 10, 1)
+
+
+def test_failed_producer_finishes_pipeline():
+    def items():
+        yield from range(3)
+        raise RuntimeError("producer failed")
+
+    assert sorted(Pipeline(Stage("identity", lambda it: it, workers=2)).run(items())) == [0, 1, 2]
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_backpressure(stream: bool):
+    consumed = []
+    lock = threading.Lock()
+
+    def items():
+        for item in range(100):
+            with lock:
+                consumed.append(item)
+            yield item
+
+    def stream_identity(inputs: Iterator[int]) -> Iterator[tuple]:
+        return ((it, it, None) for it in inputs)
+
+    pipeline = Pipeline(
+        Stage("identity", lambda it: it, workers=1, queue_size=1),
+        Stage("pass", stream_identity if stream else (lambda it: it), workers=1, queue_size=1, stream=stream))
+
+    outputs = pipeline.run(items())
+    next(outputs)
+    # output is not consumed, so stages stop as soon as their queues are full
+    time.sleep(0.5)
+    with lock:
+        in_flight = len(consumed)
+    outputs.close()
+
+    # queues and workers of both stages, output queue and item being put by feeder
+    assert in_flight <= 8
@@ -0,0 +1,47 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.processes import process_unordered
+
+_CRASHING = 3
+
+
+def _double_or_crash(item: int) -> int:
+    if item == _CRASHING:
+        # like process killed by OOM killer, pool becomes broken
+        os._exit(1)
+    if item < 0:
+        raise ValueError(item)
+    return item * 2
+
+
+def test_process_unordered():
+    results = {item: result for item, result, _ in process_unordered(_double_or_crash, range(4, 14), 3)}
+
+    assert results == {it: it * 2 for it in range(4, 14)}
+
+
+def test_process_unordered_consumes_lazily():
+    consumed = []
+
+    def items():
+        for item in range(4, 14):
+            consumed.append(item)
+            yield item
+
+    outputs = process_unordered(_double_or_crash, items(), 2)
+    next(outputs)
+    # the next item is requested only when a result is yielded
+    assert len(consumed) <= 3
+    outputs.close()
+
+
+def test_process_unordered_isolates_crash():
+    items = [it for it in range(10) if it != _CRASHING] + [_CRASHING, -1]
+
+    outputs = list(process_unordered(_double_or_crash, items, 4))
+
+    assert sorted(item for item, _, _ in outputs) == sorted(items)
+    errors = {item: type(error) for item, _, error in outputs if error is not None}
+    assert errors == {_CRASHING: BrokenProcessPool, -1: ValueError}
+    assert all(result == item * 2 for item, result, error in outputs if error is None)
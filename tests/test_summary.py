@@ -0,0 +1,141 @@
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from demo.analytics import calc_player_box_score, calc_player_summary, calc_summary_box_score, SUMMARY_COLUMNS
+from demo.base import Summary
+
+_DATA_PATH = Path(__file__).parent / "data"
+
+
+def _match(seed: int) -> Dict[str, pd.DataFrame]:
+    """Tables of a 24 rounds match, kills are real and the rest is random events of the same players"""
+    rng = np.random.default_rng(seed)
+
+    kill_data = pd.read_csv(_DATA_PATH / "kills.csv")
+    kill_data["isHeadshot"] = rng.random(len(kill_data)) < 0.4
+    kill_data["isFirstKill"] = ~kill_data["roundNum"].duplicated()
+
+    teams = pd.concat([
+        kill_data[["attackerName", "attackerTeam"]].set_axis(["name", "team"], axis=1),
+        kill_data[["victimName", "victimTeam"]].set_axis(["name", "team"], axis=1),
+    ]).drop_duplicates().set_index("name")["team"]
+    players = teams.index.to_numpy()
+
+    def pick(count: int):
+        names = rng.choice(players, count)
+        return names, teams[names].to_numpy()
+
+    attackers, attackers_teams = pick(300)
+    victims, victims_teams = pick(300)
+    hp_damage = rng.integers(1, 120, 300)
+    damage_data = pd.DataFrame({
+        "roundNum": rng.integers(1, 25, 300),
+        "attackerName": attackers,
+        "attackerTeam": attackers_teams,
+        "victimName": victims,
+        "victimTeam": victims_teams,
+        "hitGroup": rng.choice(["Head", "Chest", "Stomach", "Legs"], 300),
+        "weapon": rng.choice(["AK-47", "M4A4", "HE Grenade", "Molotov"], 300),
+        "hpDamage": hp_damage,
+        "hpDamageTaken": np.minimum(hp_damage, 100),
+    })
+
+    shooters, shooters_teams = pick(1000)
+    weapon_fire_data = pd.DataFrame({
+        "playerName": shooters,
+        "playerTeam": shooters_teams,
+        "playerStrafe": rng.random(1000) < 0.2,
+    })
+
+    throwers, throwers_teams = pick(120)
+    grenade_data = pd.DataFrame({
+        "throwerName": throwers,
+        "throwerTeam": throwers_teams,
+        "grenadeType": rng.choice(["Flashbang", "HE Grenade", "Smoke Grenade", "Molotov"], 120),
+    })
+
+    flashers, flashers_teams = pick(80)
+    flash_data = pd.DataFrame({
+        "attackerName": flashers,
+        "attackerTeam": flashers_teams,
+        "playerTeam": rng.choice(["Alpha", "Bravo"], 80),
+        "flashDuration": rng.random(80) * 3.0,
+    })
+
+    round_nums = np.arange(1, 25)
+    round_data = pd.DataFrame({
+        "roundNum": round_nums,
+        "ctTeam": np.where(round_nums <= 12, "Alpha", "Bravo"),
+        "tTeam": np.where(round_nums <= 12, "Bravo", "Alpha"),
+    })
+
+    return dict(
+        damage_data=damage_data,
+        flash_data=flash_data,
+        grenade_data=grenade_data,
+        kill_data=kill_data,
+        round_data=round_data,
+        weapon_fire_data=weapon_fire_data,
+    )
+
+
+def _by_player(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(by="Player", ignore_index=True)
+
+
+@pytest.mark.parametrize("filters", [dict(), {"roundNum": ["<=12"]}])
+def test_summary_box_score_matches_box_score(filters: dict):
+    match = _match(seed=0)
+    filters = dict(damage_filters=filters, kill_filters=filters, death_filters=filters, round_filters=filters)
+
+    expected = _by_player(calc_player_box_score(**match, **filters))
+    actual = _by_player(calc_summary_box_score(calc_player_summary(**match, **filters)))
+
+    assert sorted(actual.columns) == sorted(expected.columns)
+    pd.testing.assert_frame_equal(actual, expected[actual.columns], check_dtype=False)
+
+
+def test_merged_summary_sums_counts():
+    first = calc_player_summary(**_match(seed=1))
+    second = calc_player_summary(**_match(seed=2))
+
+    merged = Summary.merge_all([Summary(first, 1), Summary(second, 1)])
+
+    assert merged.matches == 2
+    assert list(merged.players.columns) == SUMMARY_COLUMNS
+    pd.testing.assert_frame_equal(merged.players, first + second, check_dtype=False)
+
+
+def test_merged_summary_rates_are_ratios_of_totals():
+    first = calc_player_summary(**_match(seed=1))
+    second = calc_player_summary(**_match(seed=2))
+
+    box_score = calc_summary_box_score(first + second).set_index("Player").sort_index()
+    first_box_score = calc_summary_box_score(first).set_index("Player").sort_index()
+    second_box_score = calc_summary_box_score(second).set_index("Player").sort_index()
+
+    # ADR of two matches is total damage by total rounds ...
+    adr = (first["Damage"] + second["Damage"]) / (first["rounds"] + second["rounds"])
+    pd.testing.assert_series_equal(box_score["ADR"], adr, check_names=False)
+    # ... and KAST% is share of KAST rounds among rounds of both matches, not a mean of per match rates
+    kast = (first["KAST Rounds"] + second["KAST Rounds"]) / (first["KAST Total"] + second["KAST Total"]) * 100.0
+    pd.testing.assert_series_equal(box_score["KAST%"], kast, check_names=False)
+
+    # counts are just summed
+    pd.testing.assert_series_equal(box_score["K"], first_box_score["K"] + second_box_score["K"])
+
+
+def test_merged_summary_of_same_match_keeps_rates():
+    summary = calc_player_summary(**_match(seed=0))
+
+    merged = Summary.merge_all([Summary(summary, 1), Summary(summary, 1)])
+
+    expected = calc_summary_box_score(summary)
+    actual = merged.player_box_score()
+    rates = [it for it in expected.columns if it not in ["Player", "K", "D", "A", "FA", "UD", "EF"]]
+    pd.testing.assert_frame_equal(actual[rates], expected[rates])
+    assert (actual["K"] == expected["K"] * 2).all()
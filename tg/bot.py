@@ -9,16 +9,24 @@ from matplotlib import pyplot as plt
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto, ForceReply
 from telegram.ext import Updater, CommandHandler, MessageHandler, Filters, CallbackContext, CallbackQueryHandler
 
-from faceit.faceit import Faceit
+from faceit.faceit import Faceit, DEFAULT_API_RATE
 from faceit.functions import statistics2dataframe
 from faceit.visualization import draw_faceit_score_history
 from tg.wrapper import playgame
 from utils.functions import list_get_or_throw, list_get_or_default
+from utils.lru import LruCache
 from utils.logging import logger
 
 
 log = logger()
 
+# number of history pages requested concurrently
+_HISTORY_WINDOW = 8
+
+# in-memory cache of player details and history pages shared by all users
+_MEMORY_CACHE_SIZE = 4096
+_MEMORY_CACHE_TTL = 60.0
+
 
 def savefig(fig) -> NamedTemporaryFile:
     file = NamedTemporaryFile(delete=False)
@@ -70,7 +78,7 @@ class Job(threading.Thread):
             self.update.message.reply_text(f"Не нашел игрока с никнеймом {self.nickname} :(")
             return
 
-        statistics = self.parent.faceit.matches_stats(player.player_id, self.count)
+        statistics = self.parent.faceit.player_history(player.player_id, self.count, window=_HISTORY_WINDOW)
         self.df = statistics2dataframe(statistics)
 
         fig, plot = draw_faceit_score_history(self.df, view_type="date")
@@ -87,6 +95,9 @@ class Job(threading.Thread):
 
         os.unlink(file.name)
 
+        log.info(f"Faceit memory cache {self.parent.faceit.memory_cache_stats()}")
+        log.info(f"Faceit API {self.parent.faceit.api_stats()}")
+
     def change_view(self, view_type: str):
         if self.df is not None and view_type != self.view_type:
             fig, plot = draw_faceit_score_history(self.df, view_type=view_type)
@@ -150,7 +161,7 @@ class UserContext:
 class FaceitHistoryTelegramBot:
 
     def __init__(self, telegram_token: str, start_message: str):
-        self.faceit = Faceit()
+        self.faceit = Faceit(memory_cache=LruCache(_MEMORY_CACHE_SIZE, _MEMORY_CACHE_TTL), rate=DEFAULT_API_RATE)
 
         self.start_message = start_message
 
@@ -1,3 +1,5 @@
+import functools
+import hashlib
 import itertools
 import gzip
 import json
@@ -81,3 +83,24 @@ def read_json(path: Union[Path, str]):
 def write_json(path: Union[Path, str], obj: Any):
     with open(str(Path(path).absolute()), "wt") as file:
         file.write(json.dumps(obj))
+
+
+@functools.lru_cache(maxsize=1024)
+def _file_digest(path: str, size: int, mtime: int) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_digest(path: Union[Path, str]) -> str:
+    """SHA1 of file content, memoized while file size and modification time are the same"""
+    path = Path(path).absolute()
+    stat = path.stat()
+    return _file_digest(str(path), stat.st_size, stat.st_mtime_ns)
+
+
+def obj_digest(obj: Any) -> str:
+    """SHA1 of JSON serializable object"""
+    return hashlib.sha1(json.dumps(obj, sort_keys=True).encode("utf-8")).hexdigest()
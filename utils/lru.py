@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Hashable, Callable, TypeVar, Dict, Tuple, Any
+
+T = TypeVar('T')
+
+
+@dataclass
+class LruCacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+    size: int = 0
+
+
+class _Flight(object):
+    """Value being loaded, requests of the same key wait for it instead of loading again"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class LruCache(object):
+    """
+    Bounded thread-safe in-memory LRU cache with per-entry TTL.
+    Concurrent get_or_load() of missed key call loader only once, other callers wait for its result.
+
+    :param max_size: maximum number of entries, least recently used entries are evicted
+    :param ttl: default time in seconds while entry is valid, forever if None
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = dict()
+        self._stats = LruCacheStats()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], T], ttl: Optional[float] = None) -> T:
+        """
+        Returns cached value for key or load it using loader, exception raised by loader is not cached.
+
+        :param key: cache key
+        :param loader: function to load value if it missed in cache
+        :param ttl: time in seconds while loaded value is valid, default of cache is used if None
+        """
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is not None:
+                expires, value = entry
+                if expires is None or expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._stats.hits += 1
+                    return value
+                del self._entries[key]
+            flight = self._flights.get(key, None)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._stats.misses += 1
+            else:
+                self._stats.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except BaseException as error:
+            flight.error = error
+            raise
+        else:
+            self._put(key, flight.value, ttl if ttl is not None else self._ttl)
+            return flight.value
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.event.set()
+
+    def _put(self, key: Hashable, value: Any, ttl: Optional[float]):
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> LruCacheStats:
+        with self._lock:
+            return LruCacheStats(
+                self._stats.hits, self._stats.misses, self._stats.coalesced, self._stats.evictions, len(self._entries))
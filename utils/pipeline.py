@@ -0,0 +1,222 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, Any
+
+from utils.logging import logger
+
+log = logger()
+
+# marks end of items in a queue, one per worker of consuming stage
+_DONE = object()
+
+# period to check whether pipeline is stopped while waiting for a queue
+_POLL_INTERVAL = 0.1
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    items: int = 0
+    errors: int = 0
+    # seconds spent by all workers processing items
+    busy: float = 0.0
+    # seconds from start of the pipeline until the last worker of the stage finished
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Processed items per second"""
+        return self.items / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def utilization(self) -> float:
+        """Part of time workers were busy, low value means stage waits for upstream or downstream"""
+        return self.busy / (self.elapsed * self.workers) if self.elapsed > 0 else 0.0
+
+    def __str__(self):
+        return f"{self.name}: {self.items} items ({self.errors} errors) by {self.workers} workers " \
+               f"in {self.elapsed:.1f}s, {self.throughput:.2f} items/s, {self.utilization:.0%} busy"
+
+
+@dataclass
+class Stage:
+    """
+    Step of the pipeline processed by its own pool of threads.
+
+    :param name: name of the stage used in logs and statistics
+    :param function: function to process item, item is dropped if it returns None or raises
+    :param workers: number of threads processing items simultaneously
+    :param queue_size: maximum number of items waiting for the stage, number of workers if None
+    :param stream: if True then function is called once by a single thread with iterator of input items
+                   and yields (item, result, error) as items processed by its own workers (e.g. pool of
+                   processes), workers is then the number of items it processes simultaneously
+    """
+    name: str
+    function: Callable[[Any], Any]
+    workers: int = 1
+    queue_size: Optional[int] = None
+    stream: bool = False
+
+
+class Pipeline(object):
+    """
+    Chain of stages connected by bounded queues. When a stage is slower than upstream one, its queue
+    becomes full and upstream workers wait, so number of items in flight is bounded by queues sizes
+    and workers counts. Items go through stages in order of completion, not in order of input.
+    """
+
+    def __init__(self, *stages: Stage):
+        assert stages, "Pipeline requires at least one stage"
+        self._stages = stages
+        self._stats = [StageStats(it.name, max(it.workers, 1)) for it in stages]
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def _put(self, target: queue.Queue, item: Any) -> bool:
+        while not self._stopped.is_set():
+            try:
+                target.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, source: queue.Queue) -> Any:
+        while not self._stopped.is_set():
+            try:
+                return source.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                pass
+        return _DONE
+
+    def _feed(self, items: Iterable[Any], target: queue.Queue, consumers: int):
+        try:
+            for item in items:
+                if not self._put(target, item):
+                    return
+        except Exception as error:
+            log.error(f"Can't produce pipeline items due to {error!r}")
+        for _ in range(consumers):
+            self._put(target, _DONE)
+
+    def _process(self, index: int, item: Any, result: Any, error: Optional[BaseException], busy: float):
+        stage, stats = self._stages[index], self._stats[index]
+        if error is not None:
+            log.error(f"Can't process {item} at stage {stage.name} due to {error!r}")
+        with self._lock:
+            stats.items += 1
+            stats.errors += error is not None
+            stats.busy += busy
+
+    def _work(self, index: int, source: queue.Queue, target: queue.Queue, consumers: int, started: float, active):
+        stage = self._stages[index]
+        while True:
+            item = self._get(source)
+            if item is _DONE:
+                break
+            start = time.monotonic()
+            try:
+                result, error = stage.function(item), None
+            except Exception as exception:
+                result, error = None, exception
+            self._process(index, item, result, error, time.monotonic() - start)
+            if result is not None and not self._put(target, result):
+                break
+        self._finish(index, target, consumers, started, active)
+
+    def _stream(self, index: int, source: queue.Queue, target: queue.Queue, consumers: int, started: float, active):
+        stage = self._stages[index]
+        # time spent waiting for upstream or downstream is not counted as busy
+        waited = 0.0
+
+        def inputs() -> Iterator[Any]:
+            nonlocal waited
+            while True:
+                start = time.monotonic()
+                item = self._get(source)
+                waited += time.monotonic() - start
+                if item is _DONE:
+                    return
+                yield item
+
+        start = time.monotonic()
+        outputs = stage.function(inputs())
+        try:
+            for item, result, error in outputs:
+                self._process(index, item, result, error, 0.0)
+                put = time.monotonic()
+                if result is not None and not self._put(target, result):
+                    break
+                waited += time.monotonic() - put
+        except Exception as error:
+            log.error(f"Stage {stage.name} stopped due to {error!r}")
+        finally:
+            if hasattr(outputs, "close"):
+                outputs.close()
+        with self._lock:
+            stats = self._stats[index]
+            # workers of stream function are considered busy while it does not wait for upstream or downstream
+            stats.busy += (time.monotonic() - start - waited) * stats.workers
+        self._finish(index, target, consumers, started, active)
+
+    def _finish(self, index: int, target: queue.Queue, consumers: int, started: float, active):
+        stats = self._stats[index]
+        with self._lock:
+            active[index] -= 1
+            last = active[index] == 0
+            if last:
+                stats.elapsed = time.monotonic() - started
+        # the last finished worker tells consumers that no more items will come
+        if last:
+            for _ in range(consumers):
+                self._put(target, _DONE)
+
+    def run(self, items: Iterable[Any]) -> Iterator[Any]:
+        """
+        Pass items through all stages and yield not None results of the last stage as soon as they ready.
+        Items are consumed lazily. If iteration stopped early then workers finish their current items and exit.
+        """
+        self._stopped.clear()
+        workers = [it.workers for it in self._stats]
+        # stream stage is run by one thread, its function has its own workers
+        threads_counts = [1 if stage.stream else count for stage, count in zip(self._stages, workers)]
+        queues = [
+            queue.Queue(maxsize=stage.queue_size or count)
+            for stage, count in zip(self._stages, workers)
+        ]
+        output: queue.Queue = queue.Queue(maxsize=workers[-1])
+        targets = queues[1:] + [output]
+        consumers = threads_counts[1:] + [1]
+        active = list(threads_counts)
+        started = time.monotonic()
+
+        threads = [threading.Thread(
+            target=self._feed, args=(items, queues[0], threads_counts[0]), name="pipeline-feed", daemon=True)]
+        for index, stage in enumerate(self._stages):
+            threads.extend(
+                threading.Thread(
+                    target=self._stream if stage.stream else self._work,
+                    args=(index, queues[index], targets[index], consumers[index], started, active),
+                    name=f"pipeline-{stage.name}-{number}",
+                    daemon=True)
+                for number in range(threads_counts[index]))
+
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                result = self._get(output)
+                if result is _DONE:
+                    break
+                yield result
+        finally:
+            self._stopped.set()
+            for thread in threads:
+                thread.join()
+
+    def stats(self) -> List[StageStats]:
+        with self._lock:
+            return [StageStats(**vars(it)) for it in self._stats]
@@ -0,0 +1,88 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, Iterator, Tuple, TypeVar, Optional, Dict, Deque
+
+from utils.logging import logger
+
+log = logger()
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+_END = object()
+
+# processes are started while threads of the caller (e.g. downloads) are running, forking
+# a multi-threaded process may deadlock in child on a lock held by another thread
+_MP_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def process_unordered(
+        function: Callable[[T], R],
+        items: Iterable[T],
+        workers: int
+) -> Iterator[Tuple[T, Optional[R], Optional[BaseException]]]:
+    """
+    Call function for each item in a pool of processes and yield (item, result, error) in order of completion.
+    Items are consumed lazily and at most `workers` of them are in the pool at a time.
+
+    If a process of the pool died (e.g. killed by OOM killer or crashed in native code) the pool is
+    recreated. Items that were in the pool at that moment are retried one by one, so only the item
+    that crashes a process again is reported with BrokenProcessPool error and the rest are not affected.
+
+    Processes are spawned, not forked, so it is safe to call from a process running other threads.
+
+    :param function: picklable function to call in another process
+    :param items: picklable arguments of the function
+    :param workers: number of processes
+    """
+    items = iter(items)
+    # items which were in the pool when it broke, each one is retried alone
+    suspects: Deque[T] = deque()
+    pending: Dict[Future, T] = dict()
+    isolated = False
+
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=_MP_CONTEXT)
+    try:
+        while True:
+            if suspects:
+                if not pending:
+                    item = suspects.popleft()
+                    pending[executor.submit(function, item)] = item
+                    isolated = True
+            else:
+                isolated = False
+                while len(pending) < workers:
+                    item = next(items, _END)
+                    if item is _END:
+                        break
+                    pending[executor.submit(function, item)] = item
+
+            if not pending:
+                return
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            broken = any(isinstance(it.exception(), BrokenProcessPool) for it in done)
+            if broken:
+                # all other futures of the broken pool fail too, so wait for them to collect all items
+                done, _ = wait(pending)
+
+            for future in done:
+                item = pending.pop(future)
+                error = future.exception()
+                if not isinstance(error, BrokenProcessPool):
+                    yield item, future.result() if error is None else None, error
+                elif isolated:
+                    yield item, None, error
+                else:
+                    suspects.append(item)
+
+            if broken:
+                log.error(f"Process pool is broken, {len(suspects)} items to retry one by one")
+                executor.shutdown(wait=False)
+                executor = ProcessPoolExecutor(max_workers=workers, mp_context=_MP_CONTEXT)
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)